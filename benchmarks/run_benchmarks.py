@@ -0,0 +1,209 @@
+"""Benchmark the data-heavy operations of the app on synthetic school data.
+
+    python -m benchmarks.run_benchmarks --groups 20 --students 500 --years 2 --output results.json
+
+The data is generated under a temporary LOCALAPPDATA, so the real data of
+the app is never touched. Every benchmark is timed once cold (caches
+cleared) and then `--repeat` times warm; the results are printed (or
+written to --output) as JSON so runs of different releases can be compared.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synthetic_data import SyntheticSchool
+
+
+class HeadlessPage:
+    """Minimal stand-in for ft.Page so pages and views can be built without a window"""
+
+    def __init__(self):
+        self.window_width = 1200
+        self.window_height = 800
+        self.snack_bar = None
+        self.overlay = []
+        self.controls = []
+
+    def add(self, *controls):
+        self.controls.extend(controls)
+
+    def update(self, *controls):
+        pass
+
+    def open(self, control):
+        pass
+
+    def close(self, control):
+        pass
+
+
+class BenchmarkSuite:
+    """Times the key operations against the data under the current LOCALAPPDATA"""
+
+    SEARCH_QUERIES = ["נועה", "כהן", "2000001", "05", "בלט 1", "לא קיים"]
+    EXPLANATION_SAMPLE = 100
+
+    def __init__(self, repeat=5):
+        self.repeat = repeat
+
+    @staticmethod
+    def reset_caches():
+        from utils.data_store import DataStore
+        from utils.payment_ledger import PaymentLedger
+        PaymentLedger.ledger_file().unlink(missing_ok=True)
+        DataStore.invalidate()
+
+    def benchmarks(self):
+        return [
+            ("filter_students", self.filter_students),
+            ("get_all_dashboard_data", self.dashboard_data),
+            ("calculate_student_payment_until_now", self.payment_until_now),
+            ("get_student_payment_explanation", self.payment_explanation),
+            ("get_attendance_statistics", self.attendance_statistics),
+            ("groups_page_view", self.groups_page_view),
+            ("students_table_view", self.students_table_view),
+        ]
+
+    # ----- operations -----
+
+    def filter_students(self):
+        from utils.students_data_manager import StudentsDataManager
+        manager = StudentsDataManager()
+        students = manager.get_all_students()
+        return sum(len(manager.filter_students(students, query)) for query in self.SEARCH_QUERIES)
+
+    def dashboard_data(self):
+        from utils.dashboard_data import get_all_dashboard_data
+        return get_all_dashboard_data()["total_students"]
+
+    def payment_until_now(self):
+        from utils.payment_utils import PaymentCalculator
+        calculator = PaymentCalculator()
+        return sum(
+            1 for student in calculator.load_students()
+            if calculator.calculate_student_payment_until_now(student["id"]).get("success")
+        )
+
+    def payment_explanation(self):
+        from utils.payment_utils import PaymentCalculator
+        calculator = PaymentCalculator()
+        students = calculator.load_students()[:self.EXPLANATION_SAMPLE]
+        return sum(
+            1 for student in students
+            if calculator.get_student_payment_explanation(student["id"]).get("success")
+        )
+
+    def attendance_statistics(self):
+        from utils.attendance_utils import AttendanceUtils
+        from utils.data_store import DataStore
+        from utils.models import Records
+        total = 0
+        for group in DataStore.load_groups():
+            group_students = Records.students().in_group(group["id"])
+            matrix = AttendanceUtils.load_attendance_matrix(group["id"])
+            total += AttendanceUtils.get_attendance_statistics(matrix, group_students)["total_present"]
+        return total
+
+    def groups_page_view(self):
+        from pages.groups_page import GroupsPage
+        view = GroupsPage(HeadlessPage(), lambda *args: None).get_view()
+        return len(view.controls)
+
+    def students_table_view(self):
+        from components.students_table import StudentsTable
+        from utils.data_store import DataStore
+        table = StudentsTable()
+        table.update(DataStore.load_students())
+        table.get_container()
+        return len(table.list_view.controls)
+
+    # ----- timing -----
+
+    @staticmethod
+    def _time(operation):
+        # The operations print diagnostics; keep them out of the JSON output
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = operation()
+            elapsed = time.perf_counter() - start
+        return elapsed * 1000, result
+
+    def run_one(self, name, operation):
+        try:
+            self.reset_caches()
+            cold_ms, result = self._time(operation)
+            warm = [self._time(operation)[0] for _ in range(self.repeat)]
+        except Exception as e:
+            return {"name": name, "error": f"{type(e).__name__}: {e}"}
+        return {
+            "name": name,
+            "result": result if isinstance(result, (int, float, str)) else None,
+            "cold_ms": round(cold_ms, 3),
+            "warm_min_ms": round(min(warm), 3) if warm else None,
+            "warm_median_ms": round(statistics.median(warm), 3) if warm else None,
+            "warm_mean_ms": round(statistics.mean(warm), 3) if warm else None,
+            "repeat": len(warm)
+        }
+
+    def run(self, only=None):
+        return [
+            self.run_one(name, operation)
+            for name, operation in self.benchmarks()
+            if not only or name in only
+        ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the app on synthetic school data")
+    parser.add_argument("--groups", type=int, default=20)
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--years", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="*", help="names of the benchmarks to run")
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="danceschool-bench-") as root:
+        os.environ["LOCALAPPDATA"] = root
+        start = time.perf_counter()
+        SyntheticSchool(args.groups, args.students, args.years, args.seed).write(root)
+        generate_ms = (time.perf_counter() - start) * 1000
+        results = BenchmarkSuite(args.repeat).run(args.only)
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {
+            "groups": args.groups,
+            "students": args.students,
+            "years": args.years,
+            "seed": args.seed,
+            "repeat": args.repeat
+        },
+        "generate_ms": round(generate_ms, 3),
+        "benchmarks": results
+    }
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import json
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+from utils.date_utils import HEBREW_WEEKDAYS
+
+FIRST_NAMES = ["נועה", "מאיה", "תמר", "שירה", "יעל", "אביגיל", "הדס", "רוני", "ליה", "אורי", "מיכל", "עדי"]
+LAST_NAMES = ["כהן", "לוי", "מזרחי", "פרץ", "ביטון", "אברהם", "פרידמן", "דהן", "אזולאי", "שפירא"]
+STYLES = ["בלט", "היפ הופ", "ג'אז", "מודרני"]
+PAYMENT_METHODS = ["מזומן", "העברה בנקאית", "אשראי", "צ'ק"]
+PAYMENT_STATUSES = ["חוב", "שולם", "שולם עד כה"]
+MEETING_DAYS = [day for day in HEBREW_WEEKDAYS if day != "שבת"]
+
+
+class SyntheticSchool:
+    """Generates a synthetic school data root for benchmarks.
+
+    Writes the same layout the app reads from LOCALAPPDATA: `DanceSchool/data`
+    (students, groups, joining dates, pricing) and `DanceSchool/attendances`
+    with a weekly attendance file per group covering `years` years. The data
+    is deterministic for a given seed.
+    """
+
+    def __init__(self, groups=20, students=500, years=2, seed=1, end_date=None):
+        self.group_count = groups
+        self.student_count = students
+        self.years = years
+        self.random = random.Random(seed)
+        self.end_date = end_date or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        self.start_date = self.end_date - timedelta(days=365 * years)
+
+    def _random_date(self, start, end):
+        return start + timedelta(days=self.random.randint(0, max((end - start).days, 0)))
+
+    def _groups(self):
+        groups = []
+        for group_id in range(1, self.group_count + 1):
+            start = self._random_date(self.start_date, self.start_date + timedelta(days=60))
+            groups.append({
+                "id": group_id,
+                "name": f"{STYLES[group_id % len(STYLES)]} {group_id}",
+                "teacher": f"{self.random.choice(FIRST_NAMES)} {self.random.choice(LAST_NAMES)}",
+                "teacher_phone": f"05{self.random.randint(0, 99999999):08d}",
+                "teacher_email": f"teacher{group_id}@example.com",
+                "location": f"סטודיו {group_id % 3 + 1}",
+                "age_group": f"{self.random.randint(4, 16)}",
+                "price": str(self.random.choice([150, 180, 200, 220])),
+                "day_of_week": self.random.choice(MEETING_DAYS),
+                "group_start_date": start.strftime("%d/%m/%Y"),
+                "group_end_date": (self.end_date + timedelta(days=180)).strftime("%d/%m/%Y"),
+                "students": []
+            })
+        return groups
+
+    def _payments(self, join_date):
+        payments = []
+        for _ in range(self.random.randint(0, 4 * self.years)):
+            date = self._random_date(join_date, self.end_date)
+            payments.append({
+                "amount": str(self.random.choice([90, 180, 280, 360, 540])),
+                "date": date.strftime("%d/%m/%Y"),
+                "payment_method": self.random.choice(PAYMENT_METHODS)
+            })
+        return payments
+
+    def build(self):
+        """Return (students_data, groups_data, joining_dates, attendance by group id)"""
+        groups = self._groups()
+        students = []
+        joining_dates = {}
+        members = {group["id"]: [] for group in groups}
+
+        for index in range(self.student_count):
+            student_id = str(200000000 + index)
+            name = f"{self.random.choice(FIRST_NAMES)} {self.random.choice(LAST_NAMES)} {index}"
+            enrolled = self.random.sample(groups, min(len(groups), self.random.choice([1, 1, 1, 2, 2, 3])))
+            join_date = self._random_date(self.start_date, self.end_date - timedelta(days=30))
+
+            for group in enrolled:
+                group_join = self._random_date(join_date, join_date + timedelta(days=90))
+                joining_dates.setdefault(str(group["id"]), []).append({
+                    "student_id": student_id,
+                    "student_name": name,
+                    "join_date": group_join.strftime("%d/%m/%Y")
+                })
+                members[group["id"]].append((student_id, group_join))
+
+            students.append({
+                "id": student_id,
+                "name": name,
+                "phone": f"05{self.random.randint(0, 99999999):08d}",
+                "group_ids": [group["id"] for group in enrolled],
+                "join_date": join_date.strftime("%d/%m/%Y"),
+                "has_sister": self.random.random() < 0.15,
+                "payment_status": self.random.choice(PAYMENT_STATUSES),
+                "payments": self._payments(join_date)
+            })
+
+        attendance = {}
+        for group in groups:
+            attendance[group["id"]] = self._attendance(group, members[group["id"]])
+
+        return {"students": students}, {"groups": groups}, joining_dates, attendance
+
+    def _attendance(self, group, group_members):
+        weekday = HEBREW_WEEKDAYS[group["day_of_week"]]
+        day = datetime.strptime(group["group_start_date"], "%d/%m/%Y")
+        day += timedelta(days=(weekday - day.weekday()) % 7)
+        attendance = {}
+        while day <= self.end_date:
+            attendance[day.strftime("%d/%m/%Y")] = {
+                student_id: self.random.random() < 0.85
+                for student_id, joined in group_members if joined <= day
+            }
+            day += timedelta(days=7)
+        return attendance
+
+    def write(self, root):
+        """Write the data under root (used as LOCALAPPDATA) and return the app folder"""
+        app_folder = Path(root) / "DanceSchool"
+        data_dir = app_folder / "data"
+        attendances_dir = app_folder / "attendances"
+        data_dir.mkdir(parents=True, exist_ok=True)
+        attendances_dir.mkdir(parents=True, exist_ok=True)
+
+        students, groups, joining_dates, attendance = self.build()
+        SyntheticSchool._dump(data_dir / "students.json", students, 4)
+        SyntheticSchool._dump(data_dir / "groups.json", groups, 2)
+        SyntheticSchool._dump(data_dir / "joining_dates.json", joining_dates, 2)
+        SyntheticSchool._dump(data_dir / "pricing.json", {"single": 180, "two": 280, "three": 360, "sister": 20}, 4)
+        for group_id, group_attendance in attendance.items():
+            SyntheticSchool._dump(attendances_dir / f"attendance_{group_id}.json", group_attendance, 2)
+        return app_folder
+
+    @staticmethod
+    def _dump(path, data, indent):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=indent)
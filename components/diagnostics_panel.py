@@ -0,0 +1,102 @@
+import flet as ft
+from utils.data_store import DataStore
+from utils.instrumentation import Instrumentation
+
+
+class DiagnosticsPanel:
+    """Dialog showing the instrumentation counters, with on/off, reset and dump-to-file.
+
+    Also offers the one-way move of the data files into the SQLite backend.
+    """
+
+    def __init__(self, page: ft.Page):
+        self.page = page
+        self.report = ft.ListView(spacing=2, expand=True)
+        self.status = ft.Text("", size=12, color=ft.Colors.GREY_600, rtl=True)
+        self.dialog = None
+
+    def refresh(self, e=None):
+        lines = Instrumentation.report_lines()
+        if not lines:
+            lines = ["אין נתונים עדיין" if Instrumentation.enabled else "האיסוף כבוי"]
+        self.report.controls = [
+            ft.Text(line, size=12, font_family="monospace", selectable=True, no_wrap=True)
+            for line in lines
+        ]
+        if self.dialog is not None:
+            self.page.update()
+
+    def toggle(self, e):
+        if e.control.value:
+            Instrumentation.enable()
+        else:
+            Instrumentation.disable()
+        self.refresh()
+
+    def reset(self, e):
+        Instrumentation.reset()
+        self.status.value = ""
+        self.refresh()
+
+    def dump(self, e):
+        try:
+            path = Instrumentation.dump()
+            self.status.value = f"נשמר: {path}"
+        except Exception as ex:
+            print(f"Error saving diagnostics: {ex}")
+            self.status.value = "שגיאה בשמירת הקובץ"
+        self.page.update()
+
+    def migrate(self, e):
+        summary = DataStore.migrate_to_sqlite()
+        if summary.get("success"):
+            self.status.value = (
+                f"הנתונים הועברו ל-SQLite: {summary['students']} תלמידות, "
+                f"{summary['groups']} קבוצות, {summary['attendance_files']} קבצי נוכחות"
+            )
+            e.control.disabled = True
+        else:
+            print(f"Error migrating to SQLite: {summary.get('error')}")
+            self.status.value = "שגיאה בהעברת הנתונים ל-SQLite"
+        self.page.update()
+
+    def close(self, e):
+        self.page.close(self.dialog)
+
+    def open(self):
+        self.refresh()
+        self.dialog = ft.AlertDialog(
+            modal=True,
+            title=ft.Row([
+                ft.Icon(ft.Icons.SPEED, color=ft.Colors.BLUE_600),
+                ft.Text("אבחון ביצועים", size=20, weight=ft.FontWeight.BOLD, color=ft.Colors.BLUE_GREY_800),
+            ], spacing=8, rtl=True),
+            content=ft.Container(
+                content=ft.Column([
+                    ft.Row([
+                        ft.Switch(value=Instrumentation.enabled, on_change=self.toggle, active_color=ft.Colors.BLUE),
+                        ft.Text("איסוף מדידות", color=ft.Colors.BLUE_GREY_700),
+                    ], spacing=10, rtl=True),
+                    ft.Container(
+                        content=self.report,
+                        bgcolor=ft.Colors.GREY_50,
+                        border_radius=8,
+                        padding=ft.padding.all(10),
+                        expand=True,
+                    ),
+                    self.status,
+                ], spacing=10),
+                width=760,
+                height=480,
+            ),
+            actions=[
+                ft.TextButton("רענון", on_click=self.refresh),
+                ft.TextButton("איפוס", on_click=self.reset),
+                ft.TextButton("שמירה לקובץ", on_click=self.dump),
+                ft.TextButton("מעבר ל-SQLite", on_click=self.migrate, disabled=DataStore.backend() is not None),
+                ft.ElevatedButton("סגירה", on_click=self.close, bgcolor=ft.Colors.BLUE_600, color=ft.Colors.WHITE),
+            ],
+            shape=ft.RoundedRectangleBorder(radius=16),
+            bgcolor=ft.Colors.WHITE,
+        )
+        self.page.open(self.dialog)
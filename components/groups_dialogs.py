@@ -1,7 +1,8 @@
-from datetime import datetime
 import flet as ft
-import json
-from utils.manage_json import ManageJSON
+from utils.data_store import DataStore
+from utils.date_utils import is_valid_date
+from utils.payment_ledger import PaymentLedger
+from utils.groups_data_manager import GroupsDataManager
 
 class GroupDialogs:
     @staticmethod
@@ -204,14 +205,7 @@ class GroupDialogs:
         def check_group_name_exists(new_name, current_name):
             """Check if group name already exists (excluding current group)"""
             try:
-                data_dir = ManageJSON.get_appdata_path() / "data"
-                data_dir.mkdir(parents=True, exist_ok=True)
-                groups_file = data_dir / "groups.json"
-                
-                with open(groups_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                
-                existing_groups = data.get("groups", [])
+                existing_groups = DataStore.load(DataStore.groups_file()).get("groups", [])
                 return any(g.get('name', '').strip().lower() == new_name.lower() 
                           for g in existing_groups 
                           if g.get('name', '').strip().lower() != current_name.lower())
@@ -226,11 +220,7 @@ class GroupDialogs:
             page.update()
 
         def validate_date(date_str):
-            try:
-                datetime.strptime(date_str, "%d/%m/%Y")
-                return True
-            except ValueError:
-                return False
+            return is_valid_date(date_str)
             
         def save_changes(e):
             try:
@@ -249,21 +239,17 @@ class GroupDialogs:
                     show_error_dialog("קבוצה בשם זה כבר קיימת במערכת")
                     return
                 
-                data_dir = ManageJSON.get_appdata_path() / "data"
-                data_dir.mkdir(parents=True, exist_ok=True)
-                groups_file = data_dir / "groups.json"
-                
-                with open(groups_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
+                groups_file = DataStore.groups_file()
+                data = DataStore.load_copy(groups_file)
                 
                 groups = data.get("groups", [])
-                old_group_name = None
+                group_id = group.get("id")
                 
                 for i, g in enumerate(groups):
                     if g.get("id") == group.get("id") or g.get("name") == group.get("name"):
-                        old_group_name = g.get("name")
+                        group_id = g.get("id", group.get("id"))
                         updated_group = {
-                            "id": g.get("id", group.get("id")),
+                            "id": group_id,
                             "name": new_group_name,
                             "teacher": teacher_field.value.strip() if teacher_field.value.strip() else "לא צוין",
                             "age_group": age_group_field.value.strip() if age_group_field.value.strip() else "לא צוין",
@@ -279,36 +265,9 @@ class GroupDialogs:
                         groups[i] = updated_group
                         break
                 
-                with open(groups_file, "w", encoding="utf-8") as f:
-                    json.dump(data, f, ensure_ascii=False, indent=2)
-                
-                if old_group_name and old_group_name != new_group_name:
-                    try:
-                        students_file = data_dir / "students.json"
-                        if students_file.exists():
-                            with open(students_file, "r", encoding="utf-8") as f:
-                                students_data = json.load(f)
-                            
-                            students_updated = False
-                            for student in students_data.get("students", []):
-                                student_groups = student.get("groups", [])
-                                
-                                if isinstance(student_groups, list):
-                                    for j, group_name in enumerate(student_groups):
-                                        if group_name.strip() == old_group_name.strip():
-                                            student_groups[j] = new_group_name
-                                            students_updated = True
-                                elif isinstance(student_groups, str):
-                                    if student_groups.strip() == old_group_name.strip():
-                                        student["groups"] = new_group_name
-                                        students_updated = True
-                            
-                            if students_updated:
-                                with open(students_file, "w", encoding="utf-8") as f:
-                                    json.dump(students_data, f, ensure_ascii=False, indent=2)
-                            
-                    except Exception as students_ex:
-                        print(f"⚠️ Error in update: {str(students_ex)}")
+                # Students reference the group by id, so a rename only touches groups.json
+                DataStore.save(groups_file, data)
+                PaymentLedger.invalidate_group(group_id)
                 
                 page.close(edit_dialog)
                 on_success_callback("הקבוצה עודכנה בהצלחה")
@@ -595,23 +554,11 @@ class GroupDialogs:
         
         def delete_group(e):
             try:
-                data_dir = ManageJSON.get_appdata_path() / "data"
-                data_dir.mkdir(parents=True, exist_ok=True)
-                groups_file = data_dir / "groups.json"
-                
-                with open(groups_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                
-                groups = data.get("groups", [])
-                groups = [g for g in groups if g["name"] != group["name"]]
-                data["groups"] = groups
-                
-                with open(groups_file, "w", encoding="utf-8") as f:
-                    json.dump(data, f, ensure_ascii=False, indent=2)
+                success, message = GroupsDataManager().delete_group(group)
                 
                 page.close(delete_dialog)
                 
-                on_success_callback("הקבוצה נמחקה בהצלחה")
+                on_success_callback(message, is_error=not success)
                 
             except Exception as ex:
                 on_success_callback(f"שגיאה במחיקת הקבוצה: {str(ex)}", is_error=True)
@@ -66,6 +66,45 @@ class NoResultsDialog:
         page.update()
 
 
+    @staticmethod
+    def create_inline() -> ft.Container:
+        """No results state shown in place of the results, without interrupting typing"""
+        return ft.Container(
+            content=ft.Column([
+                ft.Icon(ft.Icons.SEARCH_OFF, size=64, color=ft.Colors.ORANGE_600),
+                ft.Container(height=16),
+                ft.Text(
+                    "אין תוצאות",
+                    size=20,
+                    weight=ft.FontWeight.W_600,
+                    color=ft.Colors.BLUE_GREY_800,
+                    text_align=ft.TextAlign.CENTER,
+                    rtl=True
+                ),
+                ft.Container(height=8),
+                ft.Text(
+                    "לא נמצאה אף תלמידה התואמת לדרישות החיפוש",
+                    size=16,
+                    color=ft.Colors.BLUE_GREY_600,
+                    text_align=ft.TextAlign.CENTER,
+                    rtl=True
+                ),
+                ft.Text(
+                    "נסה לחפש במילים אחרות או לבדוק את האיות",
+                    size=14,
+                    color=ft.Colors.GREY_500,
+                    text_align=ft.TextAlign.CENTER,
+                    rtl=True
+                )
+            ], horizontal_alignment=ft.CrossAxisAlignment.CENTER),
+            padding=ft.padding.all(64),
+            alignment=ft.alignment.center,
+            bgcolor=ft.Colors.WHITE,
+            border_radius=12,
+            border=ft.border.all(1, ft.Colors.with_opacity(0.1, ft.Colors.GREY_400))
+        )
+
+
 class NoResultsDialogAlternative:
     """No results dialog component """
     
@@ -1,13 +1,47 @@
 import flet as ft
 from typing import List, Dict, Any
 from utils.payment_utils import PaymentCalculator
+from utils.payment_book import PaymentBook
+from utils.payment_ledger import PaymentLedger
+from utils.models import Records
 
 class StudentsTable:
-    """Students table component"""
+    """Students table component.
+
+    Rows are rendered in a ListView under a fixed header, one page at a time:
+    the first PAGE_SIZE rows are built on update and the next page is added
+    when the list is scrolled near its end. Built row controls are kept per
+    student record and reused when the same student is shown again (e.g.
+    while the search query changes), as long as groups.json (which names
+    the student's groups) did not change.
+    """
+
+    PAGE_SIZE = 50
+    LOAD_MORE_THRESHOLD = 400
+    TABLE_HEIGHT = 600
 
     def __init__(self):
-        self.table_container = ft.Column(controls=[], spacing=0, scroll=ft.ScrollMode.AUTO)
         self.payment_calculator = PaymentCalculator()
+        self.balances = {}
+        self.students = []
+        self._row_cache = {}
+        self.list_view = ft.ListView(
+            controls=[],
+            spacing=0,
+            expand=True,
+            first_item_prototype=True,
+            on_scroll_interval=50,
+            on_scroll=self._on_scroll,
+        )
+        self.table_container = ft.Column([self.create_header(), self.list_view], spacing=0, expand=True)
+        self.container = ft.Container(
+            content=self.table_container,
+            bgcolor=ft.Colors.WHITE,
+            border_radius=12,
+            border=ft.border.all(1, ft.Colors.with_opacity(0.1, ft.Colors.GREY_400)),
+            height=self.TABLE_HEIGHT,
+            clip_behavior=ft.ClipBehavior.HARD_EDGE
+        )
 
     def create_header(self) -> ft.Container:
         """Create table header row"""
@@ -73,9 +107,10 @@ class StudentsTable:
         row_color =  ft.Colors.WHITE
         student_id = student.get("id") 
         payment_status = student.get("payment_status", "")
-        amount = self.calculate_total_paid_advanced(student.get("payments", []))
+        amount = PaymentBook.shekels(PaymentBook.current().paid(student))
+        group_ids = Records.students().record_for(student).group_ids
         payment_color, payment_bg, payment_icon, display_text = self._get_payment_style(
-            payment_status, amount, student.get('groups', []), student.get("join_date"), student_id
+            payment_status, amount, group_ids, student.get("join_date"), student_id
         )
 
         cell_style = {
@@ -124,7 +159,7 @@ class StudentsTable:
                 ft.Container(
                     content=ft.Container(
                         content=ft.Text(
-                            ", ".join(student.get("groups", [])),
+                            ", ".join(Records.groups().names(group_ids)),
                             size=13,
                             weight=ft.FontWeight.W_500,
                             text_align=ft.TextAlign.CENTER,
@@ -179,58 +214,23 @@ class StudentsTable:
             border=ft.border.only(bottom=ft.BorderSide(1, ft.Colors.with_opacity(0.1, ft.Colors.GREY_400))),
         )
 
-    def _get_payment_style(self, payment_status: str, amount, student_groups, join_date, student_id=None):
+    def _get_payment_style(self, payment_status: str, amount, group_ids, join_date, student_id=None):
         """Get payment status styling"""
         if payment_status == "שולם":
             return ft.Colors.GREEN_600, ft.Colors.with_opacity(0.1, ft.Colors.GREEN_600), ft.Icons.CHECK_CIRCLE, "שולם"
         elif payment_status == "חוב":
             if student_id:
-                total_owed_until_now = self.payment_calculator.get_student_payment_amount_until_now(student_id)
-                
-                latest_end_date = ""
-                for group_name in student_groups:
-                    group_id = self.payment_calculator.get_group_id_by_name(group_name)
-                    if group_id:
-                        group = self.payment_calculator.get_group_by_id(group_id)
-                        group_end_date = group.get("group_end_date", "") if group else ""
-                        if group_end_date > latest_end_date:
-                            latest_end_date = group_end_date
-                
-                if latest_end_date:
-                    first_group_name = student_groups[0] if student_groups else None
-                    if first_group_name:
-                        first_group_id = self.payment_calculator.get_group_id_by_name(first_group_name)
-                        if first_group_id:
-                            actual_join_date = self.payment_calculator.get_student_join_date_for_group(student_id, first_group_id)
-                            if actual_join_date:
-                                all_course_payment = self.payment_calculator.get_student_payment_amount_for_period(
-                                    student_id, first_group_id, actual_join_date, latest_end_date
-                                )
-                            else:
-                                all_course_payment = 0
-                        else:
-                            all_course_payment = 0
-                    else:
-                        all_course_payment = 0
+                if student_id in self.balances:
+                    total_owed_until_now = self.balances[student_id]["total_owed"]
                 else:
-                    all_course_payment = 0
+                    total_owed_until_now = self.payment_calculator.get_student_payment_amount_until_now(student_id)
             else:
                 total_owed_until_now = 0
-                all_course_payment = 0
-                for group_name in student_groups:
-                    group_id = self.payment_calculator.get_group_id_by_name(group_name)
-                    if group_id:
+                for group_id in group_ids:
+                    if group_id is not None:
                         actual_join_date = self.payment_calculator.get_student_join_date_for_group(student_id, group_id) if student_id else join_date
                         if actual_join_date:
-                            group_payment = self.payment_calculator.get_payment_amount_until_now(group_id, actual_join_date)
-                            group = self.payment_calculator.get_group_by_id(group_id)
-                            group_end_date = group.get("group_end_date", "") if group else ""
-                            if group_end_date:
-                                group_course_payment = self.payment_calculator.get_payment_amount_for_period(group_id, actual_join_date, group_end_date)
-                            else:
-                                group_course_payment = 0
-                            total_owed_until_now += group_payment
-                            all_course_payment += group_course_payment
+                            total_owed_until_now += self.payment_calculator.get_payment_amount_until_now(group_id, actual_join_date)
             
             
             if amount >= total_owed_until_now:
@@ -243,40 +243,44 @@ class StudentsTable:
 
     def update(self, students: List[Dict[str, Any]]):
         """Update table with students data"""
-        self.table_container.controls = [self.create_header()]
+        self.students = students or []
+        shown = {id(student) for student in self.students}
+        self._row_cache = {key: cached for key, cached in self._row_cache.items() if key in shown}
+        self.list_view.controls = []
+        self._append_page()
 
-        if students:
-            for index, student in enumerate(students):
-                self.table_container.controls.append(self.create_row(student, index))
+    def _append_page(self):
+        """Build the rows of the next page and add them to the list"""
+        start = len(self.list_view.controls)
+        page_students = self.students[start:start + self.PAGE_SIZE]
+        self.balances = PaymentLedger.get_balances(
+            [s for s in page_students if s.get("id") and s.get("payment_status") == "חוב"],
+            self.payment_calculator
+        )
+        for index, student in enumerate(page_students, start):
+            self.list_view.controls.append(self._get_row(student, index))
+
+    def _get_row(self, student: Dict[str, Any], index: int) -> ft.Container:
+        """Reuse the row built for this student record if its balance and the groups are unchanged"""
+        balance = self.balances.get(student.get("id"))
+        groups = Records.groups()
+        cached = self._row_cache.get(id(student))
+        if cached and cached[0] is student and cached[1] == balance and cached[2] is groups:
+            return cached[3]
+        row = self.create_row(student, index)
+        self._row_cache[id(student)] = (student, balance, groups, row)
+        return row
+
+    def _on_scroll(self, e):
+        if len(self.list_view.controls) >= len(self.students):
+            return
+        if e.pixels >= e.max_scroll_extent - self.LOAD_MORE_THRESHOLD:
+            self._append_page()
+            self.list_view.update()
 
     def get_container(self) -> ft.Container:
         """Get the table container"""
-        return ft.Container(
-            content=ft.Column([self.table_container], scroll=ft.ScrollMode.AUTO),
-            bgcolor=ft.Colors.WHITE,
-            border_radius=12,
-            border=ft.border.all(1, ft.Colors.with_opacity(0.1, ft.Colors.GREY_400)),
-            expand=True,
-            clip_behavior=ft.ClipBehavior.HARD_EDGE
-        )
+        return self.container
     
 
-    def calculate_total_paid_advanced(self, payments_array):
-        total_paid = 0.0
-        
-        if not payments_array or not isinstance(payments_array, list):
-            return 0.0
-        
-        for payment in payments_array:
-            if isinstance(payment, dict) and 'amount' in payment:
-                amount_str = payment.get('amount', '0')
-                
-                try:
-                    clean_amount = str(amount_str).replace(',', '.')
-                    amount = float(clean_amount)
-                    total_paid += amount
-                except (ValueError, TypeError):
-                    continue
-        
-        return total_paid
 
@@ -1,13 +1,17 @@
+from utils.startup_profiler import StartupProfiler
+
+if StartupProfiler.is_requested():
+    StartupProfiler.start()
+
 import flet as ft
 import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from typing import Optional
 import os
 import json
-from pages.choose_group_attendance_page import AttendancePage
-from pages.groups_page import GroupsPage  
-from pages.students_list import StudentsListPage
-from pages.payment_page import PaymentPage
-from utils.dashboard_data import get_all_dashboard_data
+from utils.data_store import DataStore
+from utils.instrumentation import Instrumentation
 
 def ensure_pricing_file():
     base_dir = os.path.join(os.environ["LOCALAPPDATA"], "DanceSchool", "data")
@@ -27,6 +31,8 @@ def format_currency(amount):
 
 
 class MainApp:
+    PAGE_TITLES = ["דף הבית", "קבוצות", "נוכחות", "תשלומים", "רשימת התלמידות", "תמחור"]
+
     def __init__(self, page: ft.Page):
         self.page = page
         self.page.title = "זה הריקוד שלך"
@@ -39,12 +45,18 @@ class MainApp:
         self.page.fonts = {
             "Segoe UI": "fonts/SegoeUI.ttf" if os.path.exists("fonts/SegoeUI.ttf") else None
         }
-        self.dashboard_data = get_all_dashboard_data()
+        self.dashboard_data = None
+        self.groups_data = None
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="home-loader")
+        self.stats_slot = None
+        self.groups_slot = None
         self.current_page_index = 0
         self.sidebar_buttons = []
         self.progress_bar = None
         self.progress_text = None
         self.groups_page = None
+        self.page_cache = {}
+        Instrumentation.watch_page(self.page)
         self.setup_page()
 
     def setup_page(self):
@@ -62,6 +74,9 @@ class MainApp:
         ], spacing=0, expand=True)
         
         self.page.add(main_row)
+        StartupProfiler.mark_first_frame()
+        self.load_home_data()
+        self.executor.submit(self._run_maintenance)
 
     def create_sidebar_button(self, text: str, icon: str, index: int, is_selected: bool = False):
         """Create an animated sidebar button using built-in Flet components"""
@@ -124,6 +139,10 @@ class MainApp:
 
         def toggle_dark_mode(e):
             self.toggle_dark_mode(e.control.value)
+
+        def open_diagnostics(e):
+            from components.diagnostics_panel import DiagnosticsPanel
+            DiagnosticsPanel(self.page).open()
             
         dark_mode_switch = ft.Switch(
             value=False,
@@ -160,6 +179,13 @@ class MainApp:
                         dark_mode_switch,
                         ft.Text("מצב כהה", color=ft.Colors.GREY_400),
                     ], spacing=10),
+                    ft.TextButton(
+                        "אבחון ביצועים",
+                        icon=ft.Icons.SPEED,
+                        icon_color=ft.Colors.GREY_400,
+                        style=ft.ButtonStyle(color=ft.Colors.GREY_400),
+                        on_click=open_diagnostics,
+                    ),
                 ], spacing=10),
                 padding=ft.padding.all(20),
             ),
@@ -174,35 +200,72 @@ class MainApp:
 
     def navigate_to_page(self, page_index: int):
         """Navigate to a specific page"""
+        Instrumentation.begin_action(f"ניווט: {self.PAGE_TITLES[page_index]}")
         self.current_page_index = page_index
         self.sidebar.content = self.create_sidebar().content
         if page_index == 0:
             self.content_area.content = self.create_home_page()
-            self.refresh_home_page()
         elif page_index == 1:
             if self.groups_page is None:
+                from pages.groups_page import GroupsPage
                 self.groups_page = GroupsPage(self.page, self.handle_navigation)
             self.content_area.content = self.groups_page.get_view()
         elif page_index == 2:
-            attendance_page = AttendancePage(self.page, self.handle_navigation)
-            self.content_area.content = attendance_page.get_view()
+            from pages.choose_group_attendance_page import AttendancePage
+            self.content_area.content = self.get_cached_page_view(
+                page_index, lambda: AttendancePage(self.page, self.handle_navigation)
+            )
         elif page_index == 3:
-            payment_page = PaymentPage(self.page, self.handle_navigation)
-            self.content_area.content = payment_page.get_view()
+            from pages.payment_page import PaymentPage
+            self.content_area.content = self.get_cached_page_view(
+                page_index, lambda: PaymentPage(self.page, self.handle_navigation)
+            )
         elif page_index == 4:
-            students_page = StudentsListPage(self.page, self.handle_navigation)
-            self.content_area.content = students_page.get_view()
+            from pages.students_list import StudentsListPage
+            self.content_area.content = self.get_cached_page_view(
+                page_index, lambda: StudentsListPage(self.page, self.handle_navigation)
+            )
         elif page_index == 5:
             from pages.pricing_settings_page import PricingSettingsPage
-            pricing_page = PricingSettingsPage(self.page, self.handle_navigation)
-            self.content_area.content = pricing_page.get_view()
+            self.content_area.content = self.get_cached_page_view(
+                page_index, lambda: PricingSettingsPage(self.page, self.handle_navigation)
+            )
         self.page.update()
+        if page_index == 0:
+            self.load_home_data()
+
+    def page_data_version(self, page_index):
+        """Version of the data files a sidebar page is built from"""
+        if page_index == 2:
+            return DataStore.version(DataStore.groups_file())
+        if page_index == 3:
+            return DataStore.version(DataStore.students_file(), DataStore.groups_file())
+        if page_index == 4:
+            return DataStore.version(
+                DataStore.students_file(), DataStore.groups_file(),
+                DataStore.joining_dates_file(), DataStore.pricing_file()
+            ) + (datetime.now().strftime("%m/%Y"),)
+        if page_index == 5:
+            return DataStore.version(DataStore.pricing_file())
+        return None
+
+    def get_cached_page_view(self, page_index, create_page):
+        """Return the page's view built on an earlier visit, unless its data changed since"""
+        version = self.page_data_version(page_index)
+        cached = self.page_cache.get(page_index)
+        if cached and cached[0] == version:
+            return cached[2]
+        page_instance = create_page()
+        view = page_instance.get_view()
+        self.page_cache[page_index] = (version, page_instance, view)
+        return view
 
     def handle_navigation(self, page_instance, page_index=None):
         """Handle navigation from sub-pages"""
         if page_index is not None:
             self.navigate_to_page(page_index)
         elif page_instance is not None:
+            Instrumentation.begin_action(f"פתיחת {type(page_instance).__name__}")
             self.content_area.content = page_instance.get_view()
             self.page.update()
 
@@ -238,6 +301,13 @@ class MainApp:
             ink=True if on_click else False,
         )
 
+    def create_stat_value(self, key, formatter, size=28):
+        """Dashboard value text, or a skeleton bar while the dashboard is loading"""
+        if self.dashboard_data is None:
+            return ft.Container(width=80, height=size, bgcolor="#e2e8f0", border_radius=6)
+        return ft.Text(formatter(self.dashboard_data[key]), size=size,
+                       weight=ft.FontWeight.BOLD, color="#1a202c")
+
     def create_home_page(self):
         welcome_section = ft.Container(
             content=ft.Column([
@@ -256,6 +326,18 @@ class MainApp:
             padding=ft.padding.only(bottom=30),
         )
 
+        self.stats_slot = ft.Container(content=self.create_stats_grid())
+        self.groups_slot = ft.Container(
+            content=self.create_groups_skeleton() if self.groups_data is None else self.create_groups_section(self.groups_data)
+        )
+
+        return ft.Column([
+            welcome_section,
+            self.stats_slot,
+            self.groups_slot,
+        ], spacing=40, scroll=ft.ScrollMode.AUTO)
+
+    def create_stats_grid(self):
         students_card = self.create_animated_card(
             content=ft.Column([
                 ft.Row([
@@ -267,8 +349,7 @@ class MainApp:
                     ),
                     ft.Column([
                         ft.Text("תלמידות", size=14, color="#718096"),
-                        ft.Text(str(self.dashboard_data['total_students']), size=28, 
-                               weight=ft.FontWeight.BOLD, color="#1a202c"),
+                        self.create_stat_value('total_students', str, size=28),
                     ], spacing=2, expand=True),
                 ], spacing=12, alignment=ft.MainAxisAlignment.START),
             ], spacing=5),
@@ -286,8 +367,7 @@ class MainApp:
                     ),
                     ft.Column([
                         ft.Text("קבוצות פעילות", size=14, color="#718096"),
-                        ft.Text(str(self.dashboard_data['total_groups']), size=28, 
-                               weight=ft.FontWeight.BOLD, color="#1a202c"),
+                        self.create_stat_value('total_groups', str, size=28),
                     ], spacing=2, expand=True),
                 ], spacing=12, alignment=ft.MainAxisAlignment.START),
             ], spacing=5),
@@ -305,8 +385,7 @@ class MainApp:
                     ),
                     ft.Column([
                         ft.Text("הכנסות החודש", size=14, color="#718096"),
-                        ft.Text(format_currency(self.dashboard_data['monthly_payments']), size=24, 
-                               weight=ft.FontWeight.BOLD, color="#1a202c"),
+                        self.create_stat_value('monthly_payments', format_currency, size=24),
                     ], spacing=2, expand=True),
                 ], spacing=12, alignment=ft.MainAxisAlignment.START),
             ], spacing=5),
@@ -324,8 +403,7 @@ class MainApp:
                     ),
                     ft.Column([
                         ft.Text("נוכחות חודשית", size=14, color="#718096"),
-                        ft.Text(f"{self.dashboard_data['attendance_percentage']}%", size=28, 
-                               weight=ft.FontWeight.BOLD, color="#1a202c"),
+                        self.create_stat_value('attendance_percentage', lambda value: f"{value}%", size=28),
                     ], spacing=2, expand=True),
                 ], spacing=12, alignment=ft.MainAxisAlignment.START),
             ], spacing=5),
@@ -339,20 +417,74 @@ class MainApp:
             ft.Container(content=attendance_card, expand=1),
         ], spacing=20)
 
-        groups_section = self.create_groups_section()
+        return stats_grid
 
-        return ft.Column([
-            welcome_section,
-            stats_grid,
-            groups_section,
-        ], spacing=40, scroll=ft.ScrollMode.AUTO)
+    def create_groups_skeleton(self):
+        """Placeholder for the groups section while the groups are loading"""
+        return ft.Container(
+            content=ft.Column([
+                ft.Text("קבוצות", size=24, weight=ft.FontWeight.BOLD, color="#1a202c"),
+                ft.Row([
+                    ft.Container(
+                        content=self.create_animated_card(
+                            content=ft.Column([
+                                ft.Container(width=120, height=16, bgcolor="#e2e8f0", border_radius=6),
+                                ft.Container(width=80, height=12, bgcolor="#edf2f7", border_radius=6),
+                            ], spacing=10),
+                            height=140
+                        ),
+                        expand=1
+                    ) for _ in range(4)
+                ], spacing=15),
+            ], spacing=20),
+            padding=ft.padding.symmetric(vertical=20),
+        )
 
-    def create_groups_section(self):
-        """Create a section displaying all groups"""
+    def load_home_data(self):
+        """Load dashboard metrics and groups in the background and swap them into the home page"""
+        home_page = self.content_area.content
+        self.executor.submit(self._load_dashboard, home_page)
+        self.executor.submit(self._load_groups, home_page)
+
+    def _is_showing(self, home_page):
+        return self.current_page_index == 0 and self.content_area.content is home_page
+
+    def _load_dashboard(self, home_page):
+        try:
+            from utils.dashboard_data import get_all_dashboard_data
+            self.dashboard_data = get_all_dashboard_data()
+            if self._is_showing(home_page):
+                self.stats_slot.content = self.create_stats_grid()
+                self.stats_slot.update()
+        except Exception as e:
+            print(f"שגיאה בעדכון עמוד הבית: {e}")
+
+    def _run_maintenance(self):
+        """One-time data upkeep, queued behind the home page loaders"""
+        from utils.maintenance import Maintenance
+        Maintenance.run_pending()
+
+    def _load_groups(self, home_page):
         try:
             from utils.students_data_manager import StudentsDataManager
-            data_manager = StudentsDataManager()
-            groups = data_manager._get_groups()
+            self.groups_data = StudentsDataManager()._get_groups()
+        except Exception as e:
+            print(f"שגיאה מפורטת בטעינת קבוצות: {e}")
+            self.groups_data = None
+        try:
+            if self._is_showing(home_page):
+                self.groups_slot.content = self.create_groups_section(self.groups_data)
+                self.groups_slot.update()
+        except Exception as e:
+            print(f"שגיאה בעדכון עמוד הבית: {e}")
+
+    def create_groups_section(self, groups=None):
+        """Create a section displaying all groups"""
+        try:
+            if groups is None:
+                from utils.students_data_manager import StudentsDataManager
+                data_manager = StudentsDataManager()
+                groups = data_manager._get_groups()
             
             if not groups:
                 return ft.Container(
@@ -451,13 +583,8 @@ class MainApp:
 
     def refresh_home_page(self):
         """Refresh home page data"""
-        try:
-            self.dashboard_data = get_all_dashboard_data()
-            if self.current_page_index == 0:
-                self.content_area.content = self.create_home_page()
-                self.content_area.update()
-        except Exception as e:
-            print(f"שגיאה בעדכון עמוד הבית: {e}")
+        if self.current_page_index == 0:
+            self.load_home_data()
 
     def toggle_dark_mode(self, enabled: bool):
         """Toggle between light and dark mode"""
@@ -473,6 +600,7 @@ class MainApp:
     def navigate_to_group_page(self, group_data):
         """Navigate to group details page with tabs"""
         from pages.group_details_page import GroupDetailsPage
+        Instrumentation.begin_action(f"פתיחת קבוצה: {group_data.get('name', '')}")
         group_page = GroupDetailsPage(self.page, self.handle_navigation, group_data)
         self.content_area.content = group_page.get_view()
         self.page.update()
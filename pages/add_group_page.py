@@ -1,11 +1,10 @@
-import json
 import re
 import flet as ft
-from datetime import datetime
 from utils.groups_data_manager import GroupsDataManager
 from utils.add_group_validator import AddGroupValidator
 from components.add_group_components import AddGroupComponents
-from utils.manage_json import ManageJSON  
+from utils.data_store import DataStore
+from utils.date_utils import is_valid_date, parse_date
 
 
 class AddGroupPage:
@@ -15,13 +14,10 @@ class AddGroupPage:
         self.navigation_callback = navigation_callback
         self.groups_page = groups_page
         self.data_manager = GroupsDataManager()
-        data_dir = ManageJSON.get_appdata_path() / "data"
-        data_dir.mkdir(parents=True, exist_ok=True)
-        self.pricing_config_file = data_dir / "pricing.json"
-        if self.pricing_config_file.exists():
-            with open(self.pricing_config_file, "r", encoding="utf-8") as f:
-                config = json.load(f)
-                self.base_price = config.get("single", 180)
+        self.pricing_config_file = DataStore.pricing_file()
+        config = DataStore.load(self.pricing_config_file)
+        if config:
+            self.base_price = config.get("single", 180)
         else:
             self.base_price = 180
 
@@ -113,23 +109,18 @@ class AddGroupPage:
             val = (value or "").strip()
             if not val:
                 error = "שדה חובה"
-            else:
-                try:
-                    datetime.strptime(val, "%d/%m/%Y")
-                except ValueError:
-                    date_pattern = r'^\d{2}/\d{2}/\d{4}$'
-                    if not re.match(date_pattern, val):
-                        error = "פורמט תאריך לא תקין — השתמש/י ב־dd/mm/yyyy"
-                    else:
-                        error = "תאריך לא קיים (בדוק יום/חודש/שנה)"
+            elif not is_valid_date(val):
+                date_pattern = r'^\d{2}/\d{2}/\d{4}$'
+                if not re.match(date_pattern, val):
+                    error = "פורמט תאריך לא תקין — השתמש/י ב־dd/mm/yyyy"
+                else:
+                    error = "תאריך לא קיים (בדוק יום/חודש/שנה)"
 
             if key == "end_date" and not error:
                 start = self.form_state.get("start_date", "").strip()
                 if start:
                     try:
-                        start_dt = datetime.strptime(start, "%d/%m/%Y")
-                        end_dt = datetime.strptime(val, "%d/%m/%Y")
-                        if end_dt < start_dt:
+                        if parse_date(val) < parse_date(start):
                             error = "תאריך סיום חייב להיות אחרי תאריך התחלה"
                     except ValueError:
                         pass  
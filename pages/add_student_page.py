@@ -1,13 +1,12 @@
 import flet as ft
-import json
-import os
 from components.modern_dialog import ModernDialog
 from components.form_fields import FormFields
 from views.add_student_view import AddStudentView
 from utils.students_data_manager import StudentsDataManager
-from utils.manage_json import ManageJSON
+from utils.data_store import DataStore
+from utils.payment_ledger import PaymentLedger
 import re
-from datetime import datetime
+from utils.date_utils import is_valid_date
 
 class AddStudentPage:
     def __init__(self, page, navigation_callback, group_name):
@@ -19,10 +18,7 @@ class AddStudentPage:
         self.data_manager = StudentsDataManager()
         self.view = AddStudentView(self)
         
-        base_dir = ManageJSON.get_appdata_path()
-        data_dir = base_dir / "data"
-        data_dir.mkdir(parents=True, exist_ok=True)
-        self.joining_dates_file = data_dir / "joining_dates.json"
+        self.joining_dates_file = DataStore.joining_dates_file()
 
         self.layout = ft.Column(
             spacing=24,
@@ -129,14 +125,11 @@ class AddStudentPage:
     def load_joining_dates(self):
         """Load joining dates from JSON file"""
         try:
-            if not os.path.exists(self.joining_dates_file):
-                os.makedirs(os.path.dirname(self.joining_dates_file), exist_ok=True)
-                with open(self.joining_dates_file, 'w', encoding='utf-8') as f:
-                    json.dump({}, f, ensure_ascii=False, indent=2)
+            if not DataStore.exists(self.joining_dates_file):
+                DataStore.save(self.joining_dates_file, {})
                 return {}
             
-            with open(self.joining_dates_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return DataStore.load_copy(self.joining_dates_file, {})
         except Exception as e:
             print(f"Error loading joining dates: {e}")
             return {}
@@ -144,9 +137,7 @@ class AddStudentPage:
     def save_joining_dates(self, joining_dates_data):
         """Save joining dates to JSON file"""
         try:
-            os.makedirs(os.path.dirname(self.joining_dates_file), exist_ok=True)
-            with open(self.joining_dates_file, 'w', encoding='utf-8') as f:
-                json.dump(joining_dates_data, f, ensure_ascii=False, indent=2)
+            DataStore.save(self.joining_dates_file, joining_dates_data)
             return True
         except Exception as e:
             print(f"Error saving joining dates: {e}")
@@ -179,6 +170,7 @@ class AddStudentPage:
                 })
             
             success = self.save_joining_dates(joining_dates_data)
+            PaymentLedger.invalidate_students([student_id])
             return success
             
         except Exception as e:
@@ -259,9 +251,7 @@ class AddStudentPage:
 
         # תאריך הצטרפות
         join_date = form_data["join_date"].strip()
-        try:
-            datetime.strptime(join_date, "%d/%m/%Y")
-        except ValueError:
+        if not is_valid_date(join_date):
             # נבדוק אם בכלל הפורמט לא נכון
             date_pattern = r'^\d{2}/\d{2}/\d{4}$'
             if not re.match(date_pattern, join_date):
@@ -1,18 +1,11 @@
-import json
 import flet as ft
 from typing import Dict, Any
-from pages.group_attendance_page import GroupAttendancePage
-from utils.manage_json import ManageJSON
+from utils.data_store import DataStore
 
 def load_groups():
     """Load groups from JSON file"""
     try:
-        data_dir = ManageJSON.get_appdata_path() / "data"
-        groups_file = data_dir / "groups.json"
-        
-        with open(groups_file, "r", encoding="utf-8") as file:
-            data = json.load(file)
-            return data.get("groups", [])
+        return DataStore.load_groups()
     except Exception as e:
         print("Error on Load groups", e)
         return []
@@ -86,6 +79,7 @@ class AttendancePage:
 
     def show_group_attendance(self, group):
         """Show attendance table page for selected group"""
+        from pages.group_attendance_page import GroupAttendancePage
         attendance_page = GroupAttendancePage(self.page, self.navigation_handler, group)
         self.navigation_handler(attendance_page, None)
 
@@ -1,10 +1,10 @@
-import json
 import flet as ft
 from typing import Dict, Any
 from views.attendance_table_view import AttendanceTableView 
 import datetime
 from utils.attendance_utils import AttendanceUtils
-from utils.manage_json import ManageJSON
+from utils.data_store import DataStore
+from utils.models import Records
 
 class AttendanceCheckBox:
     def __init__(self, date: str, student_id: str, parent_page, is_checked: bool = False):
@@ -73,40 +73,16 @@ class GroupAttendancePage:
         
     def load_attendance(self):
         """Load attendance data from JSON file"""
-        attendances_dir = ManageJSON.get_appdata_path() / "attendances"
-        attendance_file = attendances_dir / f"attendance_{self.group.get('id', '')}.json"
-        
-        if attendance_file.exists():
-            try:
-                with open(attendance_file, "r", encoding="utf-8") as f:
-                    self.attendance_data = json.load(f)
-            except Exception as e:
-                print(f"Error loading attendance: {e}")
-                self.attendance_data = {}
-        else:
-            self.attendance_data = {}
+        attendance_file = DataStore.attendance_file(self.group.get('id', ''))
+        self.attendance_data = DataStore.load_copy(attendance_file, {})
 
     def load_students(self):
         """Load students for this group"""
         try:
-            data_dir = ManageJSON.get_appdata_path() / "data"
-            students_file = data_dir / "students.json"
+            self.students = []  
             
-            if students_file.exists():
-                with open(students_file, "r", encoding="utf-8") as f:
-                    students_data = json.load(f)
-                    self.students = []  
-                    
-                    for s in students_data.get("students", []):
-                        student_groups = s.get("groups", [])
-                        group_name = self.group.get("name", "").strip()
-                        
-                        if isinstance(student_groups, list):
-                            if group_name in [g.strip() for g in student_groups]:
-                                self.students.append({"id": s["id"], "name": s["name"]})
-                        else:
-                            if student_groups.strip() == group_name:
-                                self.students.append({"id": s["id"], "name": s["name"]})
+            for s in Records.students().in_group(self.group.get('id', '')):
+                self.students.append({"id": s["id"], "name": s["name"]})
                                 
         except Exception as e:
             print(f"Error loading students: {e}")
@@ -118,24 +94,10 @@ class GroupAttendancePage:
         self.attendance_data = AttendanceUtils.load_attendance_file(self.group.get('id', ''))
         
         try:
-            data_dir = ManageJSON.get_appdata_path() / "data"
-            students_file = data_dir / "students.json"
+            self.students = []
             
-            if students_file.exists():
-                with open(students_file, "r", encoding="utf-8") as f:
-                    students_data = json.load(f)
-                    self.students = []
-                    
-                    for s in students_data.get("students", []):
-                        student_groups = s.get("groups", [])
-                        group_name = self.group.get("name", "").strip()
-                        
-                        if isinstance(student_groups, list):
-                            if group_name in [g.strip() for g in student_groups]:
-                                self.students.append({"id": s["id"], "name": s["name"]})
-                        else:
-                            if student_groups.strip() == group_name:
-                                self.students.append({"id": s["id"], "name": s["name"]})
+            for s in Records.students().in_group(self.group.get('id', '')):
+                self.students.append({"id": s["id"], "name": s["name"]})
                                 
         except Exception as e:
             print(f"Error loading students in load_data: {e}")
@@ -144,12 +106,8 @@ class GroupAttendancePage:
     def save_attendance(self):
         """Save attendance data to JSON file"""
         try:
-            attendances_dir = ManageJSON.get_appdata_path() / "attendances"
-            attendances_dir.mkdir(parents=True, exist_ok=True)
-            attendance_file = attendances_dir / f"attendance_{self.group.get('id', '')}.json"
-            
-            with open(attendance_file, "w", encoding="utf-8") as f:
-                json.dump(self.attendance_data, f, ensure_ascii=False, indent=2)
+            attendance_file = DataStore.attendance_file(self.group.get('id', ''))
+            DataStore.save(attendance_file, self.attendance_data)
         except Exception as e:
             print(f"Error saving attendance: {e}")
 
@@ -159,7 +117,7 @@ class GroupAttendancePage:
             self.attendance_data[date] = {}
         
         self.attendance_data[date][str(student_id)] = is_present
-        self.save_attendance()
+        AttendanceUtils.set_student_attendance(self.group.get('id', ''), date, student_id, is_present)
 
     def create_modern_card(self, content, bgcolor=None, padding=20, blur=True):
         """Create a modern glassmorphism card"""
@@ -1,11 +1,8 @@
-from datetime import datetime
-import json
+from datetime import date
 import flet as ft
-from pages.students_page import StudentsPage
-from pages.add_group_page import AddGroupPage
-from components.groups_dialogs import GroupDialogs
 from utils.payment_utils import PaymentCalculator
-from utils.manage_json import ManageJSON
+from utils.data_store import DataStore
+from utils.date_utils import parse_date
 
 class GroupsPage:
     def __init__(self, page, navigation_callback):
@@ -133,8 +130,7 @@ class GroupsPage:
         course_ended = False
         if end_date_str:
             try:
-                end_date = datetime.strptime(end_date_str, "%d/%m/%Y")
-                if end_date < datetime.today():
+                if parse_date(end_date_str) <= date.today().toordinal():
                     course_ended = True
             except Exception as e:
                 print("Error parsing end date:", e)
@@ -252,6 +248,7 @@ class GroupsPage:
             if not is_error:
                 self.build_group_buttons()
         
+        from components.groups_dialogs import GroupDialogs
         dialog = GroupDialogs.create_edit_dialog(self.page, group, on_success)
         self.page.open(dialog)
 
@@ -262,6 +259,7 @@ class GroupsPage:
             if not is_error:
                 self.build_group_buttons()
         
+        from components.groups_dialogs import GroupDialogs
         dialog = GroupDialogs.create_delete_confirmation_dialog(self.page, group, on_success)
         self.page.open(dialog)
 
@@ -271,12 +269,8 @@ class GroupsPage:
     def build_group_buttons(self):
         self.groups_container.controls.clear()
         try:
-            data_dir = ManageJSON.get_appdata_path() / "data"
-            groups_file = data_dir / "groups.json"
-            
-            with open(groups_file, encoding="utf-8") as f:
-                data = json.load(f)
-                groups = data.get("groups", [])
+            data = DataStore.load(DataStore.groups_file())
+            groups = data.get("groups", [])
         except Exception as e:
             groups = []
             error_container = ft.Container(
@@ -364,6 +358,7 @@ class GroupsPage:
             self.page.update()
 
     def show_students(self, group_name):
+        from pages.students_page import StudentsPage
         students_page = StudentsPage(self.page, self.navigation_callback, group_name)
         self.navigation_callback(students_page)
 
@@ -371,6 +366,7 @@ class GroupsPage:
         self.navigation_callback(None, 0)
 
     def add_group_page_func(self, e=None):
+        from pages.add_group_page import AddGroupPage
         self.add_group_page = AddGroupPage(self.page, self.navigation_callback, self)
         self.navigation_callback(self.add_group_page)
     
@@ -1,47 +1,91 @@
-import json
 import flet as ft
+from dataclasses import replace
 from typing import Dict, Any
-from utils.manage_json import ManageJSON
+from utils.payment_book import PaymentBook
+from utils.payment_query import PaymentQuery, PaymentFilter
+from utils.dashboard_data import get_revenue_between, get_revenue_by_month, format_currency
+from utils.date_utils import format_ordinal, parse_date, is_valid_date
+from utils.models import parse_agorot
 
 class PaymentPage:
+    """Payments page.
+
+    Payments come from a PaymentQuery: the toolbar sets its sort order and
+    filters, and the table renders the matches in a ListView one page at a
+    time, adding the next PAGE_SIZE rows when the list is scrolled near its
+    end.
+    """
+
+    PAGE_SIZE = 50
+    LOAD_MORE_THRESHOLD = 400
+    TABLE_HEIGHT = 600
+    SORT_OPTIONS = {
+        "date": "תאריך",
+        "amount": "סכום",
+        "method": "אמצעי תשלום",
+        "student": "שם התלמידה",
+        "group": "קבוצה",
+    }
+
     def __init__(self, page: ft.Page, navigation_handler=None):
         self.page = page
         self.navigation_handler = navigation_handler
-        self.payments_data = []
+        self.query = None
+        self.results = None
+        self.sort_key = "date"
+        self.descending = True
+        self.filters = PaymentFilter()
+        self.list_view = ft.ListView(
+            controls=[],
+            spacing=0,
+            expand=True,
+            on_scroll_interval=50,
+            on_scroll=self._on_scroll,
+        )
+        self.table_body = ft.Container(expand=True)
+        self.stats_container = ft.Container()
+        self.count_text = ft.Text("", size=12, color=ft.Colors.BLUE_GREY_500, rtl=True)
+        self.filter_error_text = ft.Text("", size=12, color=ft.Colors.RED_600, rtl=True)
         
         self.load_payments()
         
     def load_payments(self):
-        """Load payments data from students.json"""
+        """Run the current sort and filters against the payments query"""
         try:
-            data_dir = ManageJSON.get_appdata_path() / "data"
-            students_file = data_dir / "students.json"
-            
-            if students_file.exists():
-                with open(students_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    
-                    for student in data.get("students", []):
-                        student_name = student.get("name", "")
-                        student_groups = student.get("groups", [])
-                        
-                        for payment in student.get("payments", []):
-                            payment_data = {
-                                "student_name": student_name,
-                                "amount": payment.get("amount", "0"),
-                                "date": payment.get("date", ""),
-                                "payment_method": payment.get("payment_method", ""),
-                                "groups": student_groups,
-                                "groups_display": ", ".join(student_groups)
-                            }
-                            
-                            if payment.get("check_number"):
-                                payment_data["check_number"] = payment.get("check_number")
-                            
-                            self.payments_data.append(payment_data)
+            if self.query is None:
+                self.query = PaymentQuery.current()
+            self.results = self.query.search(self.sort_key, self.descending, self.filters)
         except Exception as e:
             print(f"Error loading payments: {e}")
+            self.results = None
+        
+        self.list_view.controls = []
+        if self.results is not None and self.results.total:
+            self.table_body.content = self.list_view
+            self._append_page()
+        else:
+            self.table_body.content = self.create_empty_state()
+        self.stats_container.content = self.create_stats_section()
+        self._update_count()
 
+    def _append_page(self):
+        """Build the rows of the next page and add them to the list"""
+        start = len(self.list_view.controls)
+        for index, payment in enumerate(self.results.rows(start, self.PAGE_SIZE), start):
+            self.list_view.controls.append(self.create_table_row(payment, index))
+
+    def _on_scroll(self, e):
+        if self.results is None or len(self.list_view.controls) >= self.results.total:
+            return
+        if e.pixels >= e.max_scroll_extent - self.LOAD_MORE_THRESHOLD:
+            self._append_page()
+            self._update_count()
+            self.list_view.update()
+            self.count_text.update()
+
+    def _update_count(self):
+        total = self.results.total if self.results is not None else 0
+        self.count_text.value = f"מוצגים {len(self.list_view.controls):,} מתוך {total:,} תשלומים"
 
     def create_stats_card(self, title, value, icon, color, subtitle=""):
         """Create a modern statistics card"""
@@ -70,36 +114,46 @@ class PaymentPage:
             border=ft.border.all(1, ft.Colors.with_opacity(0.1, ft.Colors.GREY_400))
         )
 
+    def _date_range_only(self):
+        """True when the date range is the only filter set"""
+        if self.filters.start is None and self.filters.end is None:
+            return False
+        return replace(self.filters, start=None, end=None) == PaymentFilter()
+
     def calculate_payment_stats(self):
-        """Calculate comprehensive payment statistics"""
-        if not self.payments_data:
+        """Calculate payment statistics of the payments matching the filters.
+
+        When only the date range is filtered, the cash/other split of the
+        income is read from the revenue index (prefix sums) and shown under
+        the payment counts.
+        """
+        if self.results is None or not self.results.total:
             return {
                 "total_amount": "0",
                 "total_payments": "0",
                 "cash_payments": "0",
-                "transfer_payments": "0"
+                "transfer_payments": "0",
+                "cash_amount": "",
+                "transfer_amount": ""
             }
             
-        total_amount = 0
-        cash_count = 0
-        transfer_count = 0
-        
-        for payment in self.payments_data:
-            try:
-                total_amount += float(payment["amount"])
-            except ValueError:
-                pass
-                
-            if payment["payment_method"] == "מזומן":
-                cash_count += 1
-            else:
-                transfer_count += 1
+        stats = self.results.stats()
+        cash_amount = transfer_amount = ""
+        if self._date_range_only():
+            revenue = get_revenue_between(
+                format_ordinal(self.filters.start) if self.filters.start is not None else None,
+                format_ordinal(self.filters.end) if self.filters.end is not None else None
+            )
+            cash_amount = format_currency(revenue["cash"])
+            transfer_amount = format_currency(revenue["other"])
         
         return {
-            "total_amount": f"{total_amount:,.0f}₪",
-            "total_payments": str(len(self.payments_data)),
-            "cash_payments": str(cash_count),
-            "transfer_payments": str(transfer_count)
+            "total_amount": f"{PaymentBook.shekels(stats['total_agorot']):,.0f}₪",
+            "total_payments": str(stats["count"]),
+            "cash_payments": str(stats["cash"]),
+            "transfer_payments": str(stats["other"]),
+            "cash_amount": cash_amount,
+            "transfer_amount": transfer_amount
         }
 
     def create_stats_section(self):
@@ -125,17 +179,49 @@ class PaymentPage:
                     stats["cash_payments"], 
                     ft.Icons.MONEY, 
                     ft.Colors.ORANGE_600,
+                    stats["cash_amount"]
                 ),
                 self.create_stats_card(
                     "תשלומים אחרים", 
                     stats["transfer_payments"], 
                     ft.Icons.ACCOUNT_BALANCE, 
                     ft.Colors.PURPLE_600,
+                    stats["transfer_amount"]
                 ),
             ], alignment=ft.MainAxisAlignment.CENTER, spacing=20, wrap=True),
             alignment=ft.alignment.center
         )
 
+    def create_revenue_report(self):
+        """Create the revenue-by-month report (last 12 months with income)"""
+        report = get_revenue_by_month(limit=12)
+        if not report:
+            return ft.Container()
+        
+        month_cards = []
+        for entry in report:
+            month_cards.append(ft.Container(
+                content=ft.Column([
+                    ft.Text(entry["month"], size=13, weight=ft.FontWeight.W_600, color=ft.Colors.BLUE_GREY_700),
+                    ft.Text(format_currency(entry["total"]), size=16, weight=ft.FontWeight.BOLD, color=ft.Colors.GREEN_600),
+                    ft.Text(f"מזומן: {format_currency(entry['cash'])}", size=11, color=ft.Colors.ORANGE_600, rtl=True),
+                    ft.Text(f"אחר: {format_currency(entry['other'])}", size=11, color=ft.Colors.PURPLE_600, rtl=True),
+                ], spacing=2, horizontal_alignment=ft.CrossAxisAlignment.CENTER),
+                width=120,
+                padding=ft.padding.all(10),
+                bgcolor=ft.Colors.WHITE,
+                border_radius=10,
+                border=ft.border.all(1, ft.Colors.with_opacity(0.1, ft.Colors.GREY_400))
+            ))
+        
+        return ft.Container(
+            content=ft.Column([
+                ft.Text("הכנסות לפי חודש", size=16, weight=ft.FontWeight.W_600, color=ft.Colors.BLUE_GREY_800, rtl=True),
+                ft.Row(month_cards, spacing=10, scroll=ft.ScrollMode.AUTO, rtl=True),
+            ], spacing=10, horizontal_alignment=ft.CrossAxisAlignment.END),
+            margin=ft.margin.only(bottom=24)
+        )
+
     def create_table_header(self):
         """Create modern table header row"""
         header_style = {
@@ -328,20 +414,133 @@ class PaymentPage:
             bgcolor=ft.Colors.with_opacity(0.3, ft.Colors.BLUE_GREY_50),
         )
 
-    def create_payments_table(self):
-        """Create the modern payments table"""
-        if not self.payments_data:
-            return self.create_empty_state()
+    def create_filter_field(self, label, width, on_change, hint_text=None):
+        return ft.TextField(
+            label=label,
+            hint_text=hint_text,
+            width=width,
+            height=48,
+            text_size=13,
+            border_radius=8,
+            border_color=ft.Colors.GREY_300,
+            focused_border_color=ft.Colors.BLUE_400,
+            content_padding=ft.padding.symmetric(horizontal=12, vertical=8),
+            on_change=on_change,
+            rtl=True
+        )
+
+    def create_filter_dropdown(self, label, width, options, value, on_change):
+        return ft.Dropdown(
+            label=label,
+            width=width,
+            value=value,
+            text_size=13,
+            border_radius=8,
+            border_color=ft.Colors.GREY_300,
+            focused_border_color=ft.Colors.BLUE_400,
+            content_padding=ft.padding.symmetric(horizontal=12, vertical=8),
+            options=[ft.dropdown.Option(key, text) for key, text in options],
+            on_change=on_change
+        )
+
+    def create_toolbar(self):
+        """Create the sort and filter controls of the payments table"""
+        methods = self.query.methods() if self.query is not None else []
+        groups = self.query.group_names() if self.query is not None else []
         
-        table_rows = [self.create_table_header()]
+        self.student_field = self.create_filter_field("חיפוש תלמידה", 180, self.on_filter_change)
+        self.method_dropdown = self.create_filter_dropdown(
+            "אמצעי תשלום", 150, [("", "הכל")] + [(m, m) for m in methods], "", self.on_filter_change
+        )
+        self.group_dropdown = self.create_filter_dropdown(
+            "קבוצה", 150, [("", "הכל")] + [(g, g) for g in groups], "", self.on_filter_change
+        )
+        self.start_field = self.create_filter_field("מתאריך", 120, self.on_filter_change, "dd/mm/yyyy")
+        self.end_field = self.create_filter_field("עד תאריך", 120, self.on_filter_change, "dd/mm/yyyy")
+        self.min_amount_field = self.create_filter_field("מסכום", 90, self.on_filter_change)
+        self.max_amount_field = self.create_filter_field("עד סכום", 90, self.on_filter_change)
+        self.sort_dropdown = self.create_filter_dropdown(
+            "מיון לפי", 140, list(self.SORT_OPTIONS.items()), self.sort_key, self.on_sort_change
+        )
+        self.direction_button = ft.IconButton(
+            icon=ft.Icons.ARROW_DOWNWARD if self.descending else ft.Icons.ARROW_UPWARD,
+            tooltip="יורד" if self.descending else "עולה",
+            icon_color=ft.Colors.BLUE_600,
+            on_click=self.on_direction_toggle
+        )
         
-        for index, payment in enumerate(self.payments_data):
-            table_rows.append(self.create_table_row(payment, index))
+        return ft.Container(
+            content=ft.Column([
+                ft.Row([
+                    self.student_field,
+                    self.method_dropdown,
+                    self.group_dropdown,
+                    self.start_field,
+                    self.end_field,
+                    self.min_amount_field,
+                    self.max_amount_field,
+                    self.sort_dropdown,
+                    self.direction_button,
+                ], spacing=8, wrap=True, rtl=True),
+                ft.Row([self.count_text, self.filter_error_text], spacing=16, rtl=True),
+            ], spacing=8),
+            margin=ft.margin.only(bottom=12)
+        )
 
+    def read_filters(self):
+        """PaymentFilter of the toolbar fields, or None with an error message if a field is invalid"""
+        start = (self.start_field.value or "").strip()
+        end = (self.end_field.value or "").strip()
+        min_amount = (self.min_amount_field.value or "").strip()
+        max_amount = (self.max_amount_field.value or "").strip()
+        
+        if (start and not is_valid_date(start)) or (end and not is_valid_date(end)):
+            return None, "תאריך לא תקין (dd/mm/yyyy)"
+        min_agorot = parse_agorot(min_amount) if min_amount else None
+        max_agorot = parse_agorot(max_amount) if max_amount else None
+        if (min_amount and min_agorot is None) or (max_amount and max_agorot is None):
+            return None, "סכום לא תקין"
+        
+        return PaymentFilter(
+            student=(self.student_field.value or "").strip(),
+            method=self.method_dropdown.value or None,
+            group=self.group_dropdown.value or None,
+            start=parse_date(start) if start else None,
+            end=parse_date(end) if end else None,
+            min_agorot=min_agorot,
+            max_agorot=max_agorot
+        ), ""
+
+    def refresh_table(self):
+        """Re-run the query and show its first page"""
+        self.load_payments()
+        self.page.update()
+
+    def on_filter_change(self, e):
+        filters, error = self.read_filters()
+        self.filter_error_text.value = error
+        if filters is None:
+            self.filter_error_text.update()
+            return
+        self.filters = filters
+        self.refresh_table()
+
+    def on_sort_change(self, e):
+        self.sort_key = e.control.value or "date"
+        self.refresh_table()
+
+    def on_direction_toggle(self, e):
+        self.descending = not self.descending
+        self.direction_button.icon = ft.Icons.ARROW_DOWNWARD if self.descending else ft.Icons.ARROW_UPWARD
+        self.direction_button.tooltip = "יורד" if self.descending else "עולה"
+        self.refresh_table()
+
+    def create_payments_table(self):
+        """Create the modern payments table: fixed header over the lazily paged rows"""
         return ft.Column(
-            controls=table_rows,
+            controls=[self.create_table_header(), self.table_body],
             spacing=0,
-            scroll=ft.ScrollMode.AUTO,
+            expand=True,
         )
 
     def go_home(self, e):
@@ -376,15 +575,13 @@ class PaymentPage:
         )
 
         stats_section = ft.Container(
-            content=self.create_stats_section(),
+            content=self.stats_container,
             margin=ft.margin.only(bottom=32),
             alignment=ft.alignment.center
         )
 
         table_container = ft.Container(
-            content=ft.Column([
-                self.create_payments_table(),
-            ], scroll=ft.ScrollMode.AUTO),
+            content=self.create_payments_table(),
             bgcolor=ft.Colors.WHITE,
             border_radius=12,
             shadow=ft.BoxShadow(
@@ -394,7 +591,7 @@ class PaymentPage:
                 offset=ft.Offset(0, 4)
             ),
             border=ft.border.all(1, ft.Colors.with_opacity(0.1, ft.Colors.GREY_400)),
-            expand=True,
+            height=self.TABLE_HEIGHT,
             clip_behavior=ft.ClipBehavior.HARD_EDGE
         )
 
@@ -424,11 +621,14 @@ class PaymentPage:
             content=ft.Column([
                 title_container,
                 stats_section,
+                self.create_revenue_report(),
+                self.create_toolbar(),
                 table_container,
                 back_button,
             ], 
             spacing=0,
-            expand=True
+            expand=True,
+            scroll=ft.ScrollMode.AUTO
             ),
             padding=ft.padding.all(24),
             expand=True,
@@ -1,18 +1,17 @@
 import flet as ft
-import json
+from utils.data_store import DataStore
+from utils.payment_ledger import PaymentLedger
 
 class PricingSettingsPage:
     def __init__(self, page, navigate_callback):
         self.page = page
         self.navigate = navigate_callback
-        from utils.manage_json import ManageJSON
-        self.config_file = ManageJSON.get_appdata_path() / "data" / "pricing.json"
+        self.config_file = DataStore.pricing_file()
         self.load_config()
         
     def load_config(self):
         if self.config_file.exists():
-            with open(self.config_file, "r") as f:
-                self.config = json.load(f)
+            self.config = DataStore.load_copy(self.config_file, {})
         else:
             self.config = {
                 "single": 180,
@@ -23,8 +22,8 @@ class PricingSettingsPage:
             self.save_config()
     
     def save_config(self):
-        with open(self.config_file, "w") as f:
-            json.dump(self.config, f)
+        DataStore.save(self.config_file, self.config, indent=None)
+        PaymentLedger.invalidate_all()
     
     def get_view(self):
         header = ft.Row([
@@ -1,11 +1,7 @@
 import flet as ft
-from pages.add_student_page import AddStudentPage
-from utils.manage_json import ManageJSON
+from utils.data_store import DataStore
 from utils.students_data_manager import StudentsDataManager
 from views.students_group_view import StudentsGroupView
-from views.student_edit_view import StudentEditView
-from views.payments_view import PaymentsView
-from views.add_payment_view import AddPaymentView
 from components.modern_dialog import ModernDialog
 
 class StudentsPage:    
@@ -52,17 +48,20 @@ class StudentsPage:
 
     def edit_student(self, student):
         """Show edit student view"""
+        from views.student_edit_view import StudentEditView
         group_id = self.get_group_id_by_name(self.group_name)
         edit_view = StudentEditView(self, student, group_id=group_id)
         edit_view.render()
 
     def show_payments(self, student):
         """Show payments view"""
+        from views.payments_view import PaymentsView
         payments_view = PaymentsView(self, student)
         payments_view.render()
 
     def show_add_payment_form(self, student):
         """Show add payment form"""
+        from views.add_payment_view import AddPaymentView
         add_payment_view = AddPaymentView(self, student)
         add_payment_view.render()
 
@@ -108,6 +107,7 @@ class StudentsPage:
 
     def go_to_add_student_page(self, e=None):
         """Navigate to add student page"""
+        from pages.add_student_page import AddStudentPage
         add_page = AddStudentPage(self.page, self.navigation_callback, self.group_name)
         self.navigation_callback(add_page)
 
@@ -116,12 +116,7 @@ class StudentsPage:
         self.layout.controls.clear()
 
     def get_group_id_by_name(self, group_name: str):
-        groups_file = ManageJSON.get_appdata_path() / "data" / "groups.json"
-        if groups_file.exists():
-            import json
-            with open(groups_file, "r", encoding="utf-8") as f:
-                groups_data = json.load(f)
-            for group in groups_data.get("groups", []):
-                if group.get("name") == group_name:
-                    return str(group.get("id"))
+        for group in DataStore.load_groups():
+            if group.get("name") == group_name:
+                return str(group.get("id"))
         return None
\ No newline at end of file
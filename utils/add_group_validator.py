@@ -1,5 +1,5 @@
 import re
-from datetime import datetime
+from utils.date_utils import is_valid_date
 
 class AddGroupValidator:
     """Validation for add group form"""
@@ -25,11 +25,7 @@ class AddGroupValidator:
     @staticmethod
     def is_valid_date(date_str):
         """Validate date format dd/mm/yyyy"""
-        try:
-            datetime.strptime(date_str, '%d/%m/%Y')
-            return True
-        except ValueError:
-            return False
+        return is_valid_date(date_str)
 
     @staticmethod
     def validate_field(key, value, required_fields):
@@ -0,0 +1,183 @@
+from typing import Dict, List, Any, Iterable
+from utils.data_store import DataStore
+from utils.date_utils import date_sort_ordinal
+
+
+try:
+    _popcount = int.bit_count
+except AttributeError:
+    def _popcount(value: int) -> int:
+        return bin(value).count("1")
+
+
+class AttendanceMatrix:
+    """Packed boolean attendance matrix of one group.
+
+    Rows are the dates (kept in chronological order), columns are the
+    students (in first-seen order). Each row is stored as two integer
+    bitsets over the student columns: `present` holds the marks and
+    `recorded` tells which cells exist at all, so converting back to the
+    attendance JSON does not invent entries. Row sums are a popcount per
+    row; column sums add all rows at once with bit-sliced counters, so
+    neither walks the cells one by one. `load` builds the matrix of an
+    attendance file once per snapshot.
+    """
+
+    def __init__(self):
+        self.dates: List[str] = []
+        self.date_index: Dict[str, int] = {}
+        self.student_ids: List[str] = []
+        self.student_index: Dict[str, int] = {}
+        self.present: List[int] = []
+        self.recorded: List[int] = []
+
+    @staticmethod
+    def load(path) -> "AttendanceMatrix":
+        """Matrix of an attendance file (shared, read-only; empty if the file is missing)"""
+        return DataStore.derived(path, "attendance_matrix", AttendanceMatrix.from_dict, {})
+
+    @staticmethod
+    def from_dict(attendance_data: Dict[str, Any]) -> "AttendanceMatrix":
+        """Build the matrix from the attendance JSON ({date: {student_id: bool}}); malformed dates hold no cells"""
+        matrix = AttendanceMatrix()
+        if not isinstance(attendance_data, dict):
+            return matrix
+        for date in sorted(attendance_data, key=date_sort_ordinal):
+            row = matrix._row(date)
+            marks = attendance_data[date]
+            if not isinstance(marks, dict):
+                continue
+            for student_id, is_present in marks.items():
+                bit = 1 << matrix._column(student_id)
+                matrix.recorded[row] |= bit
+                if is_present:
+                    matrix.present[row] |= bit
+        return matrix
+
+    def to_dict(self) -> Dict[str, Dict[str, bool]]:
+        """Convert back to the attendance JSON layout"""
+        attendance_data = {}
+        for row, date in enumerate(self.dates):
+            recorded, present = self.recorded[row], self.present[row]
+            attendance_data[date] = {
+                student_id: bool(present >> column & 1)
+                for column, student_id in enumerate(self.student_ids)
+                if recorded >> column & 1
+            }
+        return attendance_data
+
+    def _row(self, date: str) -> int:
+        row = self.date_index.get(date)
+        if row is None:
+            row = len(self.dates)
+            self.dates.append(date)
+            self.date_index[date] = row
+            self.present.append(0)
+            self.recorded.append(0)
+        return row
+
+    def _column(self, student_id) -> int:
+        student_id = str(student_id)
+        column = self.student_index.get(student_id)
+        if column is None:
+            column = len(self.student_ids)
+            self.student_ids.append(student_id)
+            self.student_index[student_id] = column
+        return column
+
+    def _sort_rows(self):
+        order = sorted(range(len(self.dates)), key=lambda row: date_sort_ordinal(self.dates[row]))
+        self.dates = [self.dates[row] for row in order]
+        self.present = [self.present[row] for row in order]
+        self.recorded = [self.recorded[row] for row in order]
+        self.date_index = {date: row for row, date in enumerate(self.dates)}
+
+    def set(self, date: str, student_id, is_present: bool):
+        if date not in self.date_index:
+            self._row(date)
+            self._sort_rows()
+        row = self.date_index[date]
+        bit = 1 << self._column(student_id)
+        self.recorded[row] |= bit
+        if is_present:
+            self.present[row] |= bit
+        else:
+            self.present[row] &= ~bit
+
+    def get(self, date: str, student_id) -> bool:
+        row = self.date_index.get(date)
+        column = self.student_index.get(str(student_id))
+        if row is None or column is None:
+            return False
+        return bool(self.present[row] >> column & 1)
+
+    def date_mask(self, dates: Iterable[str] = None) -> int:
+        """Bitset over the rows of the given dates (all rows if None)"""
+        if dates is None:
+            return (1 << len(self.dates)) - 1
+        mask = 0
+        for date in dates:
+            row = self.date_index.get(date)
+            if row is not None:
+                mask |= 1 << row
+        return mask
+
+    def student_mask(self, student_ids: Iterable = None) -> int:
+        """Bitset over the columns of the given students (all columns if None)"""
+        if student_ids is None:
+            return (1 << len(self.student_ids)) - 1
+        mask = 0
+        for student_id in student_ids:
+            column = self.student_index.get(str(student_id))
+            if column is not None:
+                mask |= 1 << column
+        return mask
+
+    def row_sums(self, date_mask: int = None, student_mask: int = None) -> Dict[str, int]:
+        """date -> number of present students (restricted to the masks)"""
+        if student_mask is None:
+            student_mask = self.student_mask()
+        return {
+            date: _popcount(self.present[row] & student_mask)
+            for row, date in enumerate(self.dates)
+            if date_mask is None or date_mask >> row & 1
+        }
+
+    def column_sums(self, date_mask: int = None, rows: List[int] = None) -> Dict[str, int]:
+        """student id -> number of dates marked present (restricted to the date mask)"""
+        rows = self.present if rows is None else rows
+        # counters[k] holds bit k of every column's running count
+        counters = []
+        for row, bits in enumerate(rows):
+            if date_mask is not None and not date_mask >> row & 1:
+                continue
+            carry = bits
+            for k in range(len(counters)):
+                if not carry:
+                    break
+                counters[k], carry = counters[k] ^ carry, counters[k] & carry
+            if carry:
+                counters.append(carry)
+
+        sums = {}
+        for column, student_id in enumerate(self.student_ids):
+            count = 0
+            for k, plane in enumerate(counters):
+                count |= (plane >> column & 1) << k
+            sums[student_id] = count
+        return sums
+
+    def recorded_sums(self, date_mask: int = None) -> Dict[str, int]:
+        """student id -> number of dates with any mark (restricted to the date mask)"""
+        return self.column_sums(date_mask, self.recorded)
+
+    def total(self, date_mask: int = None, student_mask: int = None, rows: List[int] = None) -> int:
+        """Number of set cells inside the masks"""
+        rows = self.present if rows is None else rows
+        if student_mask is None:
+            student_mask = self.student_mask()
+        return sum(
+            _popcount(bits & student_mask)
+            for row, bits in enumerate(rows)
+            if date_mask is None or date_mask >> row & 1
+        )
@@ -1,7 +1,8 @@
-import json
-from typing import Dict, List, Any
-import datetime
-from utils.manage_json import ManageJSON
+from typing import Dict, List, Any, Union
+from utils.attendance_matrix import AttendanceMatrix
+from utils.data_store import DataStore
+from utils.date_utils import date_sort_ordinal
+from utils.instrumentation import Instrumentation
 
 class AttendanceUtils:
     """Utility functions for attendance management"""
@@ -29,40 +30,11 @@ class AttendanceUtils:
     def sort_dates_newest_first(dates: List[str]) -> List[str]:
         """Sort dates from newest to oldest with better parsing"""
         try:
-            date_objects = []
-            
-            for date_str in dates:
-                if not AttendanceUtils.validate_date(date_str):
-                    continue
-                    
-                try:
-                    date_obj = None
-                    clean_date = AttendanceUtils.clean_date_string(date_str)
-                    
-                    if '/' in clean_date and len(clean_date.split('/')) == 3:
-                        parts = clean_date.split('/')
-                        if len(parts[0]) <= 2 and len(parts[1]) <= 2 and len(parts[2]) == 4:
-                            day, month, year = parts
-                            date_obj = datetime.datetime(int(year), int(month), int(day))
-                    
-                    elif '-' in clean_date and len(clean_date.split('-')) == 3:
-                        parts = clean_date.split('-')
-                        if len(parts[0]) <= 2 and len(parts[1]) <= 2 and len(parts[2]) == 4:
-                            day, month, year = parts
-                            date_obj = datetime.datetime(int(year), int(month), int(day))
-                    
-                    if date_obj:
-                        date_objects.append((date_obj, clean_date))
-                    else:
-                        date_objects.append((datetime.datetime(1900, 1, 1), clean_date))
-                        
-                except Exception as e:
-                    print(f"Error parsing date {date_str}: {e}")
-                    date_objects.append((datetime.datetime(1900, 1, 1), clean_date))
-            
-            date_objects.sort(key=lambda x: x[0], reverse=True)
-            
-            return [date_str for _, date_str in date_objects]
+            valid_dates = [
+                AttendanceUtils.clean_date_string(date_str)
+                for date_str in dates if AttendanceUtils.validate_date(date_str)
+            ]
+            return sorted(valid_dates, key=date_sort_ordinal, reverse=True)
             
         except Exception as e:
             print(f"Error in sort_dates_newest_first: {e}")
@@ -88,10 +60,17 @@ class AttendanceUtils:
             return attendance_data
     
     @staticmethod
-    def calculate_attendance_stats(attendance_data: Dict[str, Any], students: List[Dict]) -> Dict[str, Any]:
-        """Calculate attendance statistics"""
+    def _matrix(attendance: Union[AttendanceMatrix, Dict[str, Any]]) -> AttendanceMatrix:
+        if isinstance(attendance, AttendanceMatrix):
+            return attendance
+        return AttendanceMatrix.from_dict(attendance)
+
+    @staticmethod
+    def calculate_attendance_stats(attendance: Union[AttendanceMatrix, Dict[str, Any]], students: List[Dict]) -> Dict[str, Any]:
+        """Calculate attendance statistics (of a group's matrix, or of attendance data)"""
         try:
-            valid_dates = [d for d in attendance_data.keys() if AttendanceUtils.validate_date(d)]
+            matrix = AttendanceUtils._matrix(attendance)
+            valid_dates = [d for d in matrix.dates if AttendanceUtils.validate_date(d)]
             total_classes = len(valid_dates)
             total_students = len(students)
             
@@ -103,11 +82,8 @@ class AttendanceUtils:
                     'attendance_rate': 0.0
                 }
             
-            total_present = 0
-            for date in valid_dates:
-                for student in students:
-                    if attendance_data[date].get(str(student["id"]), False):
-                        total_present += 1
+            present_counts = matrix.column_sums(matrix.date_mask(valid_dates))
+            total_present = sum(present_counts.get(str(student["id"]), 0) for student in students)
             
             total_possible = total_classes * total_students
             attendance_rate = (total_present / total_possible * 100) if total_possible > 0 else 0
@@ -128,18 +104,34 @@ class AttendanceUtils:
                 'attendance_rate': 0.0
             }
     
+    @staticmethod
+    def set_student_attendance(group_id: str, date: str, student_id: str, is_present: bool) -> bool:
+        """Record a single attendance mark without rewriting the whole file"""
+        try:
+            attendance_file = DataStore.attendance_file(group_id)
+            stored = DataStore.load(attendance_file, {})
+            
+            if date not in stored:
+                attendance_data = AttendanceUtils.load_attendance_file(group_id)
+                attendance_data.setdefault(date, {})[str(student_id)] = is_present
+                return AttendanceUtils.save_attendance_file(group_id, attendance_data)
+            
+            DataStore.apply(attendance_file, {"op": "set", "keys": [date, str(student_id)], "value": is_present}, {})
+            return True
+            
+        except Exception as e:
+            print(f"Error saving attendance file: {e}")
+            return False
+    
     @staticmethod
     def save_attendance_file(group_id: str, attendance_data: Dict[str, Any]) -> bool:
         """Save attendance data to file"""
         try:
-            attendances_dir = ManageJSON.get_appdata_path() / "attendances"
-            attendances_dir.mkdir(parents=True, exist_ok=True)
-            attendance_file = attendances_dir / f"attendance_{group_id}.json"
+            attendance_file = DataStore.attendance_file(group_id)
             
             cleaned_data = AttendanceUtils.clean_attendance_data(attendance_data)
             
-            with open(attendance_file, "w", encoding="utf-8") as f:
-                json.dump(cleaned_data, f, ensure_ascii=False, indent=2)
+            DataStore.save(attendance_file, cleaned_data)
             
             return True
             
@@ -151,12 +143,10 @@ class AttendanceUtils:
     def load_attendance_file(group_id: str) -> Dict[str, Any]:
         """Load attendance data from file"""
         try:
-            attendances_dir = ManageJSON.get_appdata_path() / "attendances"
-            attendance_file = attendances_dir / f"attendance_{group_id}.json"
+            attendance_file = DataStore.attendance_file(group_id)
             
-            if attendance_file.exists():
-                with open(attendance_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
+            if DataStore.exists(attendance_file):
+                data = DataStore.load_copy(attendance_file, {})
                 
                 return AttendanceUtils.clean_attendance_data(data)
             
@@ -167,11 +157,20 @@ class AttendanceUtils:
             return {}
 
     @staticmethod
-    def get_attendance_statistics(attendance_data: Dict[str, Any], students: List[Dict]) -> Dict[str, Any]:
-        """Get comprehensive attendance statistics"""
+    def load_attendance_matrix(group_id: str) -> AttendanceMatrix:
+        """Attendance of a group as a packed matrix, built once per file snapshot (shared, read-only)"""
         try:
-            cleaned_data = AttendanceUtils.clean_attendance_data(attendance_data)
-            valid_dates = [d for d in cleaned_data.keys() if AttendanceUtils.validate_date(d)]
+            return AttendanceMatrix.load(DataStore.attendance_file(group_id))
+        except Exception as e:
+            print(f"Error loading attendance file: {e}")
+            return AttendanceMatrix()
+
+    @staticmethod
+    def get_attendance_statistics(attendance: Union[AttendanceMatrix, Dict[str, Any]], students: List[Dict]) -> Dict[str, Any]:
+        """Get comprehensive attendance statistics (of a group's matrix, or of attendance data)"""
+        try:
+            matrix = AttendanceUtils._matrix(attendance)
+            valid_dates = [d for d in matrix.dates if AttendanceUtils.validate_date(d)]
             
             total_classes = len(valid_dates)
             total_students = len(students)
@@ -187,10 +186,9 @@ class AttendanceUtils:
                     'student_stats': {}
                 }
             
-            total_present = 0
-            total_absent = 0
-            student_stats = {}
+            present_counts = matrix.column_sums(matrix.date_mask(valid_dates))
             
+            student_stats = {}
             for student in students:
                 student_stats[student["id"]] = {
                     'name': student["name"],
@@ -199,18 +197,13 @@ class AttendanceUtils:
                     'attendance_rate': 0.0
                 }
             
-            for date in valid_dates:
-                date_data = cleaned_data.get(date, {})
-                for student in students:
-                    student_id = str(student["id"])
-                    is_present = date_data.get(student_id, False)
-                    
-                    if is_present:
-                        total_present += 1
-                        student_stats[student["id"]]['present'] += 1
-                    else:
-                        total_absent += 1
-                        student_stats[student["id"]]['absent'] += 1
+            total_present = 0
+            for student in students:
+                present = present_counts.get(str(student["id"]), 0)
+                total_present += present
+                student_stats[student["id"]]['present'] += present
+                student_stats[student["id"]]['absent'] += total_classes - present
+            total_absent = total_classes * total_students - total_present
             
             total_possible = total_classes * total_students
             attendance_rate = (total_present / total_possible * 100) if total_possible > 0 else 0
@@ -241,3 +234,6 @@ class AttendanceUtils:
                 'absence_rate': 0.0,
                 'student_stats': {}
             }
+
+
+Instrumentation.register_class(AttendanceUtils)
@@ -1,106 +1,35 @@
-import json
-import os
-from datetime import datetime
-from utils.manage_json import ManageJSON
+from datetime import date, datetime
+from utils.attendance_matrix import AttendanceMatrix
+from utils.data_store import DataStore
+from utils.date_utils import parse_date
+from utils.payment_book import PaymentBook
 
 def get_total_students():
     try:
-        data_dir = ManageJSON.get_appdata_path() / "data"
-        students_file = data_dir / "students.json"
-        
-        if not students_file.exists():
-            return 0
-            
-        with open(students_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            if 'students' in data:
-                return len(data['students'])
-            return 0
-                    
+        return len(DataStore.load_students())
     except Exception:
         return 0
 
 def get_total_groups():
     try:
-        data_dir = ManageJSON.get_appdata_path() / "data"
-        groups_file = data_dir / "groups.json"
-        
-        if not groups_file.exists():
-            return 0
-            
-        with open(groups_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            if 'groups' in data:
-                return len(data['groups'])
-            return 0
-                
+        return len(DataStore.load_groups())
     except Exception:
         return 0
 
 def get_monthly_payments():
     try:
-        total_payments = 0
-        current_month = datetime.now().strftime("%m/%Y")  
-        
-        data_dir = ManageJSON.get_appdata_path() / "data"
-        students_file = data_dir / "students.json"
-        
-        if not students_file.exists():
-            return 0
-            
-        with open(students_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            if 'students' in data:
-                for student in data['students']:
-                    if 'payments' in student:
-                        for payment in student['payments']:
-                            payment_date = payment.get('date', '')
-                            if payment_date.endswith(current_month):
-                                amount = payment.get('amount', 0)
-                                if isinstance(amount, (int, float)):
-                                    total_payments += amount
-                                elif isinstance(amount, str):
-                                    try:
-                                        total_payments += float(amount.replace(',', ''))
-                                    except ValueError:
-                                        continue
-                    
-        return int(total_payments)
+        now = datetime.now()
+        return int(PaymentBook.shekels(PaymentBook.current().revenue().month_total(now.year, now.month)))
     except Exception:
         return 0
 
 def get_monthly_attendance_percentage():
     try:
-        total_present = 0
-        total_records = 0
-        current_month = datetime.now().strftime("%m/%Y") 
-        
-        attendances_dir = ManageJSON.get_appdata_path() / "attendances"
-        
-        if not attendances_dir.exists():
-            return 75  
-            
-        for filename in os.listdir(attendances_dir):
-            if filename.endswith('.json'):
-                file_path = attendances_dir / filename
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        attendance_data = json.load(f)
-                        
-                        for date, students_attendance in attendance_data.items():
-                            if date.endswith(current_month):
-                                for student_id, is_present in students_attendance.items():
-                                    total_records += 1
-                                    if is_present:
-                                        total_present += 1
-                                        
-                except (json.JSONDecodeError, KeyError):
-                    continue
-        
-        if total_records == 0:
+        month_present, month_records, _, _ = _attendance_counts(datetime.now().strftime("%m/%Y"))
+        if month_records == 0:
             return 75  
             
-        attendance_percentage = int((total_present / total_records) * 100)
+        attendance_percentage = int((month_present / month_records) * 100)
         return attendance_percentage
         
     except Exception:
@@ -109,30 +38,7 @@ def get_monthly_attendance_percentage():
 def get_all_time_attendance_percentage():
     """Returns the overall attendance percentage (all time)"""
     try:
-        total_present = 0
-        total_records = 0
-        
-        attendances_dir = ManageJSON.get_appdata_path() / "attendances"
-        
-        if not attendances_dir.exists():
-            return 75  
-            
-        for filename in os.listdir(attendances_dir):
-            if filename.endswith('.json'):
-                file_path = attendances_dir / filename
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        attendance_data = json.load(f)
-                        
-                        for date, students_attendance in attendance_data.items():
-                            for student_id, is_present in students_attendance.items():
-                                total_records += 1
-                                if is_present:
-                                    total_present += 1
-                                        
-                except (json.JSONDecodeError, KeyError):
-                    continue
-        
+        _, _, total_present, total_records = _attendance_counts(datetime.now().strftime("%m/%Y"))
         if total_records == 0:
             return 75  
             
@@ -146,32 +52,7 @@ def get_all_time_attendance_percentage():
 def get_attendance_statistics():
     """Returns detailed attendance statistics"""
     try:
-        total_present = 0
-        total_absent = 0
-        
-        attendances_dir = ManageJSON.get_appdata_path() / "attendances"
-        
-        if not attendances_dir.exists():
-            return {"present": 0, "absent": 0, "percentage": 75}
-            
-        for filename in os.listdir(attendances_dir):
-            if filename.endswith('.json'):
-                file_path = attendances_dir / filename
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        attendance_data = json.load(f)
-                        
-                        for date, students_attendance in attendance_data.items():
-                            for student_id, is_present in students_attendance.items():
-                                if is_present:
-                                    total_present += 1
-                                else:
-                                    total_absent += 1
-                                        
-                except (json.JSONDecodeError, KeyError):
-                    continue
-        
-        total_records = total_present + total_absent
+        _, _, total_present, total_records = _attendance_counts(datetime.now().strftime("%m/%Y"))
         if total_records == 0:
             return {"present": 0, "absent": 0, "percentage": 75}
             
@@ -179,7 +60,7 @@ def get_attendance_statistics():
         
         return {
             "present": total_present,
-            "absent": total_absent,
+            "absent": total_records - total_present,
             "total": total_records,
             "percentage": percentage
         }
@@ -191,53 +72,53 @@ def get_attendance_statistics():
 def get_total_payments_amount():
     """Returns the amount of all payments received"""
     try:
-        total_payments = 0
-        
-        data_dir = ManageJSON.get_appdata_path() / "data"
-        students_file = data_dir / "students.json"
-        
-        if not students_file.exists():
-            return 0
-            
-        with open(students_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            if 'students' in data:
-                for student in data['students']:
-                    if 'payments' in student:
-                        for payment in student['payments']:
-                            amount = payment.get('amount', 0)
-                            if isinstance(amount, (int, float)):
-                                total_payments += amount
-                            elif isinstance(amount, str):
-                                try:
-                                    total_payments += float(amount.replace(',', ''))
-                                except ValueError:
-                                    continue
-        return int(total_payments)
+        return int(PaymentBook.shekels(PaymentBook.current().total_agorot))
     except Exception:
         return 0
 
+def get_revenue_between(start_date=None, end_date=None):
+    """Returns the income between two dd/mm/yyyy dates (inclusive, None leaves that side open), split into cash and other methods"""
+    try:
+        revenue = PaymentBook.current().revenue()
+        start = parse_date(start_date) if start_date else date.min.toordinal()
+        end = parse_date(end_date) if end_date else date.max.toordinal()
+        cash, other = revenue.cash_and_transfer(start, end)
+        return {
+            "total": int(PaymentBook.shekels(cash + other)),
+            "cash": int(PaymentBook.shekels(cash)),
+            "other": int(PaymentBook.shekels(other))
+        }
+    except Exception:
+        return {"total": 0, "cash": 0, "other": 0}
+
+def get_revenue_by_month(limit=None):
+    """Returns the income of every month with payments, newest first, split into cash and other methods"""
+    try:
+        months = PaymentBook.current().revenue().months()
+    except Exception:
+        return []
+    report = []
+    for year, month, total, cash in reversed(months[-limit:] if limit else months):
+        report.append({
+            "month": f"{month:02d}/{year}",
+            "total": int(PaymentBook.shekels(total)),
+            "cash": int(PaymentBook.shekels(cash)),
+            "other": int(PaymentBook.shekels(total - cash))
+        })
+    return report
+
 def get_students_by_payment_status():
     """Returns statistics on the payment status of the students"""
     try:
         paid_count = 0
         debt_count = 0
         
-        data_dir = ManageJSON.get_appdata_path() / "data"
-        students_file = data_dir / "students.json"
-        
-        if not students_file.exists():
-            return {"paid": 0, "debt": 0}
-            
-        with open(students_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            if 'students' in data:
-                for student in data['students']:
-                    payment_status = student.get('payment_status', '')
-                    if payment_status == 'שולם':
-                        paid_count += 1
-                    elif 'חוב' in payment_status:
-                        debt_count += 1
+        for student in DataStore.load_students():
+            payment_status = student.get('payment_status', '')
+            if payment_status == 'שולם':
+                paid_count += 1
+            elif 'חוב' in payment_status:
+                debt_count += 1
                     
         return {"paid": paid_count, "debt": debt_count}
     except Exception:
@@ -246,36 +127,14 @@ def get_students_by_payment_status():
 def get_groups_info():
     """Returns information about the groups"""
     try:
-        data_dir = ManageJSON.get_appdata_path() / "data"
-        groups_file = data_dir / "groups.json"
-        
-        if not groups_file.exists():
-            return []
-            
-        with open(groups_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            if 'groups' in data:
-                return data['groups']
-            return []
-                
+        return DataStore.load_groups()
     except Exception:
         return []
 
 def get_students_info():
     """Returns information about the students"""
     try:
-        data_dir = ManageJSON.get_appdata_path() / "data"
-        students_file = data_dir / "students.json"
-        
-        if not students_file.exists():
-            return []
-            
-        with open(students_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            if 'students' in data:
-                return data['students']
-            return []
-                
+        return DataStore.load_students()
     except Exception:
         return []
 
@@ -283,17 +142,106 @@ def format_currency(amount):
     """Designing a sum of money in Israeli format"""
     return f"₪ {amount:,}".replace(',', ',')
 
+def _summarize_students(data, year, month):
+    """Student metrics of the dashboard for one snapshot of students.json.
+
+    Payment sums come from the snapshot's PaymentBook and its revenue
+    index. A metric whose data is malformed falls back to the value its
+    single getter above returns on error, while the others are still computed.
+    """
+    students = data.get("students", []) if isinstance(data, dict) else []
+    try:
+        book = PaymentBook.current()
+        monthly_payments = int(PaymentBook.shekels(book.revenue().month_total(year, month)))
+        total_payments = int(PaymentBook.shekels(book.total_agorot))
+    except Exception:
+        monthly_payments = total_payments = 0
+    paid_count, debt_count, status_ok = 0, 0, True
+    
+    for student in students:
+        try:
+            payment_status = student.get('payment_status', '')
+            if payment_status == 'שולם':
+                paid_count += 1
+            elif 'חוב' in payment_status:
+                debt_count += 1
+        except Exception:
+            status_ok = False
+            break
+    
+    return {
+        'total_students': len(students),
+        'monthly_payments': monthly_payments,
+        'total_payments': total_payments,
+        'payment_status': {"paid": paid_count, "debt": debt_count} if status_ok else {"paid": 0, "debt": 0}
+    }
+
+def _count_attendance(matrix, current_month):
+    """(month present, month records, present, records) of one attendance matrix"""
+    month_mask = matrix.date_mask(date for date in matrix.dates if date.endswith(current_month))
+    return (
+        matrix.total(month_mask),
+        matrix.total(month_mask, rows=matrix.recorded),
+        matrix.total(),
+        matrix.total(rows=matrix.recorded)
+    )
+
+def _attendance_counts(current_month):
+    """(month present, month records, present, records) over every attendance file, cached per file snapshot"""
+    totals = [0, 0, 0, 0]
+    for file_path in DataStore.attendance_files():
+        counts = DataStore.derived(
+            file_path, f"dashboard:{current_month}",
+            lambda data: _count_attendance(AttendanceMatrix.load(file_path), current_month), {}
+        )
+        for i, count in enumerate(counts):
+            totals[i] += count
+    return totals
+
 def get_all_dashboard_data():
-    """Returns all dashboard data in one structure"""
-    attendance_stats = get_attendance_statistics()
+    """Returns all dashboard data in one structure.
+
+    Reads students.json and every attendance file once; the student metrics
+    and each file's AttendanceMatrix are cached next to the file snapshots,
+    so repeated calls only redo the work for files that changed.
+    """
+    now = datetime.now()
+    current_month = now.strftime("%m/%Y")
+    cache_key = f"dashboard:{current_month}"
+    
+    try:
+        student_metrics = DataStore.derived(
+            DataStore.students_file(), cache_key,
+            lambda data: _summarize_students(data, now.year, now.month), {}
+        )
+    except Exception:
+        student_metrics = {
+            'total_students': 0, 'monthly_payments': 0, 'total_payments': 0,
+            'payment_status': {"paid": 0, "debt": 0}
+        }
+    
+    try:
+        month_present, month_records, total_present, total_records = _attendance_counts(current_month)
+    except Exception:
+        month_present = month_records = total_present = total_records = 0
+    
+    if total_records == 0:
+        attendance_stats = {"present": 0, "absent": 0, "percentage": 75}
+    else:
+        attendance_stats = {
+            "present": total_present,
+            "absent": total_records - total_present,
+            "total": total_records,
+            "percentage": int((total_present / total_records) * 100)
+        }
     
     return {
-        'total_students': get_total_students(),
+        'total_students': student_metrics['total_students'],
         'total_groups': get_total_groups(),
-        'monthly_payments': get_monthly_payments(),
-        'total_payments': get_total_payments_amount(),
-        'attendance_percentage': get_monthly_attendance_percentage(),
-        'all_time_attendance': get_all_time_attendance_percentage(),
-        'payment_status': get_students_by_payment_status(),
+        'monthly_payments': student_metrics['monthly_payments'],
+        'total_payments': student_metrics['total_payments'],
+        'attendance_percentage': int((month_present / month_records) * 100) if month_records else 75,
+        'all_time_attendance': attendance_stats["percentage"],
+        'payment_status': student_metrics['payment_status'],
         'attendance_stats': attendance_stats
-    }
\ No newline at end of file
+    }
@@ -0,0 +1,195 @@
+import hashlib
+import json
+
+
+class DataJournal:
+    """Append-only mutation log kept next to a JSON data file.
+
+    A mutation is written as one small JSON line to `<name>.journal` instead
+    of rewriting the whole file. Loading a file parses the last snapshot and
+    replays its journal over it; `DataStore.compact` folds the journal back
+    into the snapshot. The journal's first line records a digest of the
+    snapshot it applies to, so a journal left behind by an interrupted
+    compaction (or a snapshot rewritten by a full save) is recognized as
+    stale and ignored instead of being applied twice.
+
+    Records are applied without modifying the objects they replace, so
+    snapshots already handed out by DataStore stay unchanged.
+    """
+
+    @staticmethod
+    def journal_file(path):
+        return path.with_suffix(".journal")
+
+    @staticmethod
+    def digest(raw):
+        return hashlib.sha1(raw).hexdigest()
+
+    @staticmethod
+    def read_snapshot(path):
+        """Return (data, digest) of a JSON file"""
+        with open(path, "rb") as f:
+            raw = f.read()
+        return json.loads(raw.decode("utf-8")), DataJournal.digest(raw)
+
+    @staticmethod
+    def read_records(path, digest):
+        """Return the journal records that apply to the snapshot with this digest"""
+        journal_file = DataJournal.journal_file(path)
+        try:
+            with open(journal_file, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return []
+        if not lines:
+            return []
+
+        try:
+            header = json.loads(lines[0])
+        except ValueError:
+            return []
+        if header.get("base") != digest:
+            return []
+
+        records = []
+        for line in lines[1:]:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # A torn last line from an interrupted append
+                break
+        return records
+
+    @staticmethod
+    def load_file(path, default=None):
+        """Parse a JSON file and replay its journal over it"""
+        if not path.exists():
+            return default
+        data, digest = DataJournal.read_snapshot(path)
+        return DataJournal.replay(data, DataJournal.read_records(path, digest))
+
+    @staticmethod
+    def append(path, record, digest):
+        """Append one record, starting a new journal for the snapshot if needed"""
+        journal_file = DataJournal.journal_file(path)
+        lines = []
+        if DataJournal.read_header(path) != digest:
+            journal_file.unlink(missing_ok=True)
+            lines.append(json.dumps({"base": digest}))
+        lines.append(json.dumps(record, ensure_ascii=False))
+        with open(journal_file, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+            f.flush()
+
+    @staticmethod
+    def read_header(path):
+        try:
+            with open(DataJournal.journal_file(path), "r", encoding="utf-8") as f:
+                return json.loads(f.readline()).get("base")
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    @staticmethod
+    def discard(path):
+        DataJournal.journal_file(path).unlink(missing_ok=True)
+
+    @staticmethod
+    def replay(data, records):
+        for record in records:
+            data = DataJournal.apply(data, record)
+        return data
+
+    @staticmethod
+    def apply(data, record):
+        """Return the document with one record applied"""
+        op = record.get("op")
+        handler = DataJournal._OPS.get(op)
+        if handler is None:
+            raise ValueError(f"Unknown journal operation: {op}")
+        return handler(data, record)
+
+    # ----- operations -----
+
+    @staticmethod
+    def _set(data, record):
+        """{"op": "set", "keys": [...], "value": v} - set a nested dict key"""
+        keys = record["keys"]
+        root = dict(data)
+        node = root
+        for key in keys[:-1]:
+            child = node.get(key)
+            node[key] = dict(child) if isinstance(child, dict) else {}
+            node = node[key]
+        node[keys[-1]] = record["value"]
+        return root
+
+    @staticmethod
+    def _unset(data, record):
+        """{"op": "unset", "keys": [...]} - remove a nested dict key"""
+        keys = record["keys"]
+        root = dict(data)
+        node = root
+        for key in keys[:-1]:
+            child = node.get(key)
+            if not isinstance(child, dict):
+                return root
+            node[key] = dict(child)
+            node = node[key]
+        node.pop(keys[-1], None)
+        return root
+
+    @staticmethod
+    def _update_student(data, record, change):
+        students = list(data.get("students", []))
+        for i, student in enumerate(students):
+            if student.get("id") == record["student_id"]:
+                students[i] = change(student)
+                break
+        return {**data, "students": students}
+
+    @staticmethod
+    def _add_payment(data, record):
+        """{"op": "add_payment", "student_id", "payment", "payment_status"}"""
+        def change(student):
+            return {
+                **student,
+                "payments": list(student.get("payments", [])) + [record["payment"]],
+                "payment_status": record["payment_status"]
+            }
+        return DataJournal._update_student(data, record, change)
+
+    @staticmethod
+    def _update_fields(data, record):
+        """{"op": "update_student_fields", "student_id", "fields": {...}}"""
+        return DataJournal._update_student(data, record, lambda student: {**student, **record["fields"]})
+
+    @staticmethod
+    def _put_student(data, record):
+        """{"op": "put_student", "student": {...}, "student_id"?} - replace by id, or append"""
+        new_student = record["student"]
+        student_id = record.get("student_id", new_student.get("id"))
+        students = list(data.get("students", []))
+        for i, student in enumerate(students):
+            if student.get("id") == student_id:
+                students[i] = new_student
+                break
+        else:
+            students.append(new_student)
+        return {**data, "students": students}
+
+    @staticmethod
+    def _remove_students(data, record):
+        """{"op": "remove_students", "student_ids": [...]}"""
+        student_ids = record["student_ids"]
+        students = [s for s in data.get("students", []) if s.get("id") not in student_ids]
+        return {**data, "students": students}
+
+
+DataJournal._OPS = {
+    "set": DataJournal._set,
+    "unset": DataJournal._unset,
+    "add_payment": DataJournal._add_payment,
+    "update_student_fields": DataJournal._update_fields,
+    "put_student": DataJournal._put_student,
+    "remove_students": DataJournal._remove_students,
+}
@@ -0,0 +1,404 @@
+import copy
+import json
+import os
+import threading
+from utils.data_journal import DataJournal
+from utils.instrumentation import Instrumentation
+from utils.manage_json import ManageJSON
+
+
+class DataStore:
+    """Shared in-process cache of the parsed JSON data files.
+
+    Every file is parsed at most once per on-disk version: a snapshot is kept
+    together with the file's (mtime, size) signature and is re-read only when
+    the signature changes or when the file is written through `save`.
+    Snapshots returned by `load` are shared between all callers and must be
+    treated as read-only; use `load_copy` for read-modify-write flows.
+    Structures derived from a snapshot (indexes, aggregates) can be cached
+    next to it with `derived` and are dropped together with the snapshot,
+    except that a structure with a `refresh(new_data)` method is carried
+    over and updated in place when `apply` changes the file.
+
+    Small mutations go through `apply`, which appends a record to the file's
+    DataJournal rather than rewriting it; the journal is replayed on load
+    and folded back into the file by a background compaction once it grows.
+
+    When the SQLite database created by `SQLiteStore.migrate_from_json`
+    exists, the students, groups, joining-dates and attendance documents are
+    read from and written to it instead of the JSON files; callers keep
+    using the same paths.
+    """
+
+    COMPACT_AFTER = 200
+
+    _snapshots = {}
+    _lock = threading.RLock()
+
+    @staticmethod
+    def data_dir():
+        data_dir = ManageJSON.get_appdata_path() / "data"
+        data_dir.mkdir(parents=True, exist_ok=True)
+        return data_dir
+
+    @staticmethod
+    def attendances_dir():
+        return ManageJSON.get_appdata_path() / "attendances"
+
+    @staticmethod
+    def students_file():
+        return DataStore.data_dir() / "students.json"
+
+    @staticmethod
+    def groups_file():
+        return DataStore.data_dir() / "groups.json"
+
+    @staticmethod
+    def joining_dates_file():
+        return DataStore.data_dir() / "joining_dates.json"
+
+    @staticmethod
+    def pricing_file():
+        return DataStore.data_dir() / "pricing.json"
+
+    @staticmethod
+    def maintenance_file():
+        return DataStore.data_dir() / "maintenance.json"
+
+    @staticmethod
+    def attendance_file(group_id):
+        return DataStore.attendances_dir() / f"attendance_{group_id}.json"
+
+    @staticmethod
+    def backend():
+        """Return the SQLite backend if the data was migrated to it, else None"""
+        from utils.sqlite_store import SQLiteStore
+        return SQLiteStore.open(DataStore.data_dir() / SQLiteStore.DB_NAME)
+
+    @staticmethod
+    def migrate_to_sqlite():
+        """Import the JSON data files into a new SQLite backend and switch to it.
+
+        Holds the store lock for the whole import, so no write lands between
+        the import and the switch. Returns the summary of
+        SQLiteStore.migrate_from_json.
+        """
+        from utils.sqlite_store import SQLiteStore
+        with DataStore._lock:
+            try:
+                summary = SQLiteStore.migrate_from_json(ManageJSON.get_appdata_path())
+            except Exception as e:
+                return {"success": False, "error": str(e)}
+            DataStore._snapshots.clear()
+            return summary
+
+    @staticmethod
+    def _document(path):
+        """Map a JSON data file to a (document, argument) pair of the backend"""
+        if path.parent == DataStore.attendances_dir():
+            if path.name.startswith("attendance_") and path.suffix == ".json":
+                return "attendance", path.stem[len("attendance_"):]
+            return None
+        if path.parent != DataStore.data_dir():
+            return None
+        return {
+            "students.json": ("students", None),
+            "groups.json": ("groups", None),
+            "joining_dates.json": ("joining_dates", None),
+        }.get(path.name)
+
+    @staticmethod
+    def _backend_for(path):
+        document = DataStore._document(path)
+        if document is None:
+            return None, None
+        backend = DataStore.backend()
+        return (backend, document) if backend is not None else (None, None)
+
+    @staticmethod
+    def exists(path):
+        """Whether a data file exists, in whichever storage holds it"""
+        backend, document = DataStore._backend_for(path)
+        if backend is not None:
+            return backend.has_document(*document)
+        return path.exists()
+
+    @staticmethod
+    def attendance_files():
+        """Paths of all the stored attendance files"""
+        backend = DataStore.backend()
+        if backend is not None:
+            return [DataStore.attendance_file(group_id) for group_id in backend.attendance_group_ids()]
+        attendances_dir = DataStore.attendances_dir()
+        if not attendances_dir.exists():
+            return []
+        return sorted(attendances_dir.glob("attendance_*.json"))
+
+    @staticmethod
+    def _signature(path):
+        backend, document = DataStore._backend_for(path)
+        if backend is not None:
+            if not backend.has_document(*document):
+                return None
+            return "db", document, backend.version(document[0])
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        try:
+            journal_stat = DataJournal.journal_file(path).stat()
+            journal_signature = journal_stat.st_mtime_ns, journal_stat.st_size
+        except OSError:
+            journal_signature = None
+        return (stat.st_mtime_ns, stat.st_size), journal_signature
+
+    @staticmethod
+    def version(*paths):
+        """Data version of a set of files; changes whenever any of them is written"""
+        return tuple(DataStore._signature(path) for path in paths)
+
+    @staticmethod
+    def load(path, default=None):
+        """Return the parsed contents of a JSON file (shared, read-only)"""
+        with Instrumentation.io("load", path):
+            return DataStore._load(path, default)
+
+    @staticmethod
+    def _load(path, default):
+        key = str(path)
+        signature = DataStore._signature(path)
+        if signature is None:
+            with DataStore._lock:
+                DataStore._snapshots.pop(key, None)
+            return default
+
+        with DataStore._lock:
+            cached = DataStore._snapshots.get(key)
+            if cached and cached[0] == signature:
+                return cached[1]
+
+            try:
+                with Instrumentation.io("parse", path):
+                    if signature[0] == "db":
+                        data = DataStore.backend().load_document(*signature[1])
+                        digest, pending = None, 0
+                    else:
+                        data, digest = DataJournal.read_snapshot(path)
+                        records = DataJournal.read_records(path, digest)
+                        data = DataJournal.replay(data, records)
+                        pending = len(records)
+            except Exception as e:
+                print(f"Error loading {path.name}: {e}")
+                return default
+
+            DataStore._snapshots[key] = (signature, data, {}, digest, pending)
+            return data
+
+    @staticmethod
+    def derived(path, name, builder, default=None):
+        """Return builder(snapshot), computed once per snapshot of the file"""
+        with DataStore._lock:
+            data = DataStore.load(path)
+            if data is None:
+                return builder(default)
+
+            cached = DataStore._snapshots.get(str(path))
+            if cached is None or cached[1] is not data:
+                return builder(data)
+
+            derived = cached[2]
+            if name not in derived:
+                derived[name] = builder(data)
+            return derived[name]
+
+    @staticmethod
+    def load_copy(path, default=None):
+        """Return a private deep copy of a JSON file, safe to modify"""
+        data = DataStore.load(path)
+        if data is None:
+            return default
+        return copy.deepcopy(data)
+
+    @staticmethod
+    def save(path, data, indent=2):
+        """Write a data file and drop its cached snapshot"""
+        backend, document = DataStore._backend_for(path)
+        with DataStore._lock, Instrumentation.io("save", path):
+            try:
+                if backend is not None:
+                    backend.replace_document(document[0], data, document[1])
+                    return
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(data, f, ensure_ascii=False, indent=indent)
+                DataJournal.discard(path)
+            finally:
+                DataStore._snapshots.pop(str(path), None)
+
+    @staticmethod
+    def save_all(changes):
+        """Write (or delete) several data files as one change.
+
+        `changes` holds (path, data) or (path, data, indent) entries; data
+        None deletes the file. With the SQLite backend the whole change is a
+        single transaction. With JSON files every new file is written to a
+        temporary file first and the temporaries are moved into place only
+        once all of them were written, so a failure while writing leaves
+        every file untouched; the moves and deletions then follow in the
+        given order.
+        """
+        changes = [(change[0], change[1], change[2] if len(change) > 2 else 2) for change in changes]
+        with DataStore._lock:
+            try:
+                backend = DataStore.backend()
+                documents = [DataStore._document(path) for path, _, _ in changes]
+                if backend is not None and all(document is not None for document in documents):
+                    with Instrumentation.io("save", changes[0][0] if changes else DataStore.data_dir()):
+                        backend.replace_documents([
+                            (document[0], data, document[1])
+                            for document, (_, data, _) in zip(documents, changes)
+                        ])
+                    return
+
+                staged = []
+                try:
+                    for path, data, indent in changes:
+                        if data is None:
+                            continue
+                        path.parent.mkdir(parents=True, exist_ok=True)
+                        tmp_path = path.with_suffix(".tmp")
+                        staged.append(tmp_path)
+                        with open(tmp_path, "w", encoding="utf-8") as f:
+                            json.dump(data, f, ensure_ascii=False, indent=indent)
+                            f.flush()
+                            os.fsync(f.fileno())
+                except Exception:
+                    for tmp_path in staged:
+                        tmp_path.unlink(missing_ok=True)
+                    raise
+
+                for path, data, _ in changes:
+                    with Instrumentation.io("save", path):
+                        if data is None:
+                            path.unlink(missing_ok=True)
+                        else:
+                            os.replace(path.with_suffix(".tmp"), path)
+                        DataJournal.discard(path)
+            finally:
+                for path, _, _ in changes:
+                    DataStore._snapshots.pop(str(path), None)
+
+    @staticmethod
+    def backup(path, indent=4):
+        """Write the current contents of a data file next to it as <name>.bak; returns its path"""
+        data = DataStore.load(path)
+        if data is None:
+            return None
+        backup_path = path.with_name(path.name + ".bak")
+        with open(backup_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=indent)
+        return backup_path
+
+    @staticmethod
+    def delete(path):
+        """Delete a data file, in whichever storage holds it"""
+        DataStore.save_all([(path, None)])
+
+    @staticmethod
+    def apply(path, record, default=None, indent=2):
+        """Apply one DataJournal record to a data file and return the new contents.
+
+        The record is appended to the file's journal, so the cost of the
+        write is the size of the change; the whole file is written only when
+        it does not exist yet. With the SQLite backend the record is written
+        as the rows it touches (SQLiteStore.apply), falling back to a whole
+        document replace for records without a row-level form.
+        """
+        key = str(path)
+        record = copy.deepcopy(record)
+        backend, document = DataStore._backend_for(path)
+        with DataStore._lock, Instrumentation.io("apply", path):
+            current = DataStore.load(path)
+            cached = DataStore._snapshots.get(key)
+            if (current is None
+                    or (backend is not None and not backend.apply(document[0], record, document[1]))
+                    or (backend is None and (cached is None or cached[1] is not current))):
+                data = DataJournal.apply(default if current is None else current, record)
+                DataStore.save(path, data, indent)
+                return data
+
+            data = DataJournal.apply(current, record)
+            if backend is not None:
+                digest, pending = None, 0
+            else:
+                digest, pending = cached[3], cached[4] + 1
+                DataJournal.append(path, record, digest)
+            if cached is None or cached[1] is not current:
+                DataStore._snapshots.pop(key, None)
+                return data
+            derived = {
+                name: value.refresh(data)
+                for name, value in cached[2].items() if hasattr(value, "refresh")
+            }
+            DataStore._snapshots[key] = (DataStore._signature(path), data, derived, digest, pending)
+
+        if pending >= DataStore.COMPACT_AFTER:
+            threading.Thread(target=DataStore.compact, args=(path, indent), daemon=True).start()
+        return data
+
+    @staticmethod
+    def is_loaded(path):
+        """Whether the current version of a data file is already parsed in the cache"""
+        with DataStore._lock:
+            cached = DataStore._snapshots.get(str(path))
+            return cached is not None and cached[0] == DataStore._signature(path)
+
+    @staticmethod
+    def compact(path, indent=2):
+        """Fold a file's journal back into the file"""
+        key = str(path)
+        with DataStore._lock:
+            data = DataStore.load(path)
+            cached = DataStore._snapshots.get(key)
+            if data is None or cached is None or not cached[4]:
+                return
+
+            raw = json.dumps(data, ensure_ascii=False, indent=indent).encode("utf-8")
+            tmp_path = path.with_suffix(".tmp")
+            try:
+                with open(tmp_path, "wb") as f:
+                    f.write(raw)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, path)
+                DataJournal.discard(path)
+            except Exception as e:
+                print(f"Error compacting {path.name}: {e}")
+                DataStore._snapshots.pop(key, None)
+                return
+
+            DataStore._snapshots[key] = (DataStore._signature(path), data, cached[2], DataJournal.digest(raw), 0)
+
+    @staticmethod
+    def invalidate(path=None):
+        """Forget the cached snapshot of one file, or of all files"""
+        with DataStore._lock:
+            if path is None:
+                DataStore._snapshots.clear()
+            else:
+                DataStore._snapshots.pop(str(path), None)
+
+    @staticmethod
+    def load_students():
+        data = DataStore.load(DataStore.students_file(), {})
+        return data.get("students", []) if isinstance(data, dict) else []
+
+    @staticmethod
+    def load_groups():
+        data = DataStore.load(DataStore.groups_file(), {})
+        return data.get("groups", []) if isinstance(data, dict) else []
+
+    @staticmethod
+    def load_joining_dates():
+        data = DataStore.load(DataStore.joining_dates_file(), {})
+        return data if isinstance(data, dict) else {}
@@ -1,33 +1,149 @@
-from datetime import datetime
+from datetime import date, datetime
+from functools import lru_cache
+
+DATE_FORMAT = "%d/%m/%Y"
+
+HEBREW_WEEKDAYS = {
+    "ראשון": 6,    # Sunday
+    "שני": 0,      # Monday  
+    "שלישי": 1,    # Tuesday
+    "רביעי": 2,    # Wednesday
+    "חמישי": 3,    # Thursday
+    "שישי": 4,     # Friday
+    "שבת": 5       # Saturday
+}
+
+_DAYS_IN_MONTH = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+_UNPARSED_SORT_ORDINAL = date(1900, 1, 1).toordinal()
+
+
+@lru_cache(maxsize=8192)
+def parse_date(date_string: str) -> int:
+    """Parse a "dd/mm/yyyy" string into its day ordinal (date.toordinal), memoized.
+
+    Raises ValueError like datetime.strptime for strings that do not match.
+    """
+    return datetime.strptime(date_string, DATE_FORMAT).toordinal()
+
+
+def to_ordinal(value) -> int:
+    """Day ordinal of a "dd/mm/yyyy" string, a date or a datetime (time is ignored)"""
+    if isinstance(value, str):
+        return parse_date(value)
+    if isinstance(value, int):
+        return value
+    return value.toordinal()
+
+
+def to_datetime(ordinal: int) -> datetime:
+    """Midnight datetime of a day ordinal"""
+    return datetime.fromordinal(ordinal)
+
+
+def as_datetime(value):
+    """datetime for a "dd/mm/yyyy" string; dates and datetimes are returned unchanged"""
+    if isinstance(value, str):
+        return datetime.fromordinal(parse_date(value))
+    return value
+
+
+def format_ordinal(ordinal: int) -> str:
+    """Format a day ordinal as "dd/mm/yyyy" """
+    return date.fromordinal(ordinal).strftime(DATE_FORMAT)
+
+
+def is_valid_date(date_string) -> bool:
+    try:
+        parse_date(date_string)
+        return True
+    except (ValueError, TypeError):
+        return False
+
+
+def days_in_month(year: int, month: int) -> int:
+    if month == 2 and year % 4 == 0 and (year % 100 != 0 or year % 400 == 0):
+        return 29
+    return _DAYS_IN_MONTH[month - 1]
+
+
+def start_of_month(ordinal: int) -> int:
+    return ordinal - date.fromordinal(ordinal).day + 1
+
+
+def end_of_month(ordinal: int) -> int:
+    day = date.fromordinal(ordinal)
+    return ordinal + days_in_month(day.year, day.month) - day.day
+
+
+def month_index(ordinal: int) -> int:
+    """year * 12 + month - 1, so consecutive months differ by one"""
+    day = date.fromordinal(ordinal)
+    return day.year * 12 + day.month - 1
+
+
+def months_between(start_ordinal: int, end_ordinal: int) -> int:
+    """Whole months from start to end, never negative.
+
+    An end on the 1st of a month counts as the last day of the previous
+    month; a partial last month (end day before start day) is not counted.
+    """
+    start = date.fromordinal(start_ordinal)
+    end = date.fromordinal(end_ordinal)
+    end_day = end.day
+    if end_day == 1:
+        end = date.fromordinal(end_ordinal - 1)
+        end_day = end.day
+    months = (end.year - start.year) * 12 + (end.month - start.month)
+    if end_day < start.day:
+        months -= 1
+    return max(0, months)
+
+
+@lru_cache(maxsize=8192)
+def date_sort_ordinal(date_string: str) -> int:
+    """Sort key for loosely formatted "dd/mm/yyyy" or "dd-mm-yyyy" dates.
+
+    Strings that cannot be read sort as 01/01/1900.
+    """
+    clean_date = date_string.strip()
+    for separator in ("/", "-"):
+        parts = clean_date.split(separator)
+        if separator in clean_date and len(parts) == 3:
+            day, month, year = parts
+            if len(day) <= 2 and len(month) <= 2 and len(year) == 4:
+                try:
+                    return date(int(year), int(month), int(day)).toordinal()
+                except ValueError:
+                    pass
+            break
+    return _UNPARSED_SORT_ORDINAL
+
 
 class DateUtils:
     """Utility class for date operations"""
-    
+
     @staticmethod
     def get_current_date():
         """Get current date in Hebrew format"""
-        return datetime.now().strftime("%d/%m/%Y")
-    
+        return datetime.now().strftime(DATE_FORMAT)
+
     @staticmethod
     def format_date(date_string):
         """Format date string consistently"""
         if not date_string:
             return ""
-        
+
         try:
-            date_obj = datetime.strptime(date_string, "%d/%m/%Y")
-            return date_obj.strftime("%d/%m/%Y")
+            return format_ordinal(parse_date(date_string))
         except ValueError:
             return date_string
-    
+
     @staticmethod
     def validate_date(date_string):
         """Validate date format"""
         if not date_string:
             return False, "תאריך נדרש"
-        
-        try:
-            datetime.strptime(date_string, "%d/%m/%Y")
+
+        if is_valid_date(date_string):
             return True, None
-        except ValueError:
-            return False, "פורמט תאריך לא תקין (dd/mm/yyyy)"
\ No newline at end of file
+        return False, "פורמט תאריך לא תקין (dd/mm/yyyy)"
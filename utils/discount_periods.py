@@ -0,0 +1,131 @@
+from bisect import bisect_left
+from datetime import date
+from typing import Any, Callable, Dict, List
+
+from utils.date_utils import end_of_month, format_ordinal, parse_date, start_of_month, to_datetime, to_ordinal
+
+_START, _START_STR, _END, _ACTIVE, _REASON = range(5)
+
+
+def build_discount_periods(groups_with_dates: List[Dict[str, Any]],
+                           count_meetings: Callable[[Any, Any, Any], int],
+                           end_date=None) -> List[Dict[str, Any]]:
+    """Split a student's enrollments into billing periods with their active groups.
+
+    Dates are parsed once into day ordinals. Join events are swept in join
+    order: each one opens its join-month period, closes the previous period
+    at the end of that month and, in closed form, extends the enrollment up
+    to the end of the month of `end_date` (instead of walking month by month).
+    Group end events are sorted once; each period finds the ends that cut it
+    by bisection. Finally periods are cleaned of groups that ended before
+    them and de-duplicated by start date in a dict.
+
+    Runs in O(E log E) for E join/start/end events, plus the size of the
+    active-group lists returned. The periods are the same as those of the
+    month-by-month algorithm this replaces, including its edge cases.
+    """
+    groups = sorted(groups_with_dates, key=lambda g: parse_date(g["join_date"]))
+    join_dates = [parse_date(g["join_date"]) for g in groups]
+    start_dates = [parse_date(g["start_date"]) if g.get("start_date") else None for g in groups]
+    end_dates = [parse_date(g["end_date"]) if g.get("end_date") else None for g in groups]
+
+    today = date.today().toordinal()
+    known_ends = [end for end in end_dates if end is not None]
+    max_end = max(known_ends) if known_ends else today
+    last_ord = max_end if end_date is None else to_ordinal(end_date)
+    last_month_end = end_of_month(last_ord)
+
+    # Join events: [start, raw start string or None, end, active indexes, reason]
+    periods = []
+    prefix_ids = set()
+    for i, group in enumerate(groups):
+        prefix_ids.add(group["group_id"])
+        joined = join_dates[i]
+        if start_dates[i] is not None and start_dates[i] > joined:
+            joined = start_dates[i]
+        if joined > today:
+            continue
+
+        join_month_end = end_of_month(joined)
+        meetings = count_meetings(group["group_id"],
+                                  to_datetime(joined),
+                                  to_datetime(join_month_end))
+        prefix = list(range(i + 1))
+        if meetings >= 3:
+            month_start = start_of_month(joined)
+            period = [month_start, None, join_month_end, prefix,
+                      f"קבוצה {i+1} נכנסה ישר עם הנחה (3+ שיעורים בחודש ההצטרפות)"]
+            same_groups = True
+        else:
+            period = [join_dates[i], group["join_date"], join_month_end, [i],
+                      f"קבוצה {i+1} לבד עד סוף חודש ההצטרפות (פחות מ-3 שיעורים)"]
+            same_groups = prefix_ids == {group["group_id"]}
+
+        if periods:
+            periods[-1][_END] = join_month_end
+        periods.append(period)
+
+        if join_month_end + 1 <= last_ord:
+            if same_groups:
+                period[_END] = last_month_end
+            else:
+                periods.append([join_month_end + 1, None, last_month_end, prefix,
+                                f"קבוצה {i+1} ממשיכה לאיחוד"])
+
+    # End events: a group ending inside a period splits it
+    end_events = sorted((end, i) for i, end in enumerate(end_dates) if end is not None)
+    split_periods = []
+    for period in periods:
+        start, end, active = period[_START], period[_END], period[_ACTIVE]
+        members = set(active)
+        cuts = [
+            event for event in end_events[bisect_left(end_events, (start, -1)):bisect_left(end_events, (end, -1))]
+            if event[1] in members
+        ]
+        if not cuts:
+            split_periods.append(period)
+            continue
+
+        current_start = start
+        current = active[:]
+        for cut, finished in cuts:
+            split_periods.append([current_start, None, cut, current[:], "עד סיום קבוצה"])
+            current_start = cut + 1
+            finished_id = groups[finished]["group_id"]
+            current = [k for k in current if groups[k]["group_id"] != finished_id]
+        if current and current_start <= end:
+            split_periods.append([current_start, None, end, current, "המשך אחרי סיום קבוצה"])
+
+    # Drop groups that ended before the period ends, then keep one period per start
+    cleaned = []
+    for period in split_periods:
+        valid = [
+            k for k in period[_ACTIVE]
+            if (max_end if end_dates[k] is None else end_dates[k]) >= period[_END]
+        ]
+        if valid:
+            cleaned.append((period, valid))
+    cleaned.sort(key=lambda item: item[0][_START])
+
+    unique = {}
+    for period, valid in cleaned:
+        start_str = period[_START_STR] or format_ordinal(period[_START])
+        existing = unique.get(start_str)
+        if existing is not None:
+            existing_period, existing_valid = existing
+            if not (period[_END] > existing_period[_END] or
+                    (period[_END] == existing_period[_END] and len(valid) > len(existing_valid))):
+                continue
+            del unique[start_str]
+        unique[start_str] = (period, valid)
+
+    return [
+        {
+            "start_date": start_str,
+            "end_date": format_ordinal(period[_END]),
+            "active_groups": [groups[k] for k in valid],
+            "discount_applies": len(valid) > 1,
+            "reason": period[_REASON]
+        }
+        for start_str, (period, valid) in unique.items()
+    ]
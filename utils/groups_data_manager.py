@@ -1,34 +1,30 @@
-import json
-from utils.manage_json import ManageJSON  
+from utils.data_store import DataStore
+from utils.maintenance import Maintenance
+from utils.models import Records
+from utils.payment_ledger import PaymentLedger
 
 class GroupsDataManager:
     """Manager for groups data operations"""
     
     def __init__(self):
-        data_dir = ManageJSON.get_appdata_path() / "data"
-        data_dir.mkdir(parents=True, exist_ok=True)
-        self.groups_file = data_dir / "groups.json"
+        self.groups_file = DataStore.groups_file()
     
     def load_groups(self):
-        """Load groups from JSON file"""
-        try:
-            with open(self.groups_file, encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            return {"groups": []}
+        """Load groups from JSON file (shared snapshot, read-only)"""
+        data = DataStore.load(self.groups_file)
+        return data if isinstance(data, dict) else {"groups": []}
 
     def save_group(self, group_data):
         """Save new group to file"""
         try:
-            data = self.load_groups()
+            data = DataStore.load_copy(self.groups_file, {"groups": []})
             
             existing_ids = []
-            for group in data.get("groups", []):
-                group_id = group.get("id")
-                if group_id is not None and isinstance(group_id, int):
-                    existing_ids.append(group_id)
-                elif group_id is not None and str(group_id).isdigit():
-                    existing_ids.append(int(group_id))
+            for group in Records.groups().all:
+                if isinstance(group.id, int):
+                    existing_ids.append(group.id)
+                elif group.id is not None and str(group.id).isdigit():
+                    existing_ids.append(int(group.id))
             
             new_id = max(existing_ids) + 1 if existing_ids else 1
             
@@ -51,14 +47,140 @@ class GroupsDataManager:
             data["groups"].append(new_group)
             
             # Save to file
-            with open(self.groups_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            DataStore.save(self.groups_file, data)
             
             return True, "הקבוצה נוספה בהצלחה!"
             
         except Exception as ex:
             return False, f"שגיאה בשמירת הקובץ: {ex}"
 
+    def delete_group(self, group):
+        """Delete a group together with everything that refers to it.
+
+        Removes the group from groups.json, its entry in joining_dates.json,
+        its attendance file and its id from every student's group_ids, as
+        one DataStore.save_all change (groups.json first, so an interrupted
+        delete leaves only orphans; the orphan sweep is marked pending until
+        the change completed, so the next launch removes them). Students
+        stay in students.json even when this was their only group.
+        """
+        try:
+            group_id = group.get("id")
+            group_name = group.get("name")
+            if group_id is not None:
+                matches = lambda g: str(g.get("id")) == str(group_id)
+            else:
+                matches = lambda g: g.get("name") == group_name
+            
+            data = DataStore.load_copy(self.groups_file, {"groups": []})
+            remaining = [g for g in data.get("groups", []) if not matches(g)]
+            if len(remaining) == len(data.get("groups", [])):
+                return False, "הקבוצה לא נמצאה"
+            data["groups"] = remaining
+            
+            changes = [(self.groups_file, data)]
+            if group_id is not None:
+                student_changes, student_ids = self._without_group_refs({str(group_id)})
+                changes += student_changes
+                changes += self._without_joining_dates({str(group_id)})
+                attendance_file = DataStore.attendance_file(group_id)
+                if DataStore.exists(attendance_file):
+                    changes.append((attendance_file, None))
+            else:
+                student_ids = []
+            
+            swept = Maintenance.is_done(Maintenance.ORPHAN_SWEEP)
+            Maintenance.mark(Maintenance.ORPHAN_SWEEP, False)
+            DataStore.save_all(changes)
+            if swept:
+                Maintenance.mark(Maintenance.ORPHAN_SWEEP)
+            PaymentLedger.invalidate_students(student_ids)
+            
+            return True, "הקבוצה נמחקה בהצלחה"
+            
+        except Exception as ex:
+            return False, f"שגיאה במחיקת הקבוצה: {ex}"
+
+    def sweep_orphans(self):
+        """Remove data left behind by groups that no longer exist.
+
+        Drops attendance files, joining_dates entries and student group_ids
+        of group ids missing from groups.json, as one DataStore.save_all
+        change. Nothing is written when there are no orphans, and nothing is
+        swept while groups.json is missing or lists no groups. Returns the
+        number of removed items per store, or None if the sweep failed.
+
+        Runs in the background while the UI is live, so the store lock is
+        held from reading the known groups through the write: a group or an
+        edit saved meanwhile waits instead of being swept or overwritten.
+        """
+        summary = {"attendance_files": 0, "joining_dates": 0, "student_refs": 0}
+        try:
+            with DataStore._lock:
+                data = DataStore.load(self.groups_file)
+                if not isinstance(data, dict) or not data.get("groups"):
+                    return summary
+                
+                known = {str(group.id) for group in Records.groups().all}
+                referenced = set(DataStore.load_joining_dates())
+                for student in Records.students().all:
+                    referenced.update(str(group_id) for group_id in student.group_ids)
+                orphans = referenced - known
+                
+                attendance_files = []
+                for attendance_file in DataStore.attendance_files():
+                    if attendance_file.stem[len("attendance_"):] not in known:
+                        attendance_files.append(attendance_file)
+                
+                if not orphans and not attendance_files:
+                    return summary
+                
+                student_changes, student_ids = self._without_group_refs(orphans)
+                joining_changes = self._without_joining_dates(orphans)
+                summary["student_refs"] = sum(
+                    1 for student in Records.students().all for group_id in student.group_ids
+                    if str(group_id) in orphans
+                )
+                summary["joining_dates"] = len(orphans & set(DataStore.load_joining_dates()))
+                summary["attendance_files"] = len(attendance_files)
+                
+                DataStore.save_all(
+                    student_changes + joining_changes + [(path, None) for path in attendance_files]
+                )
+            # The ledger takes its own lock before the store lock, so it is updated after releasing it
+            PaymentLedger.invalidate_students(student_ids)
+            
+        except Exception as ex:
+            print(f"Error sweeping orphaned group data: {ex}")
+            return None
+        return summary
+
+    def _without_group_refs(self, group_keys):
+        """(students.json change, affected student ids) dropping the given group ids from every student"""
+        students_file = DataStore.students_file()
+        records = Records.students()
+        student_ids = []
+        students = []
+        for source, record in zip(records._sources, records.all):
+            if not any(str(group_id) in group_keys for group_id in record.group_ids):
+                students.append(source)
+                continue
+            student = dict(source) if "group_ids" in source else record.to_dict()
+            student["group_ids"] = [group_id for group_id in record.group_ids if str(group_id) not in group_keys]
+            students.append(student)
+            student_ids.append(record.id)
+        if not student_ids:
+            return [], []
+        return [(students_file, {"students": students}, 4)], student_ids
+
+    def _without_joining_dates(self, group_keys):
+        """joining_dates.json change dropping the entries of the given group ids"""
+        joining_dates = DataStore.load_joining_dates()
+        if not group_keys & set(joining_dates):
+            return []
+        remaining = {key: entries for key, entries in joining_dates.items() if key not in group_keys}
+        return [(DataStore.joining_dates_file(), remaining)]
+
     def validate_group_data(self, data):
         """Validate group data"""
         required_fields = ["name", "location", "price", "age_group", "teacher", "group_start_date", "group_end_date", "day_of_week"]
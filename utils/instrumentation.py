@@ -0,0 +1,211 @@
+import contextlib
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+
+class Instrumentation:
+    """Switchable counters and timers for the hot paths of the app.
+
+    Enabled with the `--instrument` argument, DANCESCHOOL_INSTRUMENT=1 or the
+    switch in the diagnostics panel. While enabled it records:
+
+    - every DataStore load/parse/save/apply, keyed by file and call site
+    - every call of a public method of the registered classes
+      (PaymentCalculator, AttendanceUtils)
+    - every page.update() of the watched page
+
+    Measurements are grouped by the current UI action (set on navigation),
+    so a report reads like "opening the students list did 412 loads of
+    students.json". When disabled the registered classes run their original
+    methods and the I/O hooks cost one flag check.
+    """
+
+    ENV_VAR = "DANCESCHOOL_INSTRUMENT"
+    ARGUMENT = "--instrument"
+    STARTUP_ACTION = "הפעלה"
+
+    enabled = False
+    _action = STARTUP_ACTION
+    _stats = {}
+    _classes = []
+    _originals = {}
+    _lock = threading.RLock()
+    _root = str(Path(__file__).resolve().parent.parent)
+    _skip_files = (__file__, contextlib.__file__)
+
+    @staticmethod
+    def is_requested() -> bool:
+        return Instrumentation.ARGUMENT in sys.argv or os.environ.get(Instrumentation.ENV_VAR) == "1"
+
+    @staticmethod
+    def enable():
+        with Instrumentation._lock:
+            if Instrumentation.enabled:
+                return
+            Instrumentation.enabled = True
+            for cls, label in Instrumentation._classes:
+                Instrumentation._wrap_class(cls, label)
+
+    @staticmethod
+    def disable():
+        with Instrumentation._lock:
+            if not Instrumentation.enabled:
+                return
+            Instrumentation.enabled = False
+            for (cls, name), original in Instrumentation._originals.items():
+                setattr(cls, name, original)
+            Instrumentation._originals.clear()
+
+    @staticmethod
+    def reset():
+        with Instrumentation._lock:
+            Instrumentation._stats = {}
+
+    @staticmethod
+    def begin_action(name: str):
+        """Attribute the following measurements to a UI action"""
+        Instrumentation._action = name
+
+    # ----- recording -----
+
+    @staticmethod
+    def _call_site():
+        frame = sys._getframe(2)
+        while frame is not None:
+            filename = frame.f_code.co_filename
+            if filename not in Instrumentation._skip_files and not filename.endswith("data_store.py"):
+                if filename.startswith(Instrumentation._root):
+                    filename = filename[len(Instrumentation._root) + 1:]
+                return f"{filename}:{frame.f_lineno} {frame.f_code.co_name}"
+            frame = frame.f_back
+        return "?"
+
+    @staticmethod
+    def record(category: str, name: str, elapsed: float = 0.0, site: str = None):
+        with Instrumentation._lock:
+            entries = Instrumentation._stats.setdefault(Instrumentation._action, {}).setdefault(category, {})
+            entry = entries.get(name)
+            if entry is None:
+                entry = entries[name] = {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "sites": {}}
+            elapsed_ms = elapsed * 1000
+            entry["count"] += 1
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+            if site is not None:
+                entry["sites"][site] = entry["sites"].get(site, 0) + 1
+
+    @staticmethod
+    @contextlib.contextmanager
+    def _timed(category, name, site=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            Instrumentation.record(category, name, time.perf_counter() - start, site)
+
+    @staticmethod
+    def io(operation: str, path):
+        """Context manager timing one data file operation (no-op when disabled)"""
+        if not Instrumentation.enabled:
+            return contextlib.nullcontext()
+        return Instrumentation._timed("io", f"{operation} {Path(path).name}", Instrumentation._call_site())
+
+    # ----- registered classes -----
+
+    @staticmethod
+    def register_class(cls, label: str = None):
+        """Time the public methods of cls whenever instrumentation is enabled"""
+        with Instrumentation._lock:
+            label = label or cls.__name__
+            Instrumentation._classes.append((cls, label))
+            if Instrumentation.enabled:
+                Instrumentation._wrap_class(cls, label)
+        return cls
+
+    @staticmethod
+    def _timed_function(func, name):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with Instrumentation._timed("calls", name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    @staticmethod
+    def _wrap_class(cls, label):
+        for name, attr in list(vars(cls).items()):
+            if name.startswith("_"):
+                continue
+            if isinstance(attr, staticmethod):
+                wrapped = staticmethod(Instrumentation._timed_function(attr.__func__, f"{label}.{name}"))
+            elif isinstance(attr, classmethod):
+                wrapped = classmethod(Instrumentation._timed_function(attr.__func__, f"{label}.{name}"))
+            elif callable(attr):
+                wrapped = Instrumentation._timed_function(attr, f"{label}.{name}")
+            else:
+                continue
+            Instrumentation._originals[(cls, name)] = attr
+            setattr(cls, name, wrapped)
+
+    # ----- page updates -----
+
+    @staticmethod
+    def watch_page(page):
+        """Count the page.update() calls of a page"""
+        original = page.update
+
+        def update(*controls):
+            if not Instrumentation.enabled:
+                return original(*controls)
+            with Instrumentation._timed("ui", "page.update"):
+                return original(*controls)
+
+        page.update = update
+        return page
+
+    # ----- reporting -----
+
+    @staticmethod
+    def snapshot():
+        """Copy of the measurements: action -> category -> name -> stats"""
+        with Instrumentation._lock:
+            return json.loads(json.dumps(Instrumentation._stats))
+
+    @staticmethod
+    def report_lines(limit: int = 15):
+        lines = []
+        for action, categories in Instrumentation.snapshot().items():
+            lines.append(f"■ {action}")
+            for category in ("io", "calls", "ui"):
+                entries = sorted(categories.get(category, {}).items(), key=lambda item: item[1]["total_ms"], reverse=True)
+                for name, entry in entries[:limit]:
+                    lines.append(f"    {entry['count']:>6} × {name}  ({entry['total_ms']:.1f} ms, max {entry['max_ms']:.1f} ms)")
+                    if entry["sites"]:
+                        site, count = max(entry["sites"].items(), key=lambda item: item[1])
+                        lines.append(f"             {count} × {site}")
+        return lines
+
+    @staticmethod
+    def dump(path=None):
+        """Write the measurements to a JSON file and return its path"""
+        if path is None:
+            from utils.data_store import DataStore
+            directory = DataStore.data_dir().parent / "diagnostics"
+            directory.mkdir(parents=True, exist_ok=True)
+            path = directory / f"diagnostics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "enabled": Instrumentation.enabled,
+                "actions": Instrumentation.snapshot()
+            }, f, ensure_ascii=False, indent=2)
+        return path
+
+
+if Instrumentation.is_requested():
+    Instrumentation.enable()
@@ -0,0 +1,66 @@
+import threading
+from utils.data_store import DataStore
+
+
+class Maintenance:
+    """One-time data upkeep tasks, recorded in maintenance.json.
+
+    A task is marked done once it completed, so later launches skip it; a
+    task that could not complete (e.g. the group id migration finding a
+    group name it cannot resolve) stays pending and is retried on the next
+    launch. The data managers are imported when a task runs, not with this
+    module.
+
+    The orphan sweep runs once for data left by earlier group deletes, and
+    again whenever a group delete marked it pending and did not get to
+    mark it done (an interrupted multi-file JSON delete).
+    """
+
+    GROUP_IDS_MIGRATION = "group_ids_migration"
+    ORPHAN_SWEEP = "orphan_sweep"
+
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _markers():
+        data = DataStore.load(DataStore.maintenance_file(), {})
+        return data if isinstance(data, dict) else {}
+
+    @staticmethod
+    def is_done(task):
+        return Maintenance._markers().get(task) is True
+
+    @staticmethod
+    def mark(task, done=True):
+        """Record a task as done (or as pending again)"""
+        with Maintenance._lock:
+            markers = dict(Maintenance._markers())
+            if markers.get(task) is done:
+                return
+            markers[task] = done
+            DataStore.save(DataStore.maintenance_file(), markers)
+
+    @staticmethod
+    def migrate_group_ids():
+        if Maintenance.is_done(Maintenance.GROUP_IDS_MIGRATION):
+            return
+        from utils.students_data_manager import StudentsDataManager
+        if StudentsDataManager().migrate_old_format():
+            Maintenance.mark(Maintenance.GROUP_IDS_MIGRATION)
+
+    @staticmethod
+    def sweep_orphans():
+        if Maintenance.is_done(Maintenance.ORPHAN_SWEEP):
+            return
+        from utils.groups_data_manager import GroupsDataManager
+        if GroupsDataManager().sweep_orphans() is not None:
+            Maintenance.mark(Maintenance.ORPHAN_SWEEP)
+
+    @staticmethod
+    def run_pending():
+        """Run every task not yet marked done"""
+        try:
+            Maintenance.migrate_group_ids()
+            Maintenance.sweep_orphans()
+        except Exception as e:
+            print(f"Error in data maintenance: {e}")
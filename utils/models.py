@@ -0,0 +1,379 @@
+import re
+from dataclasses import dataclass, field
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.data_store import DataStore
+from utils.date_utils import HEBREW_WEEKDAYS, parse_date
+
+
+def _date_ordinal(value) -> Optional[int]:
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        return parse_date(value.strip())
+    except ValueError:
+        return None
+
+
+def _number(value) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str) and value.strip():
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+_AMOUNT = re.compile(r"-?(\d+(\.\d*)?|\.\d+)")
+_THOUSANDS = re.compile(r"-?\d{1,3}(,\d{3})+(\.\d*)?")
+
+
+def parse_agorot(amount) -> Optional[int]:
+    """Payment amount in integer agorot, or None if it cannot be read.
+
+    Numbers are taken as shekels. Strings may carry a ₪ sign, spaces and
+    thousands separators ("1,500"); a lone comma before other than three
+    digits is a decimal comma ("99,50"). Fractions of an agora are rounded
+    half up.
+    """
+    if isinstance(amount, bool):
+        return None
+    if isinstance(amount, int):
+        return amount * 100
+    if isinstance(amount, float):
+        if amount != amount or amount in (float("inf"), float("-inf")):
+            return None
+        text = repr(amount)
+    elif isinstance(amount, str):
+        text = amount.replace("₪", "").replace(" ", "").strip()
+        if "," in text:
+            if _THOUSANDS.fullmatch(text):
+                text = text.replace(",", "")
+            elif text.count(",") == 1 and "." not in text:
+                text = text.replace(",", ".")
+            else:
+                return None
+        if not _AMOUNT.fullmatch(text):
+            return None
+    else:
+        return None
+    return int((Decimal(text) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+@dataclass(slots=True)
+class PaymentRecord:
+    """One payment of a student.
+
+    `agorot` is the amount parsed with parse_agorot (None when unreadable)
+    and `date_ordinal` the parsed date (None when unreadable); the raw
+    `amount` is kept for round-tripping.
+    """
+
+    amount: Any
+    agorot: Optional[int]
+    date: str
+    date_ordinal: Optional[int]
+    method: str
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    _FIELDS = ("amount", "date", "payment_method")
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any]) -> "PaymentRecord":
+        date = data.get("date", "") or ""
+        return PaymentRecord(
+            amount=data.get("amount", 0),
+            agorot=parse_agorot(data.get("amount", 0)),
+            date=date,
+            date_ordinal=_date_ordinal(date),
+            method=data.get("payment_method", "") or "",
+            extra={k: v for k, v in data.items() if k not in PaymentRecord._FIELDS}
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"amount": self.amount, "date": self.date, "payment_method": self.method, **self.extra}
+
+
+@dataclass(slots=True)
+class StudentRecord:
+    """A student and the ids of the groups they are enrolled in.
+
+    Enrollments are stored by group id in "group_ids"; names are resolved
+    through the group index. A legacy dict (group names in "groups", or a
+    single "group") is read by resolving the names against the group index;
+    names matching no group are kept in `extra["unresolved_groups"]`, so
+    writing the record back does not lose them.
+    """
+
+    id: Any
+    name: str
+    group_ids: List[Any]
+    has_sister: bool
+    join_date: str
+    payment_status: str
+    payments: List[PaymentRecord]
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    _FIELDS = ("id", "name", "group_ids", "groups", "group", "has_sister", "join_date", "payment_status", "payments")
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any], id_by_name: Dict[str, Any] = None) -> "StudentRecord":
+        extra = {k: v for k, v in data.items() if k not in StudentRecord._FIELDS}
+        if "group_ids" in data:
+            group_ids = list(data.get("group_ids") or [])
+        else:
+            group_ids, unresolved = StudentRecord._legacy_group_ids(data, id_by_name)
+            if unresolved:
+                extra["unresolved_groups"] = unresolved
+        return StudentRecord(
+            id=data.get("id"),
+            name=data.get("name", "") or "",
+            group_ids=group_ids,
+            has_sister=bool(data.get("has_sister", False)),
+            join_date=data.get("join_date", "") or "",
+            payment_status=data.get("payment_status", "") or "",
+            payments=[PaymentRecord.from_dict(p) for p in data.get("payments", []) or []],
+            extra=extra
+        )
+
+    @staticmethod
+    def is_legacy(data: Dict[str, Any]) -> bool:
+        return "group_ids" not in data and ("groups" in data or "group" in data)
+
+    @staticmethod
+    def legacy_group_names(data: Dict[str, Any]) -> List[Any]:
+        """Group names of a legacy dict ("groups" list, or a single "group")"""
+        if "groups" in data:
+            names = data.get("groups") or []
+            return [names] if isinstance(names, str) else list(names)
+        return [data["group"]] if data.get("group") else []
+
+    @staticmethod
+    def resolve_group_name(group_name, id_by_name: Dict[str, Any]):
+        group_id = id_by_name.get(group_name)
+        if group_id is None and isinstance(group_name, str):
+            group_id = id_by_name.get(group_name.strip())
+        return group_id
+
+    @staticmethod
+    def _legacy_group_ids(data: Dict[str, Any], id_by_name: Dict[str, Any] = None) -> Tuple[List[Any], List[Any]]:
+        """(group ids, names matching no group) of a legacy dict"""
+        names = StudentRecord.legacy_group_names(data)
+        if not names:
+            return [], []
+        if id_by_name is None:
+            id_by_name = Records.groups().id_by_name
+        group_ids, unresolved = [], []
+        for group_name in names:
+            group_id = StudentRecord.resolve_group_name(group_name, id_by_name)
+            if group_id is None:
+                if group_name not in unresolved:
+                    unresolved.append(group_name)
+            elif group_id not in group_ids:
+                group_ids.append(group_id)
+        return group_ids, unresolved
+
+    def in_group(self, group_id) -> bool:
+        key = str(group_id)
+        return any(str(own) == key for own in self.group_ids)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            **self.extra,
+            "group_ids": list(self.group_ids),
+            "has_sister": self.has_sister,
+            "join_date": self.join_date,
+            "payment_status": self.payment_status,
+            "payments": [payment.to_dict() for payment in self.payments]
+        }
+
+
+@dataclass(slots=True)
+class GroupRecord:
+    """A group with the legacy "day" field folded into `day_of_week`.
+
+    `weekday` (Monday=0), `monthly_price` and the date ordinals are parsed
+    once; the raw `price` and date strings are kept for round-tripping.
+    """
+
+    id: Any
+    name: str
+    day_of_week: str
+    weekday: Optional[int]
+    price: Any
+    monthly_price: Optional[float]
+    start_date: str
+    start_ordinal: Optional[int]
+    end_date: str
+    end_ordinal: Optional[int]
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    _FIELDS = ("id", "name", "day_of_week", "day", "price", "group_start_date", "group_end_date")
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any]) -> "GroupRecord":
+        day_of_week = data.get("day_of_week") or data.get("day") or ""
+        start_date = data.get("group_start_date", "") or ""
+        end_date = data.get("group_end_date", "") or ""
+        return GroupRecord(
+            id=data.get("id"),
+            name=data.get("name", "") or "",
+            day_of_week=day_of_week,
+            weekday=HEBREW_WEEKDAYS.get(day_of_week),
+            price=data.get("price"),
+            monthly_price=_number(data.get("price")),
+            start_date=start_date,
+            start_ordinal=_date_ordinal(start_date),
+            end_date=end_date,
+            end_ordinal=_date_ordinal(end_date),
+            extra={k: v for k, v in data.items() if k not in GroupRecord._FIELDS}
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {"id": self.id, "name": self.name, **self.extra}
+        if self.price is not None:
+            data["price"] = self.price
+        data["group_start_date"] = self.start_date
+        data["group_end_date"] = self.end_date
+        data["day_of_week"] = self.day_of_week
+        return data
+
+
+@dataclass(slots=True)
+class EnrollmentRecord:
+    """One joining_dates.json entry: a student joining a group on a date"""
+
+    group_id: str
+    student_id: str
+    join_date: str
+    join_ordinal: Optional[int]
+
+    @staticmethod
+    def from_dict(group_id, data: Dict[str, Any]) -> "EnrollmentRecord":
+        join_date = data.get("join_date")
+        return EnrollmentRecord(
+            group_id=str(group_id),
+            student_id=str(data.get("student_id")),
+            join_date=join_date,
+            join_ordinal=_date_ordinal(join_date)
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"student_id": self.student_id, "join_date": self.join_date}
+
+
+class StudentRecords:
+    """Student records of one students.json snapshot, in file order and by id.
+
+    Converted once per snapshot and cached as a DataStore derived structure;
+    `refresh` reuses the records of student dicts a journaled mutation left
+    untouched.
+    """
+
+    def __init__(self, students: List[Dict[str, Any]] = None, previous: "StudentRecords" = None):
+        reusable = previous._by_source if previous is not None else {}
+        self._sources = list(students or [])
+        self._by_source = {}
+        self.all: List[StudentRecord] = []
+        self.by_id: Dict[Any, StudentRecord] = {}
+        for student in self._sources:
+            record = reusable.get(id(student)) or StudentRecord.from_dict(student)
+            self._by_source[id(student)] = record
+            self.all.append(record)
+            self.by_id.setdefault(record.id, record)
+
+    @staticmethod
+    def from_data(data) -> "StudentRecords":
+        return StudentRecords(data.get("students", []) if isinstance(data, dict) else [])
+
+    def refresh(self, data) -> "StudentRecords":
+        return StudentRecords(data.get("students", []) if isinstance(data, dict) else [], self)
+
+    def record_for(self, student: Dict[str, Any]) -> StudentRecord:
+        """Record of a student dict of this snapshot (converted on the fly otherwise)"""
+        record = self._by_source.get(id(student))
+        return record if record is not None else StudentRecord.from_dict(student)
+
+    def in_group(self, group_id) -> List[Dict[str, Any]]:
+        """Student dicts of this snapshot enrolled in a group, in file order"""
+        return [source for source, record in zip(self._sources, self.all) if record.in_group(group_id)]
+
+
+class GroupRecords:
+    """Group records of one groups.json snapshot, by id and by name (first wins).
+
+    `get` and `name_of` look ids up by their string form, so an id stored
+    as 3 in one file and "3" in another resolve to the same group.
+    """
+
+    def __init__(self, groups: List[Dict[str, Any]] = None):
+        self.all: List[GroupRecord] = [GroupRecord.from_dict(group) for group in groups or []]
+        self.by_id: Dict[Any, GroupRecord] = {}
+        self.by_key: Dict[str, GroupRecord] = {}
+        self.name_by_key: Dict[str, str] = {}
+        self.id_by_name: Dict[str, Any] = {}
+        for record in self.all:
+            self.by_id.setdefault(record.id, record)
+            self.by_key.setdefault(str(record.id), record)
+            self.name_by_key.setdefault(str(record.id), record.name)
+            self.id_by_name.setdefault(record.name, record.id)
+
+    def get(self, group_id) -> Optional[GroupRecord]:
+        return self.by_key.get(str(group_id))
+
+    def name_of(self, group_id) -> Optional[str]:
+        record = self.by_key.get(str(group_id))
+        return record.name if record is not None else None
+
+    def names(self, group_ids) -> List[str]:
+        """Names of the given group ids, skipping ids of groups that no longer exist"""
+        names = []
+        for group_id in group_ids:
+            record = self.by_key.get(str(group_id))
+            if record is not None:
+                names.append(record.name)
+        return names
+
+    @staticmethod
+    def from_data(data) -> "GroupRecords":
+        return GroupRecords(data.get("groups", []) if isinstance(data, dict) else [])
+
+
+class Records:
+    """Typed views of the data files, converted once per snapshot"""
+
+    @staticmethod
+    def students() -> StudentRecords:
+        return DataStore.derived(DataStore.students_file(), "student_records", StudentRecords.from_data, {})
+
+    @staticmethod
+    def groups() -> GroupRecords:
+        return DataStore.derived(DataStore.groups_file(), "group_records", GroupRecords.from_data, {})
+
+    @staticmethod
+    def group_names(student: Dict[str, Any]) -> List[str]:
+        """Names of the groups a student dict is enrolled in"""
+        return Records.groups().names(Records.students().record_for(student).group_ids)
+
+    @staticmethod
+    def enrollments() -> Dict[Tuple[str, str], EnrollmentRecord]:
+        """(str(group id), str(student id)) -> enrollment (first entry wins)"""
+        return DataStore.derived(DataStore.joining_dates_file(), "enrollment_records", Records._build_enrollments, {})
+
+    @staticmethod
+    def _build_enrollments(data):
+        index = {}
+        if not isinstance(data, dict):
+            return index
+        for group_id, entries in data.items():
+            for entry in entries:
+                record = EnrollmentRecord.from_dict(group_id, entry)
+                index.setdefault((record.group_id, record.student_id), record)
+        return index
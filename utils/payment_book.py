@@ -0,0 +1,167 @@
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from utils.data_store import DataStore
+from utils.date_utils import month_index
+from utils.models import PaymentRecord, StudentRecord, StudentRecords, Records
+
+
+class PaymentBook:
+    """Every payment received, parsed once into integer agorot.
+
+    Built from the student records of one students.json snapshot (each
+    payment's amount and date are parsed when its record is created) and
+    cached as a DataStore derived structure. Per-student totals are kept by
+    record, by payments list and by student id. When a journaled mutation
+    such as an appended payment replaces the snapshot, `refresh` reuses the
+    records and totals of every student it did not touch, so only the
+    changed student is re-summed.
+    """
+
+    def __init__(self, records: StudentRecords, previous: "PaymentBook" = None):
+        previous_totals = previous._by_record if previous is not None else {}
+        self.records = records
+        self._by_record: Dict[int, int] = {}
+        self._by_payments: Dict[int, int] = {}
+        self._by_student_id: Dict[Any, int] = {}
+        self.total_agorot = 0
+        self._revenue = None
+        for source, record in zip(records._sources, records.all):
+            total = previous_totals.get(id(record))
+            if total is None:
+                total = PaymentBook.sum_payments(record.payments)
+            self._by_record[id(record)] = total
+            payments = source.get("payments")
+            if payments is not None:
+                self._by_payments[id(payments)] = total
+            self._by_student_id.setdefault(record.id, total)
+            self.total_agorot += total
+
+    @staticmethod
+    def from_data(data) -> "PaymentBook":
+        return PaymentBook(Records.students())
+
+    def refresh(self, data) -> "PaymentBook":
+        students = data.get("students", []) if isinstance(data, dict) else []
+        return PaymentBook(StudentRecords(students, self.records), self)
+
+    @staticmethod
+    def current() -> "PaymentBook":
+        return DataStore.derived(DataStore.students_file(), "payment_book", PaymentBook.from_data, {})
+
+    @staticmethod
+    def sum_payments(payments: List[PaymentRecord]) -> int:
+        return sum(payment.agorot for payment in payments if payment.agorot is not None)
+
+    def paid(self, student: Dict[str, Any]) -> int:
+        """Agorot paid by a student dict.
+
+        Dicts of the snapshot and copies sharing its payments list are
+        answered from the cached totals; any other dict is parsed on the fly.
+        """
+        record = self.records._by_source.get(id(student))
+        if record is not None:
+            return self._by_record[id(record)]
+        payments = student.get("payments")
+        if payments is not None and id(payments) in self._by_payments:
+            return self._by_payments[id(payments)]
+        return PaymentBook.sum_payments(StudentRecord.from_dict(student).payments)
+
+    def paid_by_id(self, student_id) -> int:
+        return self._by_student_id.get(student_id, 0)
+
+    def entries(self) -> Iterator[Tuple[StudentRecord, PaymentRecord]]:
+        """(student, payment) for every payment, in file order"""
+        for record in self.records.all:
+            for payment in record.payments:
+                yield record, payment
+
+    def revenue(self) -> "RevenueIndex":
+        """Revenue index of this snapshot, built on first use"""
+        if self._revenue is None:
+            self._revenue = RevenueIndex(self.entries())
+        return self._revenue
+
+    def month_total(self, year: int, month: int) -> int:
+        """Agorot received in one calendar month"""
+        return self.revenue().month_total(year, month)
+
+    @staticmethod
+    def shekels(agorot: int) -> float:
+        return agorot / 100
+
+
+class _Series:
+    """Dated amounts sorted by day ordinal, with prefix sums for range totals"""
+
+    def __init__(self, dated: List[Tuple[int, int]]):
+        dated.sort(key=lambda item: item[0])
+        self.ordinals = [ordinal for ordinal, _ in dated]
+        self.prefix = [0, *accumulate(agorot for _, agorot in dated)]
+
+    def between(self, start: int, end: int) -> int:
+        lo = bisect_left(self.ordinals, start)
+        hi = bisect_right(self.ordinals, end)
+        return self.prefix[hi] - self.prefix[lo] if hi > lo else 0
+
+
+class RevenueIndex:
+    """Payments received, bucketed by calendar month and by payment method.
+
+    Only payments with a readable amount and date are indexed. Month totals
+    are answered from the buckets in O(1) and totals between two dates from
+    prefix sums over the sorted payment dates in O(log n), both overall and
+    per payment method.
+    """
+
+    CASH = "מזומן"
+
+    def __init__(self, entries: Iterator[Tuple[StudentRecord, PaymentRecord]]):
+        self._months: Dict[int, int] = {}
+        self._method_months: Dict[str, Dict[int, int]] = {}
+        dated: List[Tuple[int, int]] = []
+        method_dated: Dict[str, List[Tuple[int, int]]] = {}
+        for _, payment in entries:
+            if payment.agorot is None or payment.date_ordinal is None:
+                continue
+            month = month_index(payment.date_ordinal)
+            self._months[month] = self._months.get(month, 0) + payment.agorot
+            buckets = self._method_months.setdefault(payment.method, {})
+            buckets[month] = buckets.get(month, 0) + payment.agorot
+            dated.append((payment.date_ordinal, payment.agorot))
+            method_dated.setdefault(payment.method, []).append((payment.date_ordinal, payment.agorot))
+        self._series = _Series(dated)
+        self._method_series = {method: _Series(items) for method, items in method_dated.items()}
+
+    @property
+    def methods(self) -> List[str]:
+        return list(self._method_months)
+
+    def month_total(self, year: int, month: int, method: Optional[str] = None) -> int:
+        """Agorot received in one calendar month (of one payment method)"""
+        buckets = self._months if method is None else self._method_months.get(method, {})
+        return buckets.get(year * 12 + month - 1, 0)
+
+    def between(self, start: int, end: int, method: Optional[str] = None) -> int:
+        """Agorot received between two day ordinals, both inclusive"""
+        series = self._series if method is None else self._method_series.get(method)
+        return series.between(start, end) if series is not None else 0
+
+    def by_method(self, start: int, end: int) -> Dict[str, int]:
+        """Agorot per payment method received between two day ordinals"""
+        return {method: series.between(start, end) for method, series in self._method_series.items()}
+
+    def cash_and_transfer(self, start: int, end: int) -> Tuple[int, int]:
+        """(cash, every other method) agorot received between two day ordinals"""
+        total = self.between(start, end)
+        cash = self.between(start, end, RevenueIndex.CASH)
+        return cash, total - cash
+
+    def months(self) -> List[Tuple[int, int, int, int]]:
+        """(year, month, agorot, cash agorot) of every month with income, oldest first"""
+        cash = self._method_months.get(RevenueIndex.CASH, {})
+        return [
+            (index // 12, index % 12 + 1, self._months[index], cash.get(index, 0))
+            for index in sorted(self._months)
+        ]
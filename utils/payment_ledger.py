@@ -0,0 +1,142 @@
+import threading
+from datetime import datetime
+from utils.data_store import DataStore
+from utils.models import Records
+
+
+class PaymentLedger:
+    """Materialized per-student balance table, persisted in balances.json.
+
+    Each entry holds owed-until-now, total paid, balance and status as
+    computed by the bulk payment engine, and is reused until one of its
+    inputs changes. Writers call the invalidate_* helpers for the students
+    they touch. The whole table is discarded when the month rolls over
+    (owed-until-now grows with the calendar) or when the pricing changes.
+    """
+
+    _lock = threading.RLock()
+
+    @staticmethod
+    def ledger_file():
+        return DataStore.data_dir() / "balances.json"
+
+    @staticmethod
+    def _current_month():
+        return datetime.now().strftime("%m/%Y")
+
+    @staticmethod
+    def _pricing_key(calculator):
+        return [
+            calculator.base_price,
+            calculator.price_two_groups,
+            calculator.price_three_plus,
+            calculator.sister_discount_amount
+        ]
+
+    @staticmethod
+    def _load_entries(calculator):
+        data = DataStore.load(PaymentLedger.ledger_file(), {})
+        if (not isinstance(data, dict)
+                or data.get("month") != PaymentLedger._current_month()
+                or data.get("pricing") != PaymentLedger._pricing_key(calculator)):
+            return {}
+        return data.get("students", {})
+
+    @staticmethod
+    def _save_entries(calculator, entries):
+        DataStore.save(PaymentLedger.ledger_file(), {
+            "month": PaymentLedger._current_month(),
+            "pricing": PaymentLedger._pricing_key(calculator),
+            "students": entries
+        })
+
+    @staticmethod
+    def get_balances(students=None, calculator=None):
+        """Return student id -> balance entry, computing only missing entries"""
+        if calculator is None:
+            from utils.payment_utils import PaymentCalculator
+            calculator = PaymentCalculator()
+        if students is None:
+            students = calculator.load_students()
+
+        with PaymentLedger._lock:
+            entries = PaymentLedger._load_entries(calculator)
+            balances = {}
+            missing = []
+            for student in students:
+                student_id = student.get("id")
+                entry = entries.get(str(student_id))
+                if entry is None:
+                    missing.append(student)
+                else:
+                    balances[student_id] = entry
+
+            if missing:
+                entries = dict(entries)
+                computed = calculator.calculate_students_balances(missing)
+                for student_id, balance in computed.items():
+                    entries[str(student_id)] = balance
+                    balances[student_id] = balance
+                try:
+                    PaymentLedger._save_entries(calculator, entries)
+                except Exception as e:
+                    print(f"Error saving payment ledger: {e}")
+
+            return balances
+
+    @staticmethod
+    def get_balance(student, calculator=None):
+        """Return the balance entry of a single student record"""
+        return PaymentLedger.get_balances([student], calculator)[student.get("id")]
+
+    @staticmethod
+    def store(student_id, balance, calculator=None):
+        """Record a freshly computed balance for one student"""
+        if calculator is None:
+            from utils.payment_utils import PaymentCalculator
+            calculator = PaymentCalculator()
+        with PaymentLedger._lock:
+            entries = PaymentLedger._load_entries(calculator)
+            try:
+                if entries:
+                    DataStore.apply(PaymentLedger.ledger_file(), {
+                        "op": "set", "keys": ["students", str(student_id)], "value": balance
+                    })
+                else:
+                    PaymentLedger._save_entries(calculator, {str(student_id): balance})
+            except Exception as e:
+                print(f"Error saving payment ledger: {e}")
+
+    @staticmethod
+    def invalidate_students(student_ids):
+        """Drop the entries of the given students"""
+        ledger_file = PaymentLedger.ledger_file()
+        with PaymentLedger._lock:
+            data = DataStore.load(ledger_file)
+            if not isinstance(data, dict):
+                return
+            entries = data.get("students", {})
+            keys = {str(student_id) for student_id in student_ids} & set(entries)
+            if not keys:
+                return
+            remaining = {k: v for k, v in entries.items() if k not in keys}
+            try:
+                DataStore.save(ledger_file, {**data, "students": remaining})
+            except Exception as e:
+                print(f"Error saving payment ledger: {e}")
+
+    @staticmethod
+    def invalidate_group(group_id):
+        """Drop the entries of every student enrolled in the group"""
+        PaymentLedger.invalidate_students(s.get("id") for s in Records.students().in_group(group_id))
+
+    @staticmethod
+    def invalidate_all():
+        """Drop the whole table"""
+        ledger_file = PaymentLedger.ledger_file()
+        with PaymentLedger._lock:
+            try:
+                ledger_file.unlink(missing_ok=True)
+            except Exception as e:
+                print(f"Error removing payment ledger: {e}")
+            DataStore.invalidate(ledger_file)
@@ -0,0 +1,224 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.data_store import DataStore
+from utils.models import GroupRecords, PaymentRecord, Records, StudentRecord
+from utils.payment_book import PaymentBook, RevenueIndex
+from utils.student_search_index import normalize
+
+
+@dataclass(frozen=True, slots=True)
+class PaymentFilter:
+    """Filters of a payments query; dates are day ordinals, amounts agorot, both inclusive"""
+
+    student: str = ""
+    method: Optional[str] = None
+    group: Optional[str] = None
+    start: Optional[int] = None
+    end: Optional[int] = None
+    min_agorot: Optional[int] = None
+    max_agorot: Optional[int] = None
+
+
+class PaymentResults:
+    """The payments matching one query, in sort order, read a page at a time"""
+
+    def __init__(self, query: "PaymentQuery", positions: List[int]):
+        self._query = query
+        self._positions = positions
+        self._stats = None
+
+    @property
+    def total(self) -> int:
+        return len(self._positions)
+
+    def rows(self, offset: int, limit: int) -> List[Dict[str, Any]]:
+        """Display rows of the matches from offset on (at most limit of them)"""
+        entries = self._query.entries
+        return [self._query.row(*entries[position]) for position in self._positions[offset:offset + limit]]
+
+    def page(self, number: int, size: int) -> List[Dict[str, Any]]:
+        """Display rows of one page, numbered from 0"""
+        return self.rows(number * size, size)
+
+    def page_count(self, size: int) -> int:
+        return (self.total + size - 1) // size
+
+    def stats(self) -> Dict[str, int]:
+        """Total agorot and the count of cash and other payments among the matches"""
+        if self._stats is None:
+            entries = self._query.entries
+            total_agorot = cash = 0
+            for position in self._positions:
+                payment = entries[position][1]
+                if payment.agorot is not None:
+                    total_agorot += payment.agorot
+                if payment.method == RevenueIndex.CASH:
+                    cash += 1
+            self._stats = {
+                "total_agorot": total_agorot,
+                "count": self.total,
+                "cash": cash,
+                "other": self.total - cash
+            }
+        return self._stats
+
+
+class PaymentQuery:
+    """Sorted, filtered, paged access to every payment of one students.json snapshot.
+
+    The (student, payment) entries come from the snapshot's PaymentBook.
+    Each sort order is computed once, on first use, as a list of entry
+    positions; a query walks that order through the filter and keeps only
+    positions, so building a page creates row dicts for that page alone.
+    The last few results are kept, so paging through a query (or toggling
+    back to an earlier one) does not filter again. Entries missing the sort
+    key (no date, unreadable amount, no method) come last in both
+    directions.
+
+    Group names are resolved through the group index of groups.json; when
+    that changes (e.g. a group is renamed) `current` drops the group order
+    and the cached results instead of rebuilding the query.
+    """
+
+    SORT_KEYS = ("date", "amount", "method", "student", "group")
+    CACHED_RESULTS = 8
+
+    def __init__(self, book: PaymentBook):
+        self.book = book
+        self.entries: List[Tuple[StudentRecord, PaymentRecord]] = list(book.entries())
+        self._orders: Dict[Tuple[str, bool], List[int]] = {}
+        self._results: Dict[Tuple[str, bool, PaymentFilter], PaymentResults] = {}
+        self._names: Dict[int, str] = {}
+        self.groups: GroupRecords = Records.groups()
+        self._group_displays: Dict[int, str] = {}
+
+    @staticmethod
+    def from_data(data) -> "PaymentQuery":
+        return PaymentQuery(PaymentBook.current())
+
+    @staticmethod
+    def current() -> "PaymentQuery":
+        query = DataStore.derived(DataStore.students_file(), "payment_query", PaymentQuery.from_data, {})
+        query.use_groups(Records.groups())
+        return query
+
+    def use_groups(self, groups: GroupRecords):
+        """Resolve group names through a newer group index"""
+        if groups is self.groups:
+            return
+        self.groups = groups
+        self._group_displays = {}
+        self._results = {}
+        self._orders = {key: order for key, order in self._orders.items() if key[0] != "group"}
+
+    def group_display(self, student: StudentRecord) -> str:
+        display = self._group_displays.get(id(student))
+        if display is None:
+            display = self._group_displays[id(student)] = ", ".join(self.groups.names(student.group_ids))
+        return display
+
+    def _sort_value(self, student: StudentRecord, payment: PaymentRecord, key: str):
+        if key == "date":
+            return payment.date_ordinal
+        if key == "amount":
+            return payment.agorot
+        if key == "method":
+            return payment.method or None
+        if key == "student":
+            return student.name or None
+        return self.group_display(student) or None
+
+    def order(self, sort: str = "date", descending: bool = True) -> List[int]:
+        """Entry positions in sort order (ties keep file order)"""
+        if sort not in PaymentQuery.SORT_KEYS:
+            raise ValueError(f"unknown sort key: {sort}")
+        cached = self._orders.get((sort, descending))
+        if cached is None:
+            keyed, missing = [], []
+            for position, (student, payment) in enumerate(self.entries):
+                value = self._sort_value(student, payment, sort)
+                if value is None:
+                    missing.append(position)
+                else:
+                    keyed.append((value, position))
+            keyed.sort(key=lambda item: item[0], reverse=descending)
+            cached = [position for _, position in keyed] + missing
+            self._orders[(sort, descending)] = cached
+        return cached
+
+    def _name(self, student: StudentRecord) -> str:
+        name = self._names.get(id(student))
+        if name is None:
+            name = self._names[id(student)] = normalize(student.name)
+        return name
+
+    def _matches(self, student: StudentRecord, payment: PaymentRecord, filters: PaymentFilter, text: str, group_id) -> bool:
+        if filters.method is not None and payment.method != filters.method:
+            return False
+        if filters.group is not None and (group_id is None or not student.in_group(group_id)):
+            return False
+        if filters.start is not None or filters.end is not None:
+            if payment.date_ordinal is None:
+                return False
+            if filters.start is not None and payment.date_ordinal < filters.start:
+                return False
+            if filters.end is not None and payment.date_ordinal > filters.end:
+                return False
+        if filters.min_agorot is not None or filters.max_agorot is not None:
+            if payment.agorot is None:
+                return False
+            if filters.min_agorot is not None and payment.agorot < filters.min_agorot:
+                return False
+            if filters.max_agorot is not None and payment.agorot > filters.max_agorot:
+                return False
+        return not text or text in self._name(student)
+
+    def search(self, sort: str = "date", descending: bool = True, filters: PaymentFilter = None) -> PaymentResults:
+        """Payments matching the filters, in sort order"""
+        filters = filters or PaymentFilter()
+        key = (sort, descending, filters)
+        results = self._results.get(key)
+        if results is not None:
+            return results
+
+        order = self.order(sort, descending)
+        if filters == PaymentFilter():
+            positions = order
+        else:
+            text = normalize(filters.student.strip())
+            group_id = self.groups.id_by_name.get(filters.group) if filters.group is not None else None
+            entries = self.entries
+            positions = [
+                position for position in order
+                if self._matches(*entries[position], filters, text, group_id)
+            ]
+        results = PaymentResults(self, positions)
+        if len(self._results) >= PaymentQuery.CACHED_RESULTS:
+            del self._results[next(iter(self._results))]
+        self._results[key] = results
+        return results
+
+    def methods(self) -> List[str]:
+        """Payment methods in use, sorted"""
+        return sorted({payment.method for _, payment in self.entries if payment.method})
+
+    def group_names(self) -> List[str]:
+        """Group names of students with payments, sorted"""
+        group_ids = {str(group_id) for student, _ in self.entries for group_id in student.group_ids}
+        return sorted({name for name in self.groups.names(group_ids) if name})
+
+    def row(self, student: StudentRecord, payment: PaymentRecord) -> Dict[str, Any]:
+        """Display row of one payment"""
+        row = {
+            "student_name": student.name,
+            "amount": payment.amount,
+            "agorot": payment.agorot,
+            "date": payment.date,
+            "payment_method": payment.method,
+            "group_ids": student.group_ids,
+            "groups_display": self.group_display(student)
+        }
+        if payment.extra.get("check_number"):
+            row["check_number"] = payment.extra.get("check_number")
+        return row
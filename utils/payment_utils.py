@@ -1,84 +1,106 @@
-import json
+import copy
 from datetime import datetime, timedelta
-from utils.manage_json import ManageJSON  
+from utils.data_store import DataStore
+from utils.date_utils import (
+    as_datetime, date_sort_ordinal, end_of_month, is_valid_date, months_between, to_ordinal
+)
+from utils.discount_periods import build_discount_periods
+from utils.instrumentation import Instrumentation
+from utils.models import GroupRecord, Records, StudentRecord
+from utils.payment_book import PaymentBook
 
 class PaymentCalculator:
+    # Set only on the copies made by _bulk_engine()
+    _records = None
+    _shared = None
+
     def __init__(self):
-        data_dir = ManageJSON.get_appdata_path() / "data"
-        data_dir.mkdir(parents=True, exist_ok=True)
-        
-        self.groups_file_path = data_dir / "groups.json"
-        self.students_file_path = data_dir / "students.json"
-        self.joining_dates_file_path = data_dir / "joining_dates.json"
-        self.pricing_config_file = data_dir / "pricing.json"
+        self.groups_file_path = DataStore.groups_file()
+        self.students_file_path = DataStore.students_file()
+        self.joining_dates_file_path = DataStore.joining_dates_file()
+        self.pricing_config_file = DataStore.pricing_file()
+        self.backend = DataStore.backend()
         self.load_pricing_config()
 
     def load_groups(self):
-        try:
-            if self.groups_file_path.exists():
-                with open(self.groups_file_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    return data.get("groups", [])
-            return []
-        except Exception as e:
-            print(f"Error loading groups: {e}")
-            return []
+        return DataStore.load_groups()
     
     def load_students(self):
-        try:
-            if self.students_file_path.exists():
-                with open(self.students_file_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    return data.get("students", {})
-            return []
-        except Exception as e:
-            print(f"Error loading students: {e}")
-            return []
+        return DataStore.load_students()
 
     def load_dates(self):
+        return DataStore.load_joining_dates()
+
+    def _indexed_backend(self, path):
+        """The SQLite backend, when a document is not parsed yet and one indexed row beats loading all of it"""
+        if self.backend is None or DataStore.is_loaded(path):
+            return None
+        return self.backend
+
+    def _bulk_engine(self):
+        """A copy of this calculator pinned to the current record snapshots and payment book.
+
+        Used by calculate_students_balances: lookups skip the per-call
+        snapshot checks, and `_shared` memoizes the per-group work (weekdays,
+        meeting counts, discount periods and their payments) across students.
+        """
+        engine = copy.copy(self)
+        engine._records = (Records.students(), Records.groups(), Records.enrollments(), PaymentBook.current())
+        engine._shared = {}
+        return engine
+
+    def _memo(self, key, compute):
+        if self._shared is None:
+            return compute()
+        if key not in self._shared:
+            self._shared[key] = compute()
+        return self._shared[key]
+
+    def _student_record(self, student_id):
+        if self._records is not None:
+            try:
+                return self._records[0].by_id.get(student_id)
+            except TypeError:
+                return None
+        backend = self._indexed_backend(self.students_file_path)
+        if backend is not None:
+            student = backend.get_student_by_id(student_id)
+            return StudentRecord.from_dict(student) if student is not None else None
         try:
-            if self.joining_dates_file_path.exists():
-                with open(self.joining_dates_file_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    return data
-            return []
-        except Exception as e:
-            print(f"Error loading dates: {e}")
-            return []
+            return Records.students().by_id.get(student_id)
+        except TypeError:
+            return None
+
+    def _group_record(self, group_id):
+        if self._records is not None:
+            return self._records[1].get(group_id)
+        backend = self._indexed_backend(self.groups_file_path)
+        if backend is not None:
+            group = backend.get_group_by_id(group_id)
+            return GroupRecord.from_dict(group) if group is not None else None
+        return Records.groups().get(group_id)
         
     def load_pricing_config(self):
-        try:
-            if self.pricing_config_file.exists():
-                with open(self.pricing_config_file, "r", encoding="utf-8") as f:
-                    config = json.load(f)
-                    self.base_price = config.get("single", 180)
-                    self.price_two_groups = config.get("two", 280)
-                    self.price_three_plus = config.get("three", 360)
-                    self.sister_discount_amount = config.get("sister", 20)
-            else:
-                self.base_price = self.base_price
-                self.price_two_groups = 280
-                self.price_three_plus = 360
-                self.sister_discount_amount = 20
-        except Exception as e:
-            print(f"Error loading pricing config, using defaults: {e}")
-            self.base_price = self.base_price
-            self.price_two_groups = 280
-            self.price_three_plus = 360
-            self.sister_discount_amount = 20
+        config = DataStore.load(self.pricing_config_file)
+        if not isinstance(config, dict):
+            config = {}
+        self.base_price = config.get("single", 180)
+        self.price_two_groups = config.get("two", 280)
+        self.price_three_plus = config.get("three", 360)
+        self.sister_discount_amount = config.get("sister", 20)
     
     def get_student_join_date_for_group(self, student_id, group_id):
         try:
-            joining_dates = self.load_dates()
-            
-            group_id_str = str(group_id)  
-            
-            group_data = joining_dates.get(group_id_str, [])
-            
-            for student_entry in group_data:
-                if str(student_entry.get("student_id")) == str(student_id):
-                    join_date = student_entry.get("join_date")
+            backend = None if self._records is not None else self._indexed_backend(self.joining_dates_file_path)
+            if backend is not None:
+                join_date = backend.get_student_join_date_for_group(student_id, group_id)
+                if join_date is not None:
                     return join_date
+            else:
+                enrollments = self._records[2] if self._records is not None else Records.enrollments()
+                enrollment = enrollments.get((str(group_id), str(student_id)))
+                if enrollment is not None:
+                    return enrollment.join_date
             
             print(f"DEBUG: No join date found for student {student_id} in group {group_id}")
             return None
@@ -90,28 +112,25 @@ class PaymentCalculator:
     def get_student_groups_with_join_dates(self, student_id):
         """Get all groups for student with their join and end dates"""
         try:
-            student = self.get_student_by_id(student_id)
+            student = self._student_record(student_id)
             if not student:
                 return []
             
             groups_with_dates = []
-            for group_name in student.get("groups", []):
-                group_id = self.get_group_id_by_name(group_name)
-                if group_id:
+            for group_id in student.group_ids:
+                group = self._group_record(group_id)
+                if group:
                     join_date = self.get_student_join_date_for_group(student_id, group_id)
-                    group = self.get_group_by_id(group_id)
-                    if join_date and group:
-                        group_start_date = group.get("group_start_date")
-                        end_date = group.get("group_end_date") 
+                    if join_date:
                         groups_with_dates.append({
-                            "group_name": group_name,
+                            "group_name": group.name,
                             "group_id": group_id,
                             "join_date": join_date,
-                            "end_date": end_date,
-                            "start_date": group_start_date, 
+                            "end_date": group.end_date,
+                            "start_date": group.start_date, 
                         })
             
-            groups_with_dates.sort(key=lambda x: datetime.strptime(x["join_date"], "%d/%m/%Y"))
+            groups_with_dates.sort(key=lambda x: as_datetime(x["join_date"]))
             return groups_with_dates
             
         except Exception as e:
@@ -144,163 +163,11 @@ class PaymentCalculator:
             groups_with_dates = self.get_student_groups_with_join_dates(student_id)
             if not groups_with_dates:
                 return []
-            
-            all_end_dates = [
-                datetime.strptime(g["end_date"], "%d/%m/%Y")
-                for g in groups_with_dates if g.get("end_date")
-            ]
-
-            if all_end_dates:
-                max_end_date = max(all_end_dates)
-            else:
-                max_end_date = datetime.now()
-
-            if end_date is None:
-                end_date = max_end_date
-
-
-            groups_with_dates.sort(key=lambda x: datetime.strptime(x["join_date"], "%d/%m/%Y"))
-            periods = []
-
-            for i, group in enumerate(groups_with_dates):
-                join_date = datetime.strptime(group["join_date"], "%d/%m/%Y")
-
-                group_start_str = group.get("start_date")
-                if group_start_str:
-                    group_start = datetime.strptime(group_start_str, "%d/%m/%Y")
-                    if group_start > join_date:
-                        join_date = group_start
-
-                if join_date > datetime.now():
-                    continue
-
-                group_id = group["group_id"]
-                end_of_join_month = self.get_end_of_month(join_date)
-                meetings = self.count_meetings_in_date_range(group_id, join_date, end_of_join_month)
-
-                if meetings >= 3:
-                    start_of_month = join_date.replace(day=1)
-
-                    if periods:
-                        prev = periods[-1]
-                        prev["end_date"] = (start_of_month - timedelta(days=1)).strftime("%d/%m/%Y")
-
-                    active_groups = groups_with_dates[:i + 1]
-
-                    periods.append({
-                        "start_date": start_of_month.strftime("%d/%m/%Y"),
-                        "end_date": end_of_join_month.strftime("%d/%m/%Y"),
-                        "active_groups": active_groups,
-                        "discount_applies": len(active_groups) > 1,
-                        "reason": f"קבוצה {i+1} נכנסה ישר עם הנחה (3+ שיעורים בחודש ההצטרפות)"
-                    })
-
-                else:
-                    periods.append({
-                        "start_date": group["join_date"],
-                        "end_date": end_of_join_month.strftime("%d/%m/%Y"),
-                        "active_groups": [group],
-                        "discount_applies": False,
-                        "reason": f"קבוצה {i+1} לבד עד סוף חודש ההצטרפות (פחות מ-3 שיעורים)"
-                    })
-
-                if len(periods) >= 2:
-                    prev = periods[-2]
-                    prev["end_date"] = end_of_join_month.strftime("%d/%m/%Y")
-
-                next_month_start = end_of_join_month + timedelta(days=1)
-                while next_month_start <= end_date:
-                    active_groups = groups_with_dates[:i + 1]
-                    current_end = self.get_end_of_month(next_month_start).strftime("%d/%m/%Y")
-
-                    if periods and set(g["group_id"] for g in periods[-1]["active_groups"]) == set(g["group_id"] for g in active_groups):
-                        periods[-1]["end_date"] = current_end
-                    else:
-                        periods.append({
-                            "start_date": next_month_start.strftime("%d/%m/%Y"),
-                            "end_date": current_end,
-                            "active_groups": active_groups,
-                            "discount_applies": len(active_groups) > 1,
-                            "reason": f"קבוצה {i+1} ממשיכה לאיחוד"
-                        })
-
-                    next_month_start = self.get_end_of_month(next_month_start) + timedelta(days=1)
-
-            final_periods = []
-            for period in periods:
-                period_start = datetime.strptime(period["start_date"], "%d/%m/%Y")
-                period_end = datetime.strptime(period["end_date"], "%d/%m/%Y")
-                active_groups = period["active_groups"]
-
-                cut_dates = []
-                for g in active_groups:
-                    group_end_date_str = g.get("end_date")
-                    if group_end_date_str:
-                        group_end_date = datetime.strptime(group_end_date_str, "%d/%m/%Y")
-                        if period_start <= group_end_date < period_end:
-                            cut_dates.append((group_end_date, g["group_id"]))
-
-                if not cut_dates:
-                    final_periods.append(period)
-                else:
-                    cut_dates.sort(key=lambda x: x[0])
-                    current_start = period_start
-                    current_groups = active_groups[:]
-
-                    for cut_date, finished_group_id in cut_dates:
-                        final_periods.append({
-                            "start_date": current_start.strftime("%d/%m/%Y"),
-                            "end_date": cut_date.strftime("%d/%m/%Y"),
-                            "active_groups": current_groups[:],
-                            "discount_applies": len(current_groups) > 1,
-                            "reason": "עד סיום קבוצה"
-                        })
-
-                        current_start = cut_date + timedelta(days=1)
-                        current_groups = [g for g in current_groups if g["group_id"] != finished_group_id]
-
-                    if current_groups and current_start <= period_end:
-                        final_periods.append({
-                            "start_date": current_start.strftime("%d/%m/%Y"),
-                            "end_date": period_end.strftime("%d/%m/%Y"),
-                            "active_groups": current_groups,
-                            "discount_applies": len(current_groups) > 1,
-                            "reason": "המשך אחרי סיום קבוצה"
-                        })
-
-            cleaned_periods = []
-            for period in final_periods:
-                valid_groups = []
-                for g in period["active_groups"]:
-                    g_end = datetime.strptime(g["end_date"], "%d/%m/%Y") if g.get("end_date") else max_end_date
-                    if g_end >= datetime.strptime(period["end_date"], "%d/%m/%Y"):
-                        valid_groups.append(g)
-
-                if valid_groups:
-                    cleaned_periods.append({
-                        **period,
-                        "active_groups": valid_groups,
-                        "discount_applies": len(valid_groups) > 1
-                    })
-
-            cleaned_periods.sort(key=lambda x: datetime.strptime(x["start_date"], "%d/%m/%Y"))
-
-            unique_periods = []
-            for period in cleaned_periods:
-                existing = next((p for p in unique_periods if p["start_date"] == period["start_date"]), None)
-
-                if existing:
-                    existing_end = datetime.strptime(existing["end_date"], "%d/%m/%Y")
-                    current_end = datetime.strptime(period["end_date"], "%d/%m/%Y")
-
-                    if (current_end > existing_end or
-                        (current_end == existing_end and len(period["active_groups"]) > len(existing["active_groups"]))):
-                        unique_periods.remove(existing)
-                        unique_periods.append(period)
-                else:
-                    unique_periods.append(period)
-
-            return unique_periods
+            # Students with the same enrollments share the periods in a bulk run
+            key = ("periods", end_date, tuple((g["group_id"], g["join_date"]) for g in groups_with_dates))
+            return self._memo(key, lambda: build_discount_periods(
+                groups_with_dates, self.count_meetings_in_date_range, end_date
+            ))
 
         except Exception as e:
             print(f"DEBUG: Error creating discount periods with end-date check: {e}")
@@ -309,16 +176,16 @@ class PaymentCalculator:
     def calculate_period_payment_with_discount_rules(self, student_id, period):
         """Calculate payment for a specific period with discount rules"""
         try:
-            student = self.get_student_by_id(student_id)
+            student = self._student_record(student_id)
             if not student:
                 return {"success": False, "error": "Student not found"}
             
-            start_date = datetime.strptime(period["start_date"], "%d/%m/%Y")
-            end_date = datetime.strptime(period["end_date"], "%d/%m/%Y")
+            start_date = as_datetime(period["start_date"])
+            end_date = as_datetime(period["end_date"])
             active_groups = period["active_groups"]
             num_groups = len(active_groups)
             discount_applies = period["discount_applies"]
-            has_sister = student.get("has_sister", False)
+            has_sister = student.has_sister
             
             base_price = self.base_price
             if discount_applies and num_groups > 1:
@@ -336,13 +203,9 @@ class PaymentCalculator:
                     group_id = active_groups[0]["group_id"]
                     meetings = self.count_meetings_in_date_range(group_id, start_date, end_date)
                 else:
-                    max_meetings = 0
-                    for group_info in active_groups:
-                        group_meetings = self.count_meetings_in_date_range(
-                            group_info["group_id"], start_date, end_date
-                        )
-                        max_meetings = max(max_meetings, group_meetings)
-                    meetings = max_meetings
+                    meetings = max([0] + self.count_meetings_in_date_ranges(
+                        (group_info["group_id"], start_date, end_date) for group_info in active_groups
+                    ))
                 
                 payment = self.calculate_first_month_payment(monthly_price, meetings)
                 
@@ -372,13 +235,9 @@ class PaymentCalculator:
                         group_id, start_date, end_of_first_month
                     )
                 else:
-                    max_meetings = 0
-                    for group_info in active_groups:
-                        group_meetings = self.count_meetings_in_date_range(
-                            group_info["group_id"], start_date, end_of_first_month
-                        )
-                        max_meetings = max(max_meetings, group_meetings)
-                    first_month_meetings = max_meetings
+                    first_month_meetings = max([0] + self.count_meetings_in_date_ranges(
+                        (group_info["group_id"], start_date, end_of_first_month) for group_info in active_groups
+                    ))
                 
                 first_month_payment = self.calculate_first_month_payment(monthly_price, first_month_meetings)
                 
@@ -412,7 +271,7 @@ class PaymentCalculator:
     def calculate_student_payment_until_now_with_correct_discounts(self, student_id):
         """Calculate student payment with correct discount timing"""
         try:
-            student = self.get_student_by_id(student_id)
+            student = self._student_record(student_id)
             if not student:
                 return {
                     "success": False,
@@ -433,7 +292,11 @@ class PaymentCalculator:
             total_payment = 0
             
             for i, period in enumerate(periods):
-                period_result = self.calculate_period_payment_with_discount_rules(student_id, period)
+                # Shared periods are kept alive by the memo, so their ids are stable keys
+                period_result = self._memo(
+                    ("period_payment", id(period), student.has_sister),
+                    lambda: self.calculate_period_payment_with_discount_rules(student_id, period)
+                )
                 if period_result.get("success"):
                     period_payments.append(period_result)
                     total_payment += period_result["total_payment"]
@@ -442,7 +305,7 @@ class PaymentCalculator:
             
             return {
                 "success": True,
-                "student_name": student.get("name", ""),
+                "student_name": student.name,
                 "student_id": student_id,
                 "calculation_period": f"עד סוף החודש הנוכחי ({end_of_current_month.strftime('%d/%m/%Y')})",
                 "periods": period_payments,
@@ -461,27 +324,88 @@ class PaymentCalculator:
         """Updated to use correct discount timing"""
         return self.calculate_student_payment_until_now_with_correct_discounts(student_id)
 
+    def summarize_student_balance(self, student, calc_result=None):
+        """Owed until now, total paid, balance and payment status for one student"""
+        book = self._records[3] if self._records is not None else PaymentBook.current()
+        paid_agorot = book.paid(student)
+        total_paid = PaymentBook.shekels(paid_agorot) if paid_agorot else 0
+
+        if calc_result is None:
+            calc_result = self.calculate_student_payment_until_now(student.get('id'))
+        if calc_result.get("success"):
+            total_owed = calc_result["total_payment"]
+            course_started = calc_result.get("course_started", True)
+        else:
+            total_owed = 0
+            course_started = False
+
+        if total_owed > 0:
+            if total_paid == total_owed:
+                status = "שולם"
+            elif total_paid > total_owed:
+                status = "שילם יותר (זיכוי)"
+            elif total_paid > 0:
+                status = "שולם עד כה"
+            else:
+                status = f"חוב {total_owed}₪"
+        else:
+            if not course_started:
+                status = "החוג לא התחיל"
+            else:
+                status = "לא נמצא מחיר קבוצות"
+
+        return {
+            "success": calc_result.get("success", False),
+            "total_owed": total_owed,
+            "total_paid": total_paid,
+            "balance": total_owed - total_paid,
+            "course_started": course_started,
+            "status": status
+        }
+
+    def calculate_students_balances(self, students=None, group_id=None):
+        """Bulk payment engine: balances for many students from one data snapshot.
+
+        `students` defaults to every student in students.json; `group_id`
+        restricts the result to that group's roster. The records are resolved
+        once, and group weekdays, meeting counts, discount periods and period
+        payments are computed once per distinct input and shared by all the
+        students (see _bulk_engine). Returns a dict of student id ->
+        summarize_student_balance() result.
+        """
+        if students is None:
+            students = self.load_students()
+        engine = self._bulk_engine()
+        if group_id is not None:
+            records = engine._records[0]
+            students = [s for s in students if records.record_for(s).in_group(group_id)]
+
+        balances = {}
+        for student in students:
+            student_id = student.get("id")
+            if student_id in balances:
+                continue
+            balances[student_id] = engine.summarize_student_balance(student)
+        return balances
+
+    def _invalidate_ledger(self, student_ids):
+        from utils.payment_ledger import PaymentLedger
+        PaymentLedger.invalidate_students(student_ids)
+
     def validate_group_id(self, group_id):
         """Validate that group_id is a proper group ID, not a date"""
         try:
-            if isinstance(group_id, str) and '/' in group_id:
-                try:
-                    datetime.strptime(group_id, "%d/%m/%Y")
-                    print(f"WARNING: Group ID {group_id} appears to be a date, not a group ID")
-                    return False
-                except ValueError:
-                    pass 
+            if isinstance(group_id, str) and '/' in group_id and is_valid_date(group_id):
+                print(f"WARNING: Group ID {group_id} appears to be a date, not a group ID")
+                return False
             return True
         except Exception as e:
             print(f"Error validating group ID: {e}")
             return False
 
     def get_student_by_id(self, student_id):
-        students = self.load_students()
-        for student in students:
-            if student.get("id") == student_id:
-                return student
-        return None
+        student = self._student_record(student_id)
+        return student.to_dict() if student is not None else None
     
     def calculate_multiple_groups_discount(self, base_price, num_groups):
         if num_groups == 1:
@@ -503,15 +427,15 @@ class PaymentCalculator:
             if base_price is None:
                 base_price = self.base_price
 
-            student = self.get_student_by_id(student_id)
+            student = self._student_record(student_id)
             if not student:
                 return {
                     "success": False,
                     "error": f"Student with ID {student_id} not found"
                 }
             
-            groups = student.get("groups", [])
-            num_groups = len(groups)
+            groups = Records.groups().names(student.group_ids)
+            num_groups = len(student.group_ids)
             
             if num_groups == 0:
                 return {
@@ -521,12 +445,12 @@ class PaymentCalculator:
             
             price_after_groups_discount = self.calculate_multiple_groups_discount(base_price, num_groups)
             
-            has_sister = student.get("has_sister", False)
+            has_sister = student.has_sister
             final_price = self.calculate_sister_discount(price_after_groups_discount, has_sister)
             
             return {
                 "success": True,
-                "student_name": student.get("name", ""),
+                "student_name": student.name,
                 "student_id": student_id,
                 "num_groups": num_groups,
                 "groups": groups,
@@ -546,110 +470,102 @@ class PaymentCalculator:
             }
     
     def get_group_by_id(self, group_id):
-        groups = self.load_groups()
-        for group in groups:
-            if group.get("id") == group_id:
-                return group
-        return None
+        group = self._group_record(group_id)
+        return group.to_dict() if group is not None else None
     
     def get_group_id_by_name(self, group_name):
-        groups = self.load_groups()
-        for group in groups:
-            if group.get("name") == group_name:
-                group_id = group.get("id")
+        backend = self._indexed_backend(self.groups_file_path)
+        if backend is not None:
+            group_id = backend.get_group_id_by_name(group_name)
+            if group_id is not None:
                 return group_id
+        else:
+            id_by_name = Records.groups().id_by_name
+            if group_name in id_by_name:
+                return id_by_name[group_name]
         print(f"DEBUG: Group '{group_name}' not found")
         return None
 
     def get_end_of_month(self, date):
-        if isinstance(date, str):
-            date = datetime.strptime(date, "%d/%m/%Y")
+        date = as_datetime(date)
+        ordinal = date.toordinal()
+        return date + timedelta(days=end_of_month(ordinal) - ordinal)
+    
+    def get_group_weekday(self, group_id):
+        """Return the group's meeting weekday (Monday=0), or None"""
+        return self._memo(("weekday", group_id), lambda: self._group_weekday(group_id))
+
+    def _group_weekday(self, group_id):
+        group = self._group_record(group_id)
+        if not group:
+            print(f"Group with ID {group_id} not found")
+            return None
         
-        if date.month == 12:
-            next_month = date.replace(year=date.year + 1, month=1, day=1)
-        else:
-            next_month = date.replace(month=date.month + 1, day=1)
+        if not group.day_of_week:
+            print(f"Course day not found for group {group_id}")
+            return None
         
-        end_of_month = next_month - timedelta(days=1)
-        return end_of_month
-    
+        if group.weekday is None:
+            print(f"Invalid course day: {group.day_of_week}")
+        return group.weekday
+
+    @staticmethod
+    def count_weekday_in_range(start_date, end_date, weekday):
+        """Count days start_date + k*1day <= end_date falling on weekday, in O(1)"""
+        if end_date < start_date:
+            return 0
+        days = (end_date - start_date).days + 1
+        offset = (weekday - start_date.weekday()) % 7
+        if offset >= days:
+            return 0
+        return (days - 1 - offset) // 7 + 1
+
     def count_meetings_in_date_range(self, group_id, start_date, end_date):
+        return self._memo(
+            ("meetings", group_id, start_date, end_date),
+            lambda: self._count_meetings_in_date_range(group_id, start_date, end_date)
+        )
+
+    def _count_meetings_in_date_range(self, group_id, start_date, end_date):
         try:
-            group = self.get_group_by_id(group_id)
-            if not group:
-                print(f"Group with ID {group_id} not found")
-                return 0
-            
-            course_day = group.get("day_of_week")
-            if not course_day:
-                print(f"Course day not found for group {group_id}")
-                return 0
-            
-            hebrew_days = {
-                "ראשון": 6,    # Sunday
-                "שני": 0,      # Monday  
-                "שלישי": 1,    # Tuesday
-                "רביעי": 2,    # Wednesday
-                "חמישי": 3,    # Thursday
-                "שישי": 4,     # Friday
-                "שבת": 5       # Saturday
-            }
-            
-            course_weekday = hebrew_days.get(course_day)
+            course_weekday = self.get_group_weekday(group_id)
             if course_weekday is None:
-                print(f"Invalid course day: {course_day}")
                 return 0
             
-            if isinstance(start_date, str):
-                start_date = datetime.strptime(start_date, "%d/%m/%Y")
-            if isinstance(end_date, str):
-                end_date = datetime.strptime(end_date, "%d/%m/%Y")
-            
-            meetings_count = 0
-            current_date = start_date
-            
-            while current_date <= end_date:
-                if current_date.weekday() == course_weekday:
-                    meetings_count += 1
-                current_date += timedelta(days=1)
-            
-            return meetings_count
+            return self.count_weekday_in_range(as_datetime(start_date), as_datetime(end_date), course_weekday)
             
         except Exception as e:
             print(f"Error counting meetings in date range: {e}")
             return 0
+
+    def count_meetings_in_date_ranges(self, ranges):
+        """Count meetings for many (group_id, start_date, end_date) ranges in one pass.
+
+        Each group's weekday is resolved only once (date strings go through the
+        memoized date parser), then every range is counted with the
+        closed-form weekday counter. Returns a list of counts in the order of
+        `ranges`.
+        """
+        weekdays = {}
+
+        counts = []
+        for group_id, start_date, end_date in ranges:
+            try:
+                if group_id not in weekdays:
+                    weekdays[group_id] = self.get_group_weekday(group_id)
+                course_weekday = weekdays[group_id]
+                if course_weekday is None:
+                    counts.append(0)
+                    continue
+                counts.append(self.count_weekday_in_range(as_datetime(start_date), as_datetime(end_date), course_weekday))
+            except Exception as e:
+                print(f"Error counting meetings in date range: {e}")
+                counts.append(0)
+        return counts
     
     def calculate_months_between_dates(self, start_date, end_date):
         try:
-            if isinstance(start_date, str):
-                start_date = datetime.strptime(start_date, "%d/%m/%Y")
-            if isinstance(end_date, str):
-                end_date = datetime.strptime(end_date, "%d/%m/%Y")
-            
-            if end_date.day == 1:
-                if end_date.month == 1:
-                    end_date = end_date.replace(year=end_date.year - 1, month=12, day=31)
-                else:
-                    previous_month = end_date.month - 1
-                    if previous_month in [1, 3, 5, 7, 8, 10, 12]:
-                        last_day = 31
-                    elif previous_month in [4, 6, 9, 11]:
-                        last_day = 30
-                    else:  
-                        year = end_date.year
-                        if (year % 4 == 0 and year % 100 != 0) or (year % 400 == 0):
-                            last_day = 29
-                        else:
-                            last_day = 28
-                    
-                    end_date = end_date.replace(month=previous_month, day=last_day)
-            
-            months_diff = (end_date.year - start_date.year) * 12 + (end_date.month - start_date.month)
-            
-            if end_date.day < start_date.day:
-                months_diff -= 1
-            
-            return max(0, months_diff)
+            return months_between(to_ordinal(start_date), to_ordinal(end_date))
             
         except Exception as e:
             print(f"Error calculating months between dates: {e}")
@@ -739,10 +655,7 @@ class PaymentCalculator:
             monthly_price = validation_result["monthly_price"]
             price_details = validation_result["price_details"]
             
-            if isinstance(start_date, str):
-                start_date_dt = datetime.strptime(start_date, "%d/%m/%Y")
-            else:
-                start_date_dt = start_date
+            start_date_dt = as_datetime(start_date)
             
             payment_type = "Full period payment"
             
@@ -751,7 +664,7 @@ class PaymentCalculator:
             end_of_first_month = self.get_end_of_month(start_date_dt)
             
             if total_months == 0:
-                end_date_dt = datetime.strptime(end_date, "%d/%m/%Y")
+                end_date_dt = as_datetime(end_date)
                 period_meetings = self.count_meetings_in_date_range(
                     group_id, start_date_dt, end_date_dt
                 )
@@ -794,10 +707,7 @@ class PaymentCalculator:
             
             monthly_price = validation_result["monthly_price"]
             
-            if isinstance(start_date, str):
-                start_date_dt = datetime.strptime(start_date, "%d/%m/%Y")
-            else:
-                start_date_dt = start_date
+            start_date_dt = as_datetime(start_date)
             
             current_date = datetime.now()
             end_of_current_month = self.get_end_of_month(current_date)
@@ -870,10 +780,7 @@ class PaymentCalculator:
             
             monthly_price = validation_result["monthly_price"]
             
-            if isinstance(start_date, str):
-                start_date_dt = datetime.strptime(start_date, "%d/%m/%Y")
-            else:
-                start_date_dt = start_date
+            start_date_dt = as_datetime(start_date)
             
             payment_type = "Full period payment"
             
@@ -882,7 +789,7 @@ class PaymentCalculator:
             end_of_first_month = self.get_end_of_month(start_date_dt)
             
             if total_months == 0:
-                end_date_dt = datetime.strptime(end_date, "%d/%m/%Y")
+                end_date_dt = as_datetime(end_date)
                 period_meetings = self.count_meetings_in_date_range(
                     group_id, start_date_dt, end_date_dt
                 )
@@ -957,23 +864,21 @@ class PaymentCalculator:
     
     def calculate_student_payment(self, student_id, group_id=None, start_date=None, end_date=None):
         if start_date is None:
-            student = self.get_student_by_id(student_id)
+            student = self._student_record(student_id)
             if not student:
                 return {
                     "success": False,
                     "error": f"Student with ID {student_id} not found"
                 }
             
-            student_groups = student.get("groups", [])
-            if not student_groups:
+            if not student.group_ids:
                 return {
                     "success": False,
                     "error": "Student is not enrolled in any groups"
                 }
             
             if group_id is None:
-                first_group_name = student_groups[0]
-                group_id = self.get_group_id_by_name(first_group_name)
+                group_id = student.group_ids[0]
             
             start_date = self.get_student_join_date_for_group(student_id, group_id)
             if not start_date:
@@ -989,11 +894,10 @@ class PaymentCalculator:
 
     def get_all_students_payment_summary(self):
         try:
-            students = self.load_students()
             summary = []
             
-            for student in students:
-                student_id = student.get("id")
+            for student in Records.students().all:
+                student_id = student.id
                 if not student_id:
                     continue
                 
@@ -1001,11 +905,12 @@ class PaymentCalculator:
                 if price_calc.get("success"):
                     summary.append({
                         "student_id": student_id,
-                        "student_name": student.get("name", ""),
-                        "groups": student.get("groups", []),
-                        "has_sister": student.get("has_sister", False),
-                        "join_date": student.get("join_date", ""),
-                        "payment_status": student.get("payment_status", ""),
+                        "student_name": student.name,
+                        "groups": Records.groups().names(student.group_ids),
+                        "group_ids": list(student.group_ids),
+                        "has_sister": student.has_sister,
+                        "join_date": student.join_date,
+                        "payment_status": student.payment_status,
                         "monthly_price": price_calc["final_monthly_price"],
                         "num_groups": price_calc["num_groups"],
                         "total_discount": price_calc["total_discount"],
@@ -1024,25 +929,20 @@ class PaymentCalculator:
             print(f"Error getting students payment summary: {e}")
             return []
     
-    def update_student_groups(self, student_id, new_groups):
+    def update_student_groups(self, student_id, new_group_ids):
         try:
-            students = self.load_students()
-            student_found = False
-            
-            for student in students:
-                if student.get("id") == student_id:
-                    student["groups"] = new_groups
-                    student_found = True
-                    break
-            
-            if not student_found:
+            if self._student_record(student_id) is None:
                 return {
                     "success": False,
                     "error": f"Student with ID {student_id} not found"
                 }
             
-            with open(self.students_file_path, "w", encoding="utf-8") as f:
-                json.dump({"students": students}, f, ensure_ascii=False, indent=2)
+            DataStore.apply(self.students_file_path, {
+                "op": "update_student_fields",
+                "student_id": student_id,
+                "fields": {"group_ids": list(new_group_ids)}
+            }, {"students": []})
+            self._invalidate_ledger([student_id])
             
             return self.calculate_monthly_price_with_discounts(student_id)
             
@@ -1054,23 +954,18 @@ class PaymentCalculator:
     
     def update_student_sister_status(self, student_id, has_sister):
         try:
-            students = self.load_students()
-            student_found = False
-            
-            for student in students:
-                if student.get("id") == student_id:
-                    student["has_sister"] = has_sister
-                    student_found = True
-                    break
-            
-            if not student_found:
+            if self._student_record(student_id) is None:
                 return {
                     "success": False,
                     "error": f"Student with ID {student_id} not found"
                 }
             
-            with open(self.students_file_path, "w", encoding="utf-8") as f:
-                json.dump({"students": students}, f, ensure_ascii=False, indent=2)
+            DataStore.apply(self.students_file_path, {
+                "op": "update_student_fields",
+                "student_id": student_id,
+                "fields": {"has_sister": has_sister}
+            }, {"students": []})
+            self._invalidate_ledger([student_id])
             
             return self.calculate_monthly_price_with_discounts(student_id)
             
@@ -1083,7 +978,7 @@ class PaymentCalculator:
 
     def get_student_payment_explanation(self, student_id, group_id=None, start_date=None, end_date=None):
         try:
-            student = self.get_student_by_id(student_id)
+            student = self._student_record(student_id)
             if not student:
                 return {
                     "success": False,
@@ -1096,29 +991,18 @@ class PaymentCalculator:
                 print(f"DEBUG: payment_result failed: {payment_result}")
                 return payment_result
             
-            payments = student.get('payments', [])
-            total_paid = 0
+            paid_agorot = 0
             payment_details = []
             
-            for payment in payments:
-                try:
-                    amount = payment.get('amount', 0)
-                    if isinstance(amount, str):
-                        amount = float(amount) if amount.strip() else 0
-                    elif isinstance(amount, (int, float)):
-                        amount = float(amount)
-                    else:
-                        amount = 0
-                    
-                    if amount > 0:
-                        total_paid += amount
-                        payment_details.append({
-                            "amount": amount,
-                            "date": payment.get('date', ''),
-                            "method": payment.get('payment_method', '')
-                        })
-                except (ValueError, AttributeError):
-                    continue
+            for payment in student.payments:
+                if payment.agorot is not None and payment.agorot > 0:
+                    paid_agorot += payment.agorot
+                    payment_details.append({
+                        "amount": PaymentBook.shekels(payment.agorot),
+                        "date": payment.date,
+                        "method": payment.method
+                    })
+            total_paid = PaymentBook.shekels(paid_agorot) if payment_details else 0
             
             total_required = payment_result.get("total_payment", 0)
             total_course_payment = 0
@@ -1129,10 +1013,11 @@ class PaymentCalculator:
                 if groups_with_dates:
                     latest_end_date = ""
                     for group_info in groups_with_dates:
-                        group = self.get_group_by_id(group_info["group_id"])
+                        group = self._group_record(group_info["group_id"])
                         if group:
-                            group_end_date = group.get("group_end_date", "")
-                            if group_end_date > latest_end_date:
+                            group_end_date = group.end_date
+                            if group_end_date and (not latest_end_date or
+                                                   date_sort_ordinal(group_end_date) > date_sort_ordinal(latest_end_date)):
                                 latest_end_date = group_end_date
                     
                     if latest_end_date:
@@ -1152,12 +1037,12 @@ class PaymentCalculator:
             
             explanation = {
                 "success": True,
-                "student_name": student.get("name", ""),
+                "student_name": student.name,
                 "student_id": student_id,
                 "calculation_period": payment_result.get("calculation_period", ""),
-                "groups": student.get("groups", []),
-                "num_groups": len(student.get("groups", [])),
-                "has_sister": student.get("has_sister", False),
+                "groups": Records.groups().names(student.group_ids),
+                "num_groups": len(student.group_ids),
+                "has_sister": student.has_sister,
                 "periods": payment_result.get("periods", []),
                 "total_required": total_required,
                 "total_course_payment": total_course_payment,
@@ -1411,4 +1296,7 @@ class PaymentCalculator:
             print(f"DEBUG: Error in _create_short_summary: {e}")
             import traceback
             traceback.print_exc()
-            return "שגיאה בהצגת סיכום התשלום"
\ No newline at end of file
+            return "שגיאה בהצגת סיכום התשלום"
+
+
+Instrumentation.register_class(PaymentCalculator)
@@ -0,0 +1,703 @@
+import json
+import sqlite3
+import threading
+from utils.data_journal import DataJournal
+from utils.manage_json import ManageJSON
+from utils.models import StudentRecord
+
+# Bumped whenever a table changes shape; `_migrate_schema` upgrades older
+# databases once, recorded in PRAGMA user_version.
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS students (
+    position INTEGER PRIMARY KEY,
+    id TEXT,
+    name TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_students_id ON students(id);
+
+CREATE TABLE IF NOT EXISTS student_group_ids (
+    student_position INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    student_id TEXT,
+    group_id TEXT,
+    PRIMARY KEY (student_position, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_student_group_ids_group ON student_group_ids(group_id);
+CREATE INDEX IF NOT EXISTS idx_student_group_ids_student ON student_group_ids(student_id);
+
+CREATE TABLE IF NOT EXISTS payments (
+    student_position INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    student_id TEXT,
+    amount TEXT,
+    date TEXT,
+    date_key TEXT,
+    payment_method TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (student_position, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_payments_date ON payments(date_key);
+CREATE INDEX IF NOT EXISTS idx_payments_student ON payments(student_id);
+
+CREATE TABLE IF NOT EXISTS groups (
+    position INTEGER PRIMARY KEY,
+    id TEXT,
+    name TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_groups_id ON groups(id);
+CREATE INDEX IF NOT EXISTS idx_groups_name ON groups(name);
+
+CREATE TABLE IF NOT EXISTS joining_groups (
+    group_key TEXT PRIMARY KEY,
+    position INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS joining_dates (
+    group_key TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    student_id TEXT,
+    join_date TEXT,
+    data TEXT NOT NULL,
+    PRIMARY KEY (group_key, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_joining_dates_student ON joining_dates(student_id, group_key);
+
+CREATE TABLE IF NOT EXISTS attendance_groups (
+    group_id TEXT PRIMARY KEY
+);
+
+CREATE TABLE IF NOT EXISTS attendance_dates (
+    group_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    date_key TEXT,
+    PRIMARY KEY (group_id, date)
+);
+CREATE INDEX IF NOT EXISTS idx_attendance_dates_key ON attendance_dates(group_id, date_key);
+
+CREATE TABLE IF NOT EXISTS attendance (
+    group_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    student_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    present TEXT NOT NULL,
+    PRIMARY KEY (group_id, date, student_id)
+);
+CREATE INDEX IF NOT EXISTS idx_attendance_student ON attendance(student_id);
+"""
+
+# Tables making up each document, with their key columns. A document is
+# replaced by diffing rows on these keys, so only changed rows are written.
+DOCUMENT_TABLES = {
+    "students": {
+        "students": ("position",),
+        "student_group_ids": ("student_position", "seq"),
+        "payments": ("student_position", "seq"),
+    },
+    "groups": {
+        "groups": ("position",),
+    },
+    "joining_dates": {
+        "joining_groups": ("group_key",),
+        "joining_dates": ("group_key", "seq"),
+    },
+    "attendance": {
+        "attendance_dates": ("group_id", "date"),
+        "attendance": ("group_id", "date", "student_id"),
+    },
+}
+
+TABLE_COLUMNS = {
+    "students": ("position", "id", "name", "data"),
+    "student_group_ids": ("student_position", "seq", "student_id", "group_id"),
+    "payments": ("student_position", "seq", "student_id", "amount", "date", "date_key", "payment_method", "data"),
+    "groups": ("position", "id", "name", "data"),
+    "joining_groups": ("group_key", "position"),
+    "joining_dates": ("group_key", "seq", "student_id", "join_date", "data"),
+    "attendance_dates": ("group_id", "date", "position", "date_key"),
+    "attendance": ("group_id", "date", "student_id", "position", "present"),
+}
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False)
+
+
+def _text(value):
+    return None if value is None else str(value)
+
+
+def _date_key(date_str):
+    """'dd/mm/yyyy' -> 'yyyy-mm-dd' so dates sort and range-scan in SQL"""
+    try:
+        day, month, year = str(date_str).strip().split("/")
+        return f"{int(year):04d}-{int(month):02d}-{int(day):02d}"
+    except (ValueError, AttributeError):
+        return ""
+
+
+class SQLiteStore:
+    """SQLite storage backend for the dance school data.
+
+    Holds the same documents as the JSON layout (students.json, groups.json,
+    joining_dates.json and attendance_{group_id}.json) as indexed rows.
+    Documents saved as a whole are diffed row by row inside a transaction;
+    the journal records of DataStore.apply (a payment, a student, an
+    attendance mark) are written as the rows they touch, and
+    PaymentCalculator reads single students and groups through the indexed
+    lookups. The database is created by `migrate_from_json`, run from the
+    diagnostics panel through DataStore.migrate_to_sqlite; once it exists
+    the DataStore routes the JSON documents to it.
+    """
+
+    DB_NAME = "dance_school.db"
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._write_counters = {}
+        self._migrate_schema()
+
+    def _migrate_schema(self):
+        """Upgrade a database created by an older version of the schema.
+
+        Version 2 indexes students by group id (student_group_ids) instead
+        of by group name (student_groups): the index is rebuilt from the
+        stored students, resolving legacy group names through the groups
+        table, and the old table is dropped.
+        """
+        (version,) = self._conn.execute("PRAGMA user_version").fetchone()
+        if version >= SCHEMA_VERSION:
+            return
+        with self.transaction() as conn:
+            if version < 2:
+                id_by_name = self._group_ids_by_name(conn)
+                rows = {}
+                for position, student_id, data in conn.execute("SELECT position, id, data FROM students").fetchall():
+                    rows.update(self._student_group_rows(position, student_id, json.loads(data), id_by_name))
+                conn.execute("DELETE FROM student_group_ids")
+                conn.executemany(
+                    "INSERT INTO student_group_ids (student_position, seq, student_id, group_id) VALUES (?, ?, ?, ?)",
+                    list(rows.values())
+                )
+                conn.execute("DROP TABLE IF EXISTS student_groups")
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    @staticmethod
+    def default_db_path(base_path=None):
+        base_path = base_path or ManageJSON.get_appdata_path()
+        return base_path / "data" / SQLiteStore.DB_NAME
+
+    @staticmethod
+    def open(db_path=None):
+        """Return the shared store for a database file, or None if it does not exist"""
+        db_path = db_path or SQLiteStore.default_db_path()
+        if not db_path.exists():
+            return None
+        key = str(db_path)
+        with SQLiteStore._instances_lock:
+            store = SQLiteStore._instances.get(key)
+            if store is None:
+                store = SQLiteStore(db_path)
+                SQLiteStore._instances[key] = store
+            return store
+
+    @staticmethod
+    def close_all():
+        with SQLiteStore._instances_lock:
+            for store in SQLiteStore._instances.values():
+                store._conn.close()
+            SQLiteStore._instances.clear()
+
+    def transaction(self):
+        return _Transaction(self)
+
+    def version(self, document):
+        """Changes whenever the document is written, by us or by another connection"""
+        with self._lock:
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            return data_version, self._write_counters.get(document, 0)
+
+    def _bump(self, document):
+        self._write_counters[document] = self._write_counters.get(document, 0) + 1
+
+    def _select(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # ----- document conversion -----
+
+    @staticmethod
+    def _group_ids_by_name(conn):
+        id_by_name = {}
+        for name, group_id in conn.execute("SELECT name, id FROM groups ORDER BY position").fetchall():
+            id_by_name.setdefault(name, group_id)
+        return id_by_name
+
+    @staticmethod
+    def _student_group_rows(position, student_id, student, id_by_name):
+        """student_group_ids rows of one student; legacy group names are resolved through id_by_name"""
+        if StudentRecord.is_legacy(student):
+            group_ids, _ = StudentRecord._legacy_group_ids(student, id_by_name)
+        else:
+            group_ids = student.get("group_ids", [])
+            group_ids = group_ids if isinstance(group_ids, list) else []
+        return {
+            (position, seq): (position, seq, student_id, _text(group_id))
+            for seq, group_id in enumerate(group_ids)
+        }
+
+    @staticmethod
+    def _student_rows(students, id_by_name, first_position=0):
+        rows = {"students": {}, "student_group_ids": {}, "payments": {}}
+        for position, student in enumerate(students, first_position):
+            record = {k: v for k, v in student.items() if k != "payments"}
+            if "payments" in student:
+                record["payments"] = None
+            student_id = _text(student.get("id"))
+            rows["students"][(position,)] = (position, student_id, student.get("name"), _dumps(record))
+            rows["student_group_ids"].update(SQLiteStore._student_group_rows(position, student_id, student, id_by_name))
+
+            payments = student.get("payments")
+            for seq, payment in enumerate(payments if isinstance(payments, list) else []):
+                payment = payment if isinstance(payment, dict) else {"value": payment}
+                rows["payments"][(position, seq)] = SQLiteStore._payment_row(position, seq, student_id, payment)
+        return rows
+
+    @staticmethod
+    def _payment_row(position, seq, student_id, payment):
+        return (
+            position, seq, student_id, _text(payment.get("amount")), payment.get("date"),
+            _date_key(payment.get("date", "")), payment.get("payment_method"), _dumps(payment)
+        )
+
+    def _load_students(self, document_arg=None):
+        payments = {}
+        for position, data in self._select("SELECT student_position, data FROM payments ORDER BY student_position, seq"):
+            payments.setdefault(position, []).append(json.loads(data))
+
+        students = []
+        for position, data in self._select("SELECT position, data FROM students ORDER BY position"):
+            record = json.loads(data)
+            if "payments" in record:
+                record["payments"] = payments.get(position, [])
+            students.append(record)
+        return {"students": students}
+
+    @staticmethod
+    def _group_rows(groups):
+        rows = {"groups": {}}
+        for position, group in enumerate(groups):
+            rows["groups"][(position,)] = (
+                position, _text(group.get("id")) if isinstance(group, dict) else None,
+                group.get("name") if isinstance(group, dict) else _text(group), _dumps(group)
+            )
+        return rows
+
+    def _load_groups(self, document_arg=None):
+        return {"groups": [json.loads(data) for (data,) in self._select("SELECT data FROM groups ORDER BY position")]}
+
+    @staticmethod
+    def _joining_date_rows(joining_dates):
+        rows = {"joining_groups": {}, "joining_dates": {}}
+        for position, (group_key, entries) in enumerate(joining_dates.items()):
+            rows["joining_groups"][(group_key,)] = (group_key, position)
+            for seq, entry in enumerate(entries):
+                rows["joining_dates"][(group_key, seq)] = (
+                    group_key, seq, _text(entry.get("student_id")), entry.get("join_date"), _dumps(entry)
+                )
+        return rows
+
+    def _load_joining_dates(self, document_arg=None):
+        joining_dates = {}
+        for (group_key,) in self._select("SELECT group_key FROM joining_groups ORDER BY position"):
+            joining_dates[group_key] = []
+        for group_key, data in self._select("SELECT group_key, data FROM joining_dates ORDER BY group_key, seq"):
+            joining_dates.setdefault(group_key, []).append(json.loads(data))
+        return joining_dates
+
+    @staticmethod
+    def _attendance_rows(group_id, attendance_data):
+        rows = {"attendance_dates": {}, "attendance": {}}
+        for position, (date, students) in enumerate(attendance_data.items()):
+            rows["attendance_dates"][(group_id, date)] = (group_id, date, position, _date_key(date))
+            for student_position, (student_id, present) in enumerate(students.items()):
+                rows["attendance"][(group_id, date, student_id)] = (
+                    group_id, date, student_id, student_position, _dumps(present)
+                )
+        return rows
+
+    def _load_attendance(self, group_id):
+        attendance_data = {}
+        for (date,) in self._select(
+                "SELECT date FROM attendance_dates WHERE group_id = ? ORDER BY position", (group_id,)):
+            attendance_data[date] = {}
+        for date, student_id, present in self._select(
+                "SELECT date, student_id, present FROM attendance WHERE group_id = ? ORDER BY date, position",
+                (group_id,)):
+            attendance_data.setdefault(date, {})[student_id] = json.loads(present)
+        return attendance_data
+
+    def _document_rows(self, document, document_arg, data):
+        if document == "students":
+            with self._lock:
+                id_by_name = self._group_ids_by_name(self._conn)
+            return self._student_rows(data.get("students", []) if isinstance(data, dict) else [], id_by_name)
+        if document == "groups":
+            return self._group_rows(data.get("groups", []) if isinstance(data, dict) else [])
+        if document == "joining_dates":
+            return self._joining_date_rows(data if isinstance(data, dict) else {})
+        if document == "attendance":
+            return self._attendance_rows(document_arg, data if isinstance(data, dict) else {})
+        raise ValueError(f"Unknown document: {document}")
+
+    def _existing_rows(self, table, key_columns, document, document_arg):
+        columns = TABLE_COLUMNS[table]
+        if document == "attendance":
+            rows = self._conn.execute(
+                f"SELECT {', '.join(columns)} FROM {table} WHERE group_id = ?", (document_arg,)
+            ).fetchall()
+        else:
+            rows = self._conn.execute(f"SELECT {', '.join(columns)} FROM {table}").fetchall()
+        key_indexes = [columns.index(c) for c in key_columns]
+        return {tuple(row[i] for i in key_indexes): tuple(row) for row in rows}
+
+    # ----- document API used by DataStore -----
+
+    def load_document(self, document, document_arg=None):
+        with self._lock:
+            if document == "students":
+                return self._load_students()
+            if document == "groups":
+                return self._load_groups()
+            if document == "joining_dates":
+                return self._load_joining_dates()
+            if document == "attendance":
+                return self._load_attendance(document_arg)
+            raise ValueError(f"Unknown document: {document}")
+
+    def has_document(self, document, document_arg=None):
+        if document == "attendance":
+            return bool(self._select("SELECT 1 FROM attendance_groups WHERE group_id = ?", (document_arg,)))
+        return True
+
+    def replace_document(self, document, data, document_arg=None):
+        """Replace a whole document, writing only the rows that changed"""
+        self.replace_documents([(document, data, document_arg)])
+
+    def replace_documents(self, changes):
+        """Replace or delete several documents in a single transaction.
+
+        `changes` holds (document, data, document_arg) triples; data None
+        deletes the document (only attendance documents can be deleted).
+        """
+        new_rows = [
+            self._document_rows(document, document_arg, data) if data is not None else None
+            for document, data, document_arg in changes
+        ]
+        with self.transaction() as conn:
+            for (document, data, document_arg), rows in zip(changes, new_rows):
+                if rows is None:
+                    self._delete_document(conn, document, document_arg)
+                else:
+                    self._replace_rows(conn, document, document_arg, rows)
+                self._bump(document)
+
+    def _replace_rows(self, conn, document, document_arg, new_rows):
+        for table, key_columns in DOCUMENT_TABLES[document].items():
+            existing = self._existing_rows(table, key_columns, document, document_arg)
+            wanted = new_rows[table]
+            stale = [key for key in existing if key not in wanted]
+            changed = [row for key, row in wanted.items() if existing.get(key) != row]
+            where = " AND ".join(f"{c} = ?" for c in key_columns)
+            if stale:
+                conn.executemany(f"DELETE FROM {table} WHERE {where}", stale)
+            if changed:
+                columns = TABLE_COLUMNS[table]
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) "
+                    f"VALUES ({', '.join('?' for _ in columns)})",
+                    changed
+                )
+        if document == "attendance":
+            conn.execute("INSERT OR IGNORE INTO attendance_groups (group_id) VALUES (?)", (document_arg,))
+
+    @staticmethod
+    def _delete_document(conn, document, document_arg):
+        if document != "attendance":
+            raise ValueError(f"Cannot delete document: {document}")
+        conn.execute("DELETE FROM attendance WHERE group_id = ?", (document_arg,))
+        conn.execute("DELETE FROM attendance_dates WHERE group_id = ?", (document_arg,))
+        conn.execute("DELETE FROM attendance_groups WHERE group_id = ?", (document_arg,))
+
+    def attendance_group_ids(self):
+        return [group_id for (group_id,) in self._select(
+            "SELECT group_id FROM attendance_groups ORDER BY group_id")]
+
+    # ----- indexed lookups used by PaymentCalculator -----
+
+    def get_student_by_id(self, student_id):
+        rows = self._select("SELECT position, data FROM students WHERE id = ? ORDER BY position LIMIT 1", (_text(student_id),))
+        if not rows:
+            return None
+        position, data = rows[0]
+        record = json.loads(data)
+        if "payments" in record:
+            record["payments"] = [json.loads(p) for (p,) in self._select(
+                "SELECT data FROM payments WHERE student_position = ? ORDER BY seq", (position,))]
+        return record
+
+    def get_group_by_id(self, group_id):
+        rows = self._select("SELECT data FROM groups WHERE id = ? ORDER BY position LIMIT 1", (_text(group_id),))
+        return json.loads(rows[0][0]) if rows else None
+
+    def get_group_id_by_name(self, group_name):
+        rows = self._select("SELECT data FROM groups WHERE name = ? ORDER BY position LIMIT 1", (group_name,))
+        return json.loads(rows[0][0]).get("id") if rows else None
+
+    def get_student_join_date_for_group(self, student_id, group_id):
+        rows = self._select(
+            "SELECT join_date FROM joining_dates WHERE group_key = ? AND student_id = ? ORDER BY seq LIMIT 1",
+            (_text(group_id), _text(student_id))
+        )
+        return rows[0][0] if rows else None
+
+    # ----- row-level mutations used by DataStore.apply -----
+
+    def apply(self, document, record, document_arg=None):
+        """Apply one DataJournal record by writing only the rows it touches.
+
+        Returns False, writing nothing, for records that have no row-level
+        form here; the caller then replaces the whole document.
+        """
+        op = record.get("op")
+        if document == "students":
+            if op == "add_payment":
+                self.add_payment(record["student_id"], record["payment"], record.get("payment_status"))
+                return True
+            if op == "update_student_fields" and "payments" not in record["fields"]:
+                self.update_student_fields(record["student_id"], record["fields"])
+                return True
+            if op == "put_student":
+                self.put_student(record.get("student_id", record["student"].get("id")), record["student"])
+                return True
+            if op == "remove_students":
+                self.remove_students(record["student_ids"])
+                return True
+        if document == "attendance" and op == "set" and len(record["keys"]) == 2:
+            date, student_id = record["keys"]
+            self.set_attendance(document_arg, date, student_id, record["value"])
+            return True
+        return False
+
+    @staticmethod
+    def _student_position(conn, student_id):
+        row = conn.execute(
+            "SELECT position FROM students WHERE id = ? ORDER BY position LIMIT 1", (_text(student_id),)
+        ).fetchone()
+        return row[0] if row is not None else None
+
+    @staticmethod
+    def _delete_student_rows(conn, positions):
+        params = [(position,) for position in positions]
+        conn.executemany("DELETE FROM students WHERE position = ?", params)
+        conn.executemany("DELETE FROM student_group_ids WHERE student_position = ?", params)
+        conn.executemany("DELETE FROM payments WHERE student_position = ?", params)
+
+    def _write_student(self, conn, position, student):
+        """Replace the rows of the student at a position"""
+        rows = self._student_rows([student], self._group_ids_by_name(conn), position)
+        self._delete_student_rows(conn, [position])
+        for table, table_rows in rows.items():
+            columns = TABLE_COLUMNS[table]
+            conn.executemany(
+                f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})",
+                list(table_rows.values())
+            )
+
+    def put_student(self, student_id, student):
+        """Replace the student with this id, or append it"""
+        with self.transaction() as conn:
+            position = self._student_position(conn, student_id)
+            if position is None:
+                (position,) = conn.execute("SELECT COALESCE(MAX(position) + 1, 0) FROM students").fetchone()
+            self._write_student(conn, position, student)
+            self._bump("students")
+
+    def update_student_fields(self, student_id, fields):
+        """Set top-level fields of one student (other than payments)"""
+        with self.transaction() as conn:
+            position = self._student_position(conn, student_id)
+            if position is None:
+                return
+            (data,) = conn.execute("SELECT data FROM students WHERE position = ?", (position,)).fetchone()
+            record = {**json.loads(data), **fields}
+            conn.execute(
+                "UPDATE students SET id = ?, name = ?, data = ? WHERE position = ?",
+                (_text(record.get("id")), record.get("name"), _dumps(record), position)
+            )
+            student_id = _text(record.get("id"))
+            conn.execute("DELETE FROM student_group_ids WHERE student_position = ?", (position,))
+            conn.executemany(
+                "INSERT INTO student_group_ids (student_position, seq, student_id, group_id) VALUES (?, ?, ?, ?)",
+                list(self._student_group_rows(position, student_id, record, self._group_ids_by_name(conn)).values())
+            )
+            self._bump("students")
+
+    def remove_students(self, student_ids):
+        """Remove every student with one of these ids"""
+        keys = [_text(student_id) for student_id in student_ids]
+        with self.transaction() as conn:
+            positions = [position for (position,) in conn.execute(
+                f"SELECT position FROM students WHERE id IN ({', '.join('?' for _ in keys)})", keys
+            ).fetchall()] if keys else []
+            self._delete_student_rows(conn, positions)
+            self._bump("students")
+
+    def add_payment(self, student_id, payment_data, payment_status=None):
+        """Append one payment (and optionally the new status) in a single transaction"""
+        with self.transaction() as conn:
+            row = conn.execute(
+                "SELECT position, data FROM students WHERE id = ? ORDER BY position LIMIT 1", (_text(student_id),)
+            ).fetchone()
+            if row is None:
+                return False
+            position, data = row
+            record = json.loads(data)
+            record["payments"] = None
+            if payment_status is not None:
+                record["payment_status"] = payment_status
+            conn.execute("UPDATE students SET data = ? WHERE position = ?", (_dumps(record), position))
+            (seq,) = conn.execute(
+                "SELECT COALESCE(MAX(seq) + 1, 0) FROM payments WHERE student_position = ?", (position,)
+            ).fetchone()
+            conn.execute(
+                "INSERT INTO payments (student_position, seq, student_id, amount, date, date_key, payment_method, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                self._payment_row(position, seq, _text(student_id), payment_data)
+            )
+            self._bump("students")
+            return True
+
+    def set_attendance(self, group_id, date, student_id, is_present):
+        """Record one attendance mark in a single transaction"""
+        group_id = _text(group_id)
+        with self.transaction() as conn:
+            conn.execute("INSERT OR IGNORE INTO attendance_groups (group_id) VALUES (?)", (group_id,))
+            if conn.execute("SELECT 1 FROM attendance_dates WHERE group_id = ? AND date = ?",
+                            (group_id, date)).fetchone() is None:
+                (position,) = conn.execute(
+                    "SELECT COALESCE(MAX(position) + 1, 0) FROM attendance_dates WHERE group_id = ?", (group_id,)
+                ).fetchone()
+                conn.execute("INSERT INTO attendance_dates (group_id, date, position, date_key) VALUES (?, ?, ?, ?)",
+                             (group_id, date, position, _date_key(date)))
+            existing = conn.execute(
+                "SELECT position FROM attendance WHERE group_id = ? AND date = ? AND student_id = ?",
+                (group_id, date, student_id)
+            ).fetchone()
+            if existing is None:
+                (position,) = conn.execute(
+                    "SELECT COALESCE(MAX(position) + 1, 0) FROM attendance WHERE group_id = ? AND date = ?",
+                    (group_id, date)
+                ).fetchone()
+            else:
+                position = existing[0]
+            conn.execute(
+                "INSERT OR REPLACE INTO attendance (group_id, date, student_id, position, present) VALUES (?, ?, ?, ?, ?)",
+                (group_id, date, student_id, position, _dumps(is_present))
+            )
+            self._bump("attendance")
+
+    # ----- migration -----
+
+    @staticmethod
+    def migrate_from_json(base_path=None, overwrite=False):
+        """One-shot import of the JSON layout under the app data folder.
+
+        The database is built next to the JSON files under a temporary name
+        and moved into place only after every document was imported, so a
+        failed migration never leaves a half-filled backend active. The JSON
+        files are left untouched as a backup.
+        """
+        base_path = base_path or ManageJSON.get_appdata_path()
+        data_dir = base_path / "data"
+        attendances_dir = base_path / "attendances"
+        db_path = SQLiteStore.default_db_path(base_path)
+        if db_path.exists() and not overwrite:
+            return {"success": False, "error": f"{db_path.name} already exists"}
+
+        def read_json(path, default):
+            return DataJournal.load_file(path, default)
+
+        tmp_path = db_path.with_name(db_path.name + ".migrating")
+        for leftover in (tmp_path, tmp_path.with_name(tmp_path.name + "-wal"), tmp_path.with_name(tmp_path.name + "-shm")):
+            leftover.unlink(missing_ok=True)
+
+        summary = {"students": 0, "payments": 0, "groups": 0, "joining_dates": 0, "attendance_files": 0}
+        store = SQLiteStore(tmp_path)
+        try:
+            students = read_json(data_dir / "students.json", {})
+            store.replace_document("students", students)
+            summary["students"] = len(students.get("students", []))
+            summary["payments"] = sum(len(s.get("payments", []) or []) for s in students.get("students", []))
+
+            groups = read_json(data_dir / "groups.json", {})
+            store.replace_document("groups", groups)
+            summary["groups"] = len(groups.get("groups", []))
+
+            joining_dates = read_json(data_dir / "joining_dates.json", {})
+            store.replace_document("joining_dates", joining_dates)
+            summary["joining_dates"] = sum(len(v) for v in joining_dates.values())
+
+            if attendances_dir.exists():
+                for attendance_file in sorted(attendances_dir.glob("attendance_*.json")):
+                    group_id = attendance_file.stem[len("attendance_"):]
+                    store.replace_document("attendance", read_json(attendance_file, {}), group_id)
+                    summary["attendance_files"] += 1
+
+            store._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        finally:
+            store._conn.close()
+
+        SQLiteStore.close_all()
+        tmp_path.replace(db_path)
+        summary["success"] = True
+        summary["db_path"] = str(db_path)
+        return summary
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT/ROLLBACK around a block, holding the store lock"""
+
+    def __init__(self, store):
+        self.store = store
+
+    def __enter__(self):
+        self.store._lock.acquire()
+        self.store._conn.execute("BEGIN IMMEDIATE")
+        return self.store._conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.store._conn.execute("COMMIT")
+            else:
+                self.store._conn.execute("ROLLBACK")
+        finally:
+            self.store._lock.release()
+        return False
+
+
+if __name__ == "__main__":
+    print(SQLiteStore.migrate_from_json())
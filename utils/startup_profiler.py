@@ -0,0 +1,106 @@
+import builtins
+import importlib.util
+import os
+import sys
+import threading
+import time
+
+
+class StartupProfiler:
+    """Opt-in startup profile: per-module import times and time to first frame.
+
+    Enabled with the `--profile-startup` argument or DANCESCHOOL_PROFILE_STARTUP=1.
+    While active, `builtins.__import__` is wrapped so the first import of
+    every module is timed; nested imports are subtracted from their parent
+    so each module reports both its own (self) and cumulative time. The
+    report is printed once the first frame has been added to the page.
+    """
+
+    ENV_VAR = "DANCESCHOOL_PROFILE_STARTUP"
+    ARGUMENT = "--profile-startup"
+    REPORT_LIMIT = 30
+
+    _started_at = None
+    _original_import = None
+    _records = []
+    _local = threading.local()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def is_requested() -> bool:
+        return StartupProfiler.ARGUMENT in sys.argv or os.environ.get(StartupProfiler.ENV_VAR) == "1"
+
+    @staticmethod
+    def is_active() -> bool:
+        return StartupProfiler._original_import is not None
+
+    @staticmethod
+    def start():
+        if StartupProfiler.is_active():
+            return
+        StartupProfiler._started_at = time.perf_counter()
+        StartupProfiler._records = []
+        StartupProfiler._original_import = builtins.__import__
+        builtins.__import__ = StartupProfiler._timed_import
+
+    @staticmethod
+    def stop():
+        if StartupProfiler.is_active():
+            builtins.__import__ = StartupProfiler._original_import
+            StartupProfiler._original_import = None
+
+    @staticmethod
+    def _module_name(name, globals, level):
+        if level == 0:
+            return name
+        package = (globals or {}).get("__package__") or ""
+        try:
+            return importlib.util.resolve_name("." * level + name, package)
+        except (ImportError, ValueError):
+            return name
+
+    @staticmethod
+    def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+        original = StartupProfiler._original_import
+        module_name = StartupProfiler._module_name(name, globals, level)
+        if original is None or module_name in sys.modules:
+            return (original or builtins.__import__)(name, globals, locals, fromlist, level)
+
+        stack = getattr(StartupProfiler._local, "stack", None)
+        if stack is None:
+            stack = StartupProfiler._local.stack = []
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            with StartupProfiler._lock:
+                StartupProfiler._records.append((module_name, elapsed - children, elapsed, len(stack)))
+
+    @staticmethod
+    def mark_first_frame():
+        """Stop profiling and print the report (no-op unless profiling is active)"""
+        if not StartupProfiler.is_active():
+            return
+        first_frame = time.perf_counter() - StartupProfiler._started_at
+        StartupProfiler.stop()
+        StartupProfiler.print_report(first_frame)
+
+    @staticmethod
+    def print_report(first_frame=None):
+        with StartupProfiler._lock:
+            records = list(StartupProfiler._records)
+        top_level = sum(cumulative for _, _, cumulative, depth in records if depth == 0)
+
+        print("=== Startup profile ===")
+        print(f"{'self ms':>9} {'cumul ms':>9}  module")
+        for module_name, self_time, cumulative, _ in sorted(records, key=lambda r: r[1], reverse=True)[:StartupProfiler.REPORT_LIMIT]:
+            print(f"{self_time * 1000:9.1f} {cumulative * 1000:9.1f}  {module_name}")
+        print(f"Modules imported: {len(records)}")
+        print(f"Total import time: {top_level * 1000:.1f} ms")
+        if first_frame is not None:
+            print(f"Time to first frame: {first_frame * 1000:.1f} ms")
@@ -0,0 +1,155 @@
+import re
+from typing import List, Dict, Any
+
+# Hebrew points and cantillation marks (niqqud, te'amim)
+_NIQQUD = re.compile("[\u0591-\u05bd\u05bf\u05c1\u05c2\u05c4\u05c5\u05c7]")
+_FINAL_LETTERS = str.maketrans({"ך": "כ", "ם": "מ", "ן": "נ", "ף": "פ", "ץ": "צ"})
+_SEPARATOR = "\x1f"
+_GRAM = 3
+
+
+def normalize(text: str) -> str:
+    """Lowercase, strip niqqud and fold Hebrew final letters to their regular form"""
+    return _NIQQUD.sub("", str(text).lower()).translate(_FINAL_LETTERS)
+
+
+def _grams(text: str):
+    return {text[i:i + _GRAM] for i in range(len(text) - _GRAM + 1)}
+
+
+class StudentSearchIndex:
+    """Trigram index over the searchable fields of student records.
+
+    Every top-level text or number field of a student (name, ID, phone,
+    join date, status and any parent/contact fields) and the names of the
+    student's groups are normalized into one searchable string; payments are
+    not indexed. Group names come from the `group_names` mapping (str(group
+    id) -> name) the index was built with; `use_group_names` returns an index
+    of the students under new group names when the groups change. A
+    substring query
+    intersects the postings of its trigrams and confirms the few remaining
+    candidates with a plain substring check. Queries shorter than three
+    characters scan the normalized strings directly.
+
+    The index is cached as a DataStore derived structure of students.json
+    and searched from other threads, so it is never changed once built:
+    when a journaled mutation replaces the snapshot, `refresh` returns a
+    copy patched for the student records that were added, replaced or
+    removed (sharing the posting sets it does not touch) instead of
+    rebuilding it.
+    """
+
+    def __init__(self, students: List[Dict[str, Any]] = None, group_names: Dict[str, str] = None):
+        self.group_names = dict(group_names or {})
+        self._next_doc = 0
+        self._doc_by_student = {}
+        self._students = {}
+        self._texts = {}
+        self._postings = {}
+        self._owned = set()
+        for student in students or []:
+            self._add(student)
+
+    @staticmethod
+    def from_data(data, group_names: Dict[str, str] = None) -> "StudentSearchIndex":
+        students = data.get("students", []) if isinstance(data, dict) else []
+        return StudentSearchIndex(students, group_names)
+
+    @staticmethod
+    def searchable_text(student: Dict[str, Any], group_names: Dict[str, str] = None) -> str:
+        values = []
+        for key, value in student.items():
+            if key == "payments":
+                continue
+            if key == "group_ids":
+                if isinstance(value, list) and group_names:
+                    values.extend(group_names[str(g)] for g in value if str(g) in group_names)
+                continue
+            if isinstance(value, list):
+                values.extend(v for v in value if isinstance(v, (str, int, float)) and not isinstance(v, bool))
+            elif isinstance(value, (str, int, float)) and not isinstance(value, bool):
+                values.append(value)
+        return _SEPARATOR.join(normalize(value) for value in values)
+
+    def _add(self, student):
+        key = id(student)
+        if key in self._doc_by_student:
+            return
+        doc = self._next_doc
+        self._next_doc += 1
+        text = self.searchable_text(student, self.group_names)
+        self._doc_by_student[key] = doc
+        self._students[doc] = student
+        self._texts[doc] = text
+        for gram in _grams(text):
+            self._posting(gram).add(doc)
+
+    def _remove(self, key):
+        doc = self._doc_by_student.pop(key)
+        del self._students[doc]
+        text = self._texts.pop(doc)
+        for gram in _grams(text):
+            if gram in self._postings:
+                postings = self._posting(gram)
+                postings.discard(doc)
+                if not postings:
+                    del self._postings[gram]
+
+    def _posting(self, gram) -> set:
+        """Posting set of a gram owned by this index (a set shared with the source of a copy is copied first)"""
+        postings = self._postings.get(gram)
+        if postings is None or gram not in self._owned:
+            postings = self._postings[gram] = set(postings or ())
+            self._owned.add(gram)
+        return postings
+
+    def _copy(self) -> "StudentSearchIndex":
+        index = StudentSearchIndex.__new__(StudentSearchIndex)
+        index.group_names = self.group_names
+        index._next_doc = self._next_doc
+        index._doc_by_student = dict(self._doc_by_student)
+        index._students = dict(self._students)
+        index._texts = dict(self._texts)
+        index._postings = dict(self._postings)
+        index._owned = set()
+        return index
+
+    def refresh(self, data) -> "StudentSearchIndex":
+        """Index of a new snapshot sharing most student records (self if nothing changed)"""
+        students = data.get("students", []) if isinstance(data, dict) else []
+        current = {id(student) for student in students}
+        removed = [key for key in self._doc_by_student if key not in current]
+        added = [student for student in students if id(student) not in self._doc_by_student]
+        if not removed and not added:
+            return self
+        index = self._copy()
+        for key in removed:
+            index._remove(key)
+        for student in added:
+            index._add(student)
+        return index
+
+    def use_group_names(self, group_names: Dict[str, str]) -> "StudentSearchIndex":
+        """Index of the same students under new group names (self if they did not change)"""
+        if group_names == self.group_names:
+            return self
+        return StudentSearchIndex(list(self._students.values()), group_names)
+
+    def matching(self, query: str) -> set:
+        """ids (id()) of the indexed student records containing the query"""
+        query = normalize(query)
+        if len(query) < _GRAM:
+            docs = [doc for doc, text in self._texts.items() if query in text]
+        else:
+            postings = sorted((self._postings.get(gram, set()) for gram in _grams(query)), key=len)
+            candidates = set.intersection(*postings) if postings else set()
+            docs = [doc for doc in candidates if query in self._texts[doc]]
+        return {id(self._students[doc]) for doc in docs}
+
+    def covers(self, students: List[Dict[str, Any]]) -> bool:
+        return all(id(student) in self._doc_by_student for student in students)
+
+    def search(self, students: List[Dict[str, Any]], query: str) -> List[Dict[str, Any]]:
+        """The given students (all indexed) that match the query, in their order"""
+        matched = self.matching(query)
+        return [student for student in students if id(student) in matched]
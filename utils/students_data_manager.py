@@ -1,29 +1,27 @@
-import json
 from typing import List, Dict, Any
-from utils.manage_json import ManageJSON
+from utils.data_store import DataStore
+from utils.models import Records, StudentRecord
+from utils.payment_ledger import PaymentLedger
+from utils.student_search_index import StudentSearchIndex
 
 class StudentsDataManager:
     """Manager for students data operations"""
     
     def __init__(self):
-        data_dir = ManageJSON.get_appdata_path() / "data"
-        data_dir.mkdir(parents=True, exist_ok=True)
-        
-        self.students_file = data_dir / "students.json"
-        self.groups_file = data_dir / "groups.json"
+        self.students_file = DataStore.students_file()
+        self.groups_file = DataStore.groups_file()
+        self._search_index = None
+        self._renamed_index = None
 
 
     def load_students(self):
-        """Load students from JSON file"""
-        try:
-            with open(self.students_file, encoding="utf-8") as f:
-                data = json.load(f)
-                return data.get("students", [])
-        except FileNotFoundError:
-            return []
-        except Exception as e:
-            print(f"Error loading students: {e}")
-            return []
+        """Load students from JSON file (shared snapshot, read-only)"""
+        return DataStore.load_students()
+
+    def _load_students_for_update(self):
+        """Load a private copy of the students list for read-modify-write"""
+        data = DataStore.load_copy(self.students_file, {})
+        return data.get("students", []) if isinstance(data, dict) else []
         
     def get_students_stats(self, students: List[Dict[str, Any]]) -> Dict[str, int]:
         """Calculate students statistics"""
@@ -42,35 +40,52 @@ class StudentsDataManager:
         if not query:
             return students.copy()
         
-        query_lower = query.lower()
-        return [
-            student for student in students
-            if query_lower in json.dumps(student, ensure_ascii=False).lower()
-        ]
+        group_names = Records.groups().name_by_key
+        index = self._with_group_names(DataStore.derived(
+            self.students_file, "search_index", lambda data: StudentSearchIndex.from_data(data, group_names), {}
+        ), group_names)
+        if not index.covers(students):
+            if self._search_index is None or self._search_index[0] is not students:
+                self._search_index = (students, StudentSearchIndex(students, group_names))
+            self._search_index = (students, self._search_index[1].use_group_names(group_names))
+            index = self._search_index[1]
+        return index.search(students, query)
+
+    def _with_group_names(self, index, group_names):
+        """The shared index under the current group names; a re-indexed copy is kept while both are unchanged"""
+        if self._renamed_index is not None and self._renamed_index[0] is index:
+            renamed = self._renamed_index[1].use_group_names(group_names)
+        else:
+            renamed = index.use_group_names(group_names)
+        if renamed is not index:
+            self._renamed_index = (index, renamed)
+        return renamed
 
     def get_all_students(self):
-        """Get all students"""
-        try:
-            with open(self.students_file, encoding="utf-8") as f:
-                return json.load(f).get("students", [])
-        except Exception as e:
-            print(f"Error loading students: {e}")
-            return []
+        """Get all students (shared snapshot, read-only)"""
+        return DataStore.load_students()
 
     def get_students_by_group(self, group_name):
-        students = self.get_all_students()
+        students, _ = self.get_students_by_group_with_balances(group_name)
+        return students
+
+    def get_students_by_group_with_balances(self, group_name):
+        """Get a group's roster with payment status, plus the per-student balances"""
+        group_id = Records.groups().id_by_name.get(group_name)
+        roster = Records.students().in_group(group_id) if group_id is not None else []
+        balances = PaymentLedger.get_balances(roster)
+
         result = []
-        for s in students:
-            if group_name in s.get("groups", []):
-                self.recalc_payment_status(s)
-                result.append(s)
-        return result
+        for s in roster:
+            student = dict(s)
+            self.recalc_payment_status(student, balances.get(s.get("id")))
+            result.append(student)
+        return result, balances
 
     def save_students(self, students):
         """Save students to file"""
         try:
-            with open(self.students_file, 'w', encoding="utf-8") as f:
-                json.dump({"students": students}, f, ensure_ascii=False, indent=4)
+            DataStore.save(self.students_file, {"students": students}, indent=4)
             return True
         except Exception as e:
             print(f"Error saving students: {e}")
@@ -78,28 +93,25 @@ class StudentsDataManager:
 
     def load_groups(self):
         """Load groups from JSON file"""
+        return DataStore.load_groups()
+    
+    def _apply(self, record):
+        """Record a single mutation in the students journal"""
         try:
-            with open(self.groups_file, encoding="utf-8") as f:
-                data = json.load(f)
-                return data.get("groups", [])
+            DataStore.apply(self.students_file, record, {"students": []}, indent=4)
+            return True
         except Exception as e:
-            print(f"Error loading groups: {e}")
-            return []
+            print(f"Error saving students: {e}")
+            return False
     
     def update_student(self, student_id, new_data):
         """Update a specific student by ID"""
         try:
-            students = self.get_all_students()
-            
-            updated = False
-            for i, student in enumerate(students):
-                if student['id'] == student_id:
-                    students[i] = new_data
-                    updated = True
-                    break
+            students = self.load_students()
             
-            if updated:
-                success = self.save_students(students)
+            if any(student['id'] == student_id for student in students):
+                success = self._apply({"op": "put_student", "student_id": student_id, "student": new_data})
+                PaymentLedger.invalidate_students([student_id])
                 return success
             else:
                 return False
@@ -110,36 +122,31 @@ class StudentsDataManager:
 
 
     def add_student(self, student_data):
-        """Add new student or add group to existing student"""
-        students = self.load_students()
+        """Add new student or add group to existing student.
+
+        The group is given by name in "group" and stored by id; nothing is
+        saved (and False is returned) when the name matches no group, so
+        the enrollment is never dropped.
+        """
         student_id = student_data.get("id")
         new_group = student_data.get("group")
+        new_group_id = StudentRecord.resolve_group_name(new_group, Records.groups().id_by_name) if new_group else None
+        if new_group and new_group_id is None:
+            print(f"Group '{new_group}' not found")
+            return False
         
-        existing_student = None
-        for i, student in enumerate(students):
-            if student.get("id") == student_id:
-                existing_student = i
-                break
-        
+        existing_student = Records.students().by_id.get(student_id)
         if existing_student is not None:
-            if "groups" not in students[existing_student]:
-                old_group = students[existing_student].get("group")
-                students[existing_student]["groups"] = [old_group] if old_group else []
-                if "group" in students[existing_student]:
-                    del students[existing_student]["group"]
-            
-            if new_group and new_group not in students[existing_student]["groups"]:
-                students[existing_student]["groups"].append(new_group)
+            record = StudentRecord.from_dict(existing_student.to_dict())
         else:
-            if "group" in student_data:
-                student_data["groups"] = [student_data["group"]]
-                del student_data["group"]
-            elif "groups" not in student_data:
-                student_data["groups"] = []
-            
-            students.append(student_data)
+            record = StudentRecord.from_dict({k: v for k, v in student_data.items() if k != "group"})
+        if new_group_id is not None and not record.in_group(new_group_id):
+            record.group_ids.append(new_group_id)
+        student = record.to_dict()
         
-        return self.save_students(students)
+        success = self._apply({"op": "put_student", "student_id": student_id, "student": student})
+        PaymentLedger.invalidate_students([student_id])
+        return success
     
     def student_exists(self, student_id):
         """Check if student with given ID exists"""
@@ -148,37 +155,25 @@ class StudentsDataManager:
     
     def student_exists_in_this_group(self, student_id, group_name):
         """Check if student with given ID exists in specific group"""
-        students = self.load_students()
-        return any(
-            student.get("id") == student_id and 
-            group_name in student.get("groups", [])
-            for student in students
-        )
+        student = Records.students().by_id.get(student_id)
+        group_id = Records.groups().id_by_name.get(group_name)
+        return student is not None and group_id is not None and student.in_group(group_id)
     
     def delete_student_attendance(self, student_id, group_name):
         """Delete student attendance from group attendance file"""
         try:
-            groups = self.load_groups()
-            group_id = None
-            
-            for group in groups:
-                if group.get("name") == group_name:
-                    group_id = group.get("id")
-                    break
-            
+            group_id = Records.groups().id_by_name.get(group_name)
             if not group_id:
                 print(f"Group '{group_name}' not found")
                 return False
             
-            attendances_dir = ManageJSON.get_appdata_path() / "attendances"
-            attendance_file = attendances_dir / f"attendance_{group_id}.json"
+            attendance_file = DataStore.attendance_file(group_id)
             
-            if not attendance_file.exists():
+            if not DataStore.exists(attendance_file):
                 print(f"Attendance file {attendance_file} not found")
                 return True  
             
-            with open(attendance_file, 'r', encoding="utf-8") as f:
-                attendance_data = json.load(f)
+            attendance_data = DataStore.load_copy(attendance_file, {})
             
             updated = False
             for date in attendance_data:
@@ -187,8 +182,7 @@ class StudentsDataManager:
                     updated = True
             
             if updated:
-                with open(attendance_file, 'w', encoding="utf-8") as f:
-                    json.dump(attendance_data, f, ensure_ascii=False, indent=2)
+                DataStore.save(attendance_file, attendance_data)
                 print(f"Deleted attendance for student {student_id} from group {group_name}")
             
             return True
@@ -200,32 +194,25 @@ class StudentsDataManager:
     def delete_student_from_group(self, student_id, group_name):
         """Delete a student from specific group or completely if it's the last group"""
         try:
-            students = self.get_all_students()
-            updated = False
+            record = None
             
-            for i, student in enumerate(students):
-                if student['id'] == student_id:
-                    if "group" in student and "groups" not in student:
-                        student["groups"] = [student["group"]]
-                        del student["group"]
-                    
-                    groups = student.get("groups", [])
-                    
-                    if group_name in groups:
-                        groups.remove(group_name)
-                        
-                        self.delete_student_attendance(student_id, group_name)
-                        
-                        if len(groups) == 0:
-                            students.pop(i)
-                        else:
-                            students[i]["groups"] = groups
-                        
-                        updated = True
-                        break
+            student = Records.students().by_id.get(student_id)
+            group_id = Records.groups().id_by_name.get(group_name)
+            if student is not None and group_id is not None and student.in_group(group_id):
+                group_ids = [own for own in student.group_ids if str(own) != str(group_id)]
+                
+                self.delete_student_attendance(student_id, group_name)
+                
+                if len(group_ids) == 0:
+                    record = {"op": "remove_students", "student_ids": [student_id]}
+                else:
+                    updated = student.to_dict()
+                    updated["group_ids"] = group_ids
+                    record = {"op": "put_student", "student_id": student_id, "student": updated}
             
-            if updated:
-                success = self.save_students(students)
+            if record is not None:
+                success = self._apply(record)
+                PaymentLedger.invalidate_students([student_id])
                 return success
             else:
                 print("Student not found in specified group")
@@ -238,11 +225,13 @@ class StudentsDataManager:
     def delete_student(self, student_name):
         """Delete a student completely from all groups"""
         try:
-            students = self.get_all_students()
-            student_exists = any(s['name'] == student_name for s in students)
-            print(f"Student exists: {student_exists}")
-            updated_students = [s for s in students if s['name'] != student_name]
-            success = self.save_students(updated_students)
+            students = self.load_students()
+            student_ids = [s.get('id') for s in students if s['name'] == student_name]
+            print(f"Student exists: {bool(student_ids)}")
+            if not student_ids:
+                return True
+            success = self._apply({"op": "remove_students", "student_ids": student_ids})
+            PaymentLedger.invalidate_students(student_ids)
             return success
             
         except Exception as e:
@@ -253,103 +242,78 @@ class StudentsDataManager:
         """Add payment to student and update payment status"""
         from .payment_utils import PaymentCalculator 
         
-        students = self.get_all_students()
         payment_calculator = PaymentCalculator() 
         
-        for student in students:
+        for student in self.load_students():
             if student['id'] == student_id:
-                student.setdefault("payments", []).append(payment_data)
-                
-                total_paid = sum(
-                    float(p['amount']) for p in student['payments']
-                    if isinstance(p.get('amount'), (int, float)) or 
-                    (isinstance(p.get('amount'), str) and p['amount'].replace('.', '', 1).isdigit())
-                )
-
-                calc_result = payment_calculator.calculate_student_payment_until_now(student_id)
-                if calc_result.get("success"):
-                    total_owed = calc_result["total_payment"]
-                else:
-                    total_owed = 0
-
-                if total_owed > 0:
-                    if total_paid == total_owed:
-                        student['payment_status'] = "שולם"
-                    elif total_paid > total_owed:
-                        student['payment_status'] = "שילם יותר (זיכוי)"
-                    elif total_paid > 0:
-                        student['payment_status'] = f"שולם עד כה"
-                    else:
-                        student['payment_status'] = f"חוב {total_owed}₪"
-                else:
-                    student['payment_status'] = "לא נמצא מחיר קבוצות"
+                updated = {**student, "payments": list(student.get("payments", [])) + [payment_data]}
+                balance = payment_calculator.summarize_student_balance(updated)
                 break
+        else:
+            return True
         
-        return self.save_students(students)
+        success = self._apply({
+            "op": "add_payment",
+            "student_id": student_id,
+            "payment": payment_data,
+            "payment_status": balance["status"]
+        })
+        if success:
+            PaymentLedger.store(student_id, balance, payment_calculator)
+        return success
 
     def _get_groups(self):
         """Get groups data for pricing"""
-        try:
-            with open(self.groups_file, encoding="utf-8") as f:
-                return json.load(f).get("groups", [])
-        except Exception as e:
-            print(f"Error loading groups: {e}")
-            return []
+        return DataStore.load_groups()
 
     def migrate_old_format(self):
-        """Migrate old format (single group) to new format (groups array)"""
+        """Migrate old formats (a single "group" name, or a "groups" list of names) to group ids.
+
+        Data already stored by group id is left alone. Nothing is rewritten
+        while any legacy group name matches no group in groups.json (which
+        includes groups.json missing or unreadable), so no enrollment is
+        lost; students.json is backed up to students.json.bak before the
+        rewrite. Returns True once every student is stored by group id.
+
+        Runs in the background while the UI is live, so the store lock is
+        held from the read through the write: an edit applied meanwhile
+        waits instead of being overwritten.
+        """
         try:
-            students = self.get_all_students()
-            updated = False
-            
-            for student in students:
-                if "group" in student and "groups" not in student:
-                    old_group = student["group"]
-                    student["groups"] = [old_group] if old_group else []
-                    del student["group"]
-                    updated = True
-            
-            if updated:
-                return self.save_students(students)
-            return True
+            with DataStore._lock:
+                students = self.load_students()
+                legacy = [student for student in students if StudentRecord.is_legacy(student)]
+                if not legacy:
+                    return True
+
+                id_by_name = Records.groups().id_by_name
+                unresolved = []
+                for student in legacy:
+                    for group_name in StudentRecord.legacy_group_names(student):
+                        if StudentRecord.resolve_group_name(group_name, id_by_name) is None and group_name not in unresolved:
+                            unresolved.append(group_name)
+                if unresolved:
+                    print(f"Group id migration skipped, groups not found: {', '.join(map(str, unresolved))}")
+                    return False
+
+                DataStore.backup(self.students_file)
+                migrated = self.save_students([
+                    StudentRecord.from_dict(student, id_by_name).to_dict() if StudentRecord.is_legacy(student) else student
+                    for student in students
+                ])
+            # The ledger takes its own lock before the store lock, so it is updated after releasing it
+            if migrated:
+                PaymentLedger.invalidate_all()
+            return migrated
             
         except Exception as e:
             print(f"Error in migrate_old_format: {e}")
             return False
         
-    def recalc_payment_status(self, student):
+    def recalc_payment_status(self, student, balance=None):
         """Recalculate and update payment status for a student"""
-        from .payment_utils import PaymentCalculator
-        
-        payment_calculator = PaymentCalculator()
-
-        total_paid = sum(
-            float(p['amount']) for p in student.get('payments', [])
-            if isinstance(p.get('amount'), (int, float)) or
-            (isinstance(p.get('amount'), str) and p['amount'].replace('.', '', 1).isdigit())
-        )
-
-        calc_result = payment_calculator.calculate_student_payment_until_now(student.get('id'))
-        if calc_result.get("success"):
-            total_owed = calc_result["total_payment"]
-            course_started = calc_result.get("course_started", True) 
-        else:
-            total_owed = 0
-            course_started = False
-
-        if total_owed > 0:
-            if total_paid == total_owed:
-                student['payment_status'] = "שולם במלואו"
-            elif total_paid > total_owed:
-                student['payment_status'] = "שילם יותר (זיכוי)"
-            elif total_paid > 0:
-                student['payment_status'] = "שולם עד כה"
-            else:
-                student['payment_status'] = f"חוב {total_owed}₪"
-        else:
-            if not course_started:
-                student['payment_status'] = "החוג לא התחיל"
-            else:
-                student['payment_status'] = "לא נמצא מחיר קבוצות"
+        if balance is None:
+            balance = PaymentLedger.get_balance(student)
 
+        student['payment_status'] = balance["status"]
         return student
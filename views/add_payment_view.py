@@ -1,6 +1,7 @@
 import flet as ft
 from components.modern_dialog import ModernDialog
 from datetime import datetime
+from utils.models import parse_agorot
 
 
 class AddPaymentView:
@@ -300,12 +301,11 @@ class AddPaymentView:
         if not self.form_state['amount'].strip():
             errors.append("יש להזין סכום")
         else:
-            try:
-                amount = float(self.form_state['amount'])
-                if amount <= 0:
-                    errors.append("הסכום חייב להיות חיובי")
-            except ValueError:
+            agorot = parse_agorot(self.form_state['amount'])
+            if agorot is None:
                 errors.append("יש להזין סכום תקין (מספר בלבד)")
+            elif agorot <= 0:
+                errors.append("הסכום חייב להיות חיובי")
         
         if not self.form_state['date'].strip():
             errors.append("יש להזין תאריך")
@@ -1,8 +1,7 @@
-import json
 import flet as ft
 from typing import Dict, Any
 from utils.attendance_utils import AttendanceUtils
-from utils.manage_json import ManageJSON
+from utils.models import Records
 
 class AttendanceTableView:
     def __init__(self, page: ft.Page, navigation_handler=None, group: Dict[str, Any] = None, parent_page=None):
@@ -21,17 +20,9 @@ class AttendanceTableView:
         self.attendance_data = AttendanceUtils.load_attendance_file(self.group.get('id', ''))
         
         try:
-            data_dir = ManageJSON.get_appdata_path() / "data"
-            students_file = data_dir / "students.json"
-            
-            if students_file.exists():
-                with open(students_file, "r", encoding="utf-8") as f:
-                    students_data = json.load(f)
-                    self.students = []
-                    for s in students_data.get("students", []):
-                        student_groups = s.get("groups", [])
-                        if self.group.get("name", "").strip() in student_groups:
-                            self.students.append({"id": s["id"], "name": s["name"]})
+            self.students = []
+            for s in Records.students().in_group(self.group.get('id', '')):
+                self.students.append({"id": s["id"], "name": s["name"]})
         except Exception as e:
             print(f"Error loading students: {e}")
 
@@ -195,7 +186,7 @@ class AttendanceTableView:
             if date not in self.attendance_data:
                 self.attendance_data[date] = {}
             self.attendance_data[date][str(student_id)] = new_status
-            self.save_attendance()
+            AttendanceUtils.set_student_attendance(self.group.get('id', ''), date, student_id, new_status)
             
             if new_status:
                 new_icon = ft.Icon(ft.Icons.CHECK_CIRCLE, size=22, color=ft.Colors.GREEN_600)
@@ -1,11 +1,10 @@
 import flet as ft
-import json
-from utils.manage_json import ManageJSON  
 from components.modern_card import ModernCard
 from components.clean_button import CleanButton
 from components.modern_dialog import ModernDialog
+from utils.payment_book import PaymentBook
 from utils.payment_utils import PaymentCalculator
-from utils.manage_json import ManageJSON  
+from utils.data_store import DataStore
 
 class PaymentsView:
     """View for managing student payments"""
@@ -18,43 +17,23 @@ class PaymentsView:
         self.dialog = ModernDialog(self.page)
         self.payment_calculator = PaymentCalculator()
         self.load_student_data()
-        data_dir = ManageJSON.get_appdata_path() / "data"
-        data_dir.mkdir(parents=True, exist_ok=True)
-        self.pricing_config_file = data_dir / "pricing.json"
+        self.pricing_config_file = DataStore.pricing_file()
         self.load_pricing_config()
 
     def load_pricing_config(self):
-        try:
-            if self.pricing_config_file.exists():
-                with open(self.pricing_config_file, "r", encoding="utf-8") as f:
-                    config = json.load(f)
-                    self.base_price = config.get("single", 180)
-                    self.price_two_groups = config.get("two", 280)
-                    self.price_three_plus = config.get("three", 360)
-                    self.sister_discount_amount = config.get("sister", 20)
-            else:
-                self.base_price = self.base_price
-                self.price_two_groups = 280
-                self.price_three_plus = 360
-                self.sister_discount_amount = 20
-        except Exception as e:
-            print(f"Error loading pricing config, using defaults: {e}")
-            self.base_price = self.base_price
-            self.price_two_groups = 280
-            self.price_three_plus = 360
-            self.sister_discount_amount = 20
+        config = DataStore.load(self.pricing_config_file)
+        if not isinstance(config, dict):
+            config = {}
+        self.base_price = config.get("single", 180)
+        self.price_two_groups = config.get("two", 280)
+        self.price_three_plus = config.get("three", 360)
+        self.sister_discount_amount = config.get("sister", 20)
 
     def load_student_data(self):
         """Load fresh student data from file"""
         try:
-            data_dir = ManageJSON.get_appdata_path() / "data"
-            students_file = data_dir / "students.json"
-            
-            if students_file.exists():
-                with open(students_file, "r", encoding="utf-8") as f:
-                    students_data = json.load(f)
-                    
-                for student in students_data.get("students", []):
+            if DataStore.exists(DataStore.students_file()):
+                for student in DataStore.load_students():
                     if student.get("id") == self.student_id:
                         self.student = student
                         break
@@ -377,10 +356,7 @@ class PaymentsView:
     def _render_payments_list(self):
         """Render payments list"""
         payments = self.student.get('payments', [])
-        total_paid = sum(
-            float(p['amount']) for p in payments
-            if p['amount'].replace('.', '', 1).isdigit()
-        )
+        total_paid = PaymentBook.shekels(PaymentBook.current().paid(self.student))
         
         summary = ModernCard(
             content=ft.Container(
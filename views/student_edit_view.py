@@ -1,9 +1,12 @@
-import json
 import flet as ft
 from components.modern_dialog import ModernDialog
-from utils.manage_json import ManageJSON
+from utils.data_store import DataStore
+from utils.date_utils import parse_date
 from utils.validation import ValidationUtils
+from utils.payment_book import PaymentBook
 from utils.payment_utils import PaymentCalculator
+from utils.payment_ledger import PaymentLedger
+from utils.models import Records
 
 class StudentEditView:
     """View for editing student information with modern React-like styling"""
@@ -24,24 +27,20 @@ class StudentEditView:
     def _get_join_date_from_joining_dates(self):
         """Get join date from joining_dates.json file for the specific group"""
         try:
-            data_dir = ManageJSON.get_appdata_path() / "data"
-            joining_dates_file = data_dir / "joining_dates.json"
-            
-            if not joining_dates_file.exists():
+            if not DataStore.exists(DataStore.joining_dates_file()):
                 return None
                 
-            with open(joining_dates_file, "r", encoding="utf-8") as f:
-                joining_dates = json.load(f)
+            joining_dates = DataStore.load_joining_dates()
             
             if self.group_id and self.group_id in joining_dates:
                 for student_entry in joining_dates[self.group_id]:
                     if student_entry.get("student_id") == self.student.get("id"):
                         return student_entry.get("join_date")
             
-            student_groups = self.student.get('groups', [])
+            student_groups = Records.students().record_for(self.student).group_ids
             earliest_date = None
             
-            for group_name in student_groups:
+            for group_id in student_groups:
                 for gid, students_list in joining_dates.items():
                     for student_entry in students_list:
                         if student_entry.get("student_id") == self.student.get("id"):
@@ -50,11 +49,8 @@ class StudentEditView:
                                 if not earliest_date:
                                     earliest_date = join_date
                                 else:
-                                    from datetime import datetime
                                     try:
-                                        current_date = datetime.strptime(join_date, "%d/%m/%Y")
-                                        earliest_date_obj = datetime.strptime(earliest_date, "%d/%m/%Y")
-                                        if current_date < earliest_date_obj:
+                                        if parse_date(join_date) < parse_date(earliest_date):
                                             earliest_date = join_date
                                     except:
                                         pass
@@ -68,17 +64,12 @@ class StudentEditView:
     def _get_earliest_join_date_from_joining_dates(self, student_id):
         """Get the earliest join date for a student from all groups in joining_dates.json"""
         try:
-            data_dir = ManageJSON.get_appdata_path() / "data"
-            joining_dates_file = data_dir / "joining_dates.json"
-            
-            if not joining_dates_file.exists():
+            if not DataStore.exists(DataStore.joining_dates_file()):
                 return None
                 
-            with open(joining_dates_file, "r", encoding="utf-8") as f:
-                joining_dates = json.load(f)
+            joining_dates = DataStore.load_joining_dates()
             
             earliest_date = None
-            from datetime import datetime
             
             for group_id, students_list in joining_dates.items():
                 for student_entry in students_list:
@@ -86,7 +77,7 @@ class StudentEditView:
                         join_date = student_entry.get("join_date")
                         if join_date:
                             try:
-                                current_date = datetime.strptime(join_date, "%d/%m/%Y")
+                                current_date = parse_date(join_date)
                                 if not earliest_date:
                                     earliest_date = current_date
                                     earliest_date_str = join_date
@@ -144,7 +135,7 @@ class StudentEditView:
                         color="#0f172a"
                     ),
                     ft.Text(
-                        f"{self.student['name']} - {', '.join(self.student.get('groups', []))}",
+                        f"{self.student['name']} - {', '.join(Records.group_names(self.student))}",
                         size=16,
                         weight=ft.FontWeight.W_500,
                         color="#64748b"
@@ -185,23 +176,10 @@ class StudentEditView:
     def _get_payment_display_status(self):
         """Get the display status for payment based on the logic from students_table.py"""
         payment_status = self.student.get('payment_status', '')
-        student_groups = self.student.get('groups', [])
+        student_groups = Records.students().record_for(self.student).group_ids
         student_id = self.student.get('id', '')
         
-        payments = self.student.get('payments', [])
-        amount_paid = 0
-        for payment in payments:
-            try:
-                amount = payment.get('amount', 0)
-                if isinstance(amount, str):
-                    amount = float(amount) if amount.strip() else 0
-                elif isinstance(amount, (int, float)):
-                    amount = float(amount)
-                else:
-                    amount = 0
-                amount_paid += amount
-            except (ValueError, AttributeError):
-                continue
+        amount_paid = PaymentBook.shekels(PaymentBook.current().paid(self.student))
         
         if payment_status == "שולם":
             return "שולם", ft.Colors.GREEN_600
@@ -214,9 +192,8 @@ class StudentEditView:
                     total_owed_until_now = payment_calculator.get_student_payment_amount_until_now(student_id)
                 else:
                     total_owed_until_now = 0
-                    for group_name in student_groups:
-                        group_id = payment_calculator.get_group_id_by_name(group_name)
-                        if group_id:
+                    for group_id in student_groups:
+                        if group_id is not None:
                             actual_join_date = payment_calculator.get_student_join_date_for_group(student_id, group_id)
                             if actual_join_date:
                                 group_payment = payment_calculator.get_payment_amount_until_now(group_id, actual_join_date)
@@ -303,7 +280,7 @@ class StudentEditView:
                     content=ft.Row([
                         ft.Icon(ft.Icons.GROUP_OUTLINED, size=20, color="#64748b"),
                         ft.Text(
-                            ', '.join(self.student.get('groups', [])),
+                            ', '.join(Records.group_names(self.student)),
                             size=16,
                             weight=ft.FontWeight.W_400,
                             color="#0f172a"
@@ -501,14 +478,8 @@ class StudentEditView:
     def _update_joining_dates(self, student_id: str, name: str, join_date: str):
         """Update joining_dates.json with the new date only for the current group"""
         try:
-            data_dir = ManageJSON.get_appdata_path() / "data"
-            joining_dates_file = data_dir / "joining_dates.json"
-
-            if joining_dates_file.exists():
-                with open(joining_dates_file, "r", encoding="utf-8") as f:
-                    joining_dates = json.load(f)
-            else:
-                joining_dates = {}
+            joining_dates_file = DataStore.joining_dates_file()
+            joining_dates = DataStore.load_copy(joining_dates_file, {})
 
             if not self.group_id:
                 print("No group_id provided, skipping update.")
@@ -532,8 +503,8 @@ class StudentEditView:
                     "join_date": join_date
                 })
 
-            with open(joining_dates_file, "w", encoding="utf-8") as f:
-                json.dump(joining_dates, f, ensure_ascii=False, indent=2)
+            DataStore.save(joining_dates_file, joining_dates)
+            PaymentLedger.invalidate_students([student_id])
 
             print(f"Successfully updated joining date for student {student_id} in group {self.group_id}")
 
@@ -582,12 +553,8 @@ class StudentEditView:
 
         earliest_join_date = self._get_earliest_join_date_from_joining_dates(self.student['id'])
         
-        students_file = ManageJSON.get_appdata_path() / "data" / "students.json"
-        students_data = []
-        if students_file.exists():
-            with open(students_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                students_data = data.get("students", [])
+        students_file = DataStore.students_file()
+        students_data = DataStore.load_copy(students_file, {}).get("students", [])
 
         for student in students_data:
             if isinstance(student, dict) and student.get("id") == self.student["id"]:
@@ -603,8 +570,8 @@ class StudentEditView:
                     student["join_date"] = date_result
                 break
 
-        with open(students_file, "w", encoding="utf-8") as f:
-            json.dump({"students": students_data}, f, ensure_ascii=False, indent=2)
+        DataStore.save(students_file, {"students": students_data})
+        PaymentLedger.invalidate_students([self.student["id"]])
 
         self._set_loading_state(False)
         self._show_success_message()
@@ -1,6 +1,9 @@
 import flet as ft
 from components.modern_card import ModernCard
 from components.clean_button import CleanButton
+from utils.payment_book import PaymentBook
+from utils.payment_utils import PaymentCalculator
+from utils.models import Records
 
 
 class StudentsGroupView:
@@ -11,13 +14,15 @@ class StudentsGroupView:
         self.page = parent.page
         self.group_name = parent.group_name
         self.data_manager = parent.data_manager
+        self.payment_calculator = PaymentCalculator()
+        self.balances = {}
 
     def render(self):
         """Render the students list view"""
         header = self._create_header()
         self.parent.layout.controls.append(header)
         
-        students = self.data_manager.get_students_by_group(self.group_name)
+        students, self.balances = self.data_manager.get_students_by_group_with_balances(self.group_name)
         
         if not students:
             self._render_empty_state()
@@ -111,49 +116,30 @@ class StudentsGroupView:
             return False
 
     def _get_student_groups(self, student):
-        """Get student groups - supports both old and new format"""
-        if "groups" in student:
-            return student["groups"]
-        elif "group" in student:
-            return [student["group"]]
-        else:
-            return []
+        """Get the ids of the student's groups - supports both old and new format"""
+        return Records.students().record_for(student).group_ids
 
     def _get_payment_display_status(self, student):
         """Get payment status for display with 'paid until now' logic"""
-        from utils.payment_utils import PaymentCalculator        
         payment_status = student.get('payment_status', '')
         
         if payment_status == "שולם":
             return "שולם"
         elif payment_status == "חוב":
-            payment_calculator = PaymentCalculator()
+            payment_calculator = self.payment_calculator
             
-            payments = student.get('payments', [])
-            total_paid = 0
-            for payment in payments:
-                try:
-                    amount = payment.get('amount', 0)
-                    if isinstance(amount, str):
-                        amount = float(amount) if amount.strip() else 0
-                    elif isinstance(amount, (int, float)):
-                        amount = float(amount)
-                    else:
-                        amount = 0
-                    total_paid += amount
-                except (ValueError, AttributeError):
-                    continue
+            total_paid = PaymentBook.shekels(PaymentBook.current().paid(student))
             
             student_id = student.get('id', '')
             
-            if student_id:
+            if student_id in self.balances:
+                total_owed_until_now = self.balances[student_id]["total_owed"]
+            elif student_id:
                 total_owed_until_now = payment_calculator.get_student_payment_amount_until_now(student_id)
             else:
-                student_groups = student.get('groups', [])
                 total_owed_until_now = 0
-                for group_name in student_groups:
-                    group_id = payment_calculator.get_group_id_by_name(group_name)
-                    if group_id:
+                for group_id in self._get_student_groups(student):
+                    if group_id is not None:
                         join_date = payment_calculator.get_student_join_date_for_group(student_id, group_id)
                         if join_date:
                             group_payment = payment_calculator.get_payment_amount_until_now(group_id, join_date)
@@ -252,12 +238,10 @@ class StudentsGroupView:
     def _create_contact_info(self, student):
         """Create contact information section"""
         # קבלת תאריך הצטרפות לקבוצה הנוכחית באמצעות PaymentCalculator
-        from utils.payment_utils import PaymentCalculator
-        
         display_join_date = student.get('join_date', 'לא ידוע')  # ברירת מחדל
         
         try:
-            payment_calculator = PaymentCalculator()
+            payment_calculator = self.payment_calculator
             group_id = payment_calculator.get_group_id_by_name(self.group_name)
             student_id = student.get('id', '')
             
@@ -1,3 +1,5 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import flet as ft
 from components.stats_cards import StatsCards
 from components.students_table import StudentsTable
@@ -5,7 +7,15 @@ from components.no_results_dialog import NoResultsDialog
 
 
 class StudentsListView:
-    """Main view for students list page"""
+    """Main view for students list page.
+
+    Typing schedules a search after a short debounce; the searches
+    themselves run one at a time on a single worker thread, so two of them
+    never use the data manager's search index at once.
+    """
+    
+    SEARCH_DEBOUNCE = 0.25
+    _search_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="student-search")
     
     def __init__(self, parent):
         self.parent = parent
@@ -19,6 +29,11 @@ class StudentsListView:
         
         self.current_students = []
         self.filtered_students = []
+        self.search_query = ""
+        
+        self._search_lock = threading.Lock()
+        self._search_timer = None
+        self._search_generation = 0
         
     def create_header(self) -> ft.Container:
         """Create page header"""
@@ -116,7 +131,9 @@ class StudentsListView:
     
     def create_table_section(self) -> ft.Container:
         """Create table section"""
-        if not self.filtered_students:
+        if not self.filtered_students and self.search_query:
+            self.table_container = NoResultsDialog.create_inline()
+        elif not self.filtered_students:
             self.table_container = self.create_empty_state()
         else:
             self.students_table.update(self.filtered_students)
@@ -155,21 +172,49 @@ class StudentsListView:
         )
     
     def filter_students(self, e):
-        """Filter students based on search query"""
+        """Schedule a search for the current query, replacing any pending one"""
         query = e.control.value.strip() if e and e.control and e.control.value else ""
         
+        with self._search_lock:
+            self._cancel_search()
+            generation = self._search_generation
+            self._search_timer = threading.Timer(self.SEARCH_DEBOUNCE, self._queue_search, args=(query, generation))
+            self._search_timer.daemon = True
+            self._search_timer.start()
+    
+    def _cancel_search(self):
+        """Drop the pending search and invalidate any search already running"""
+        self._search_generation += 1
+        if self._search_timer:
+            self._search_timer.cancel()
+            self._search_timer = None
+    
+    def _queue_search(self, query, generation):
+        """Hand the debounced search to the search worker"""
+        self._search_executor.submit(self._run_search, query, generation)
+    
+    def _run_search(self, query, generation):
+        """Run a search on the search worker and apply it unless it was superseded"""
+        if generation != self._search_generation:
+            return
+        students = self.current_students
         if not query:
-            self.filtered_students = self.current_students.copy()
+            filtered = students.copy()
         else:
-            self.filtered_students = self.data_manager.filter_students(self.current_students, query)
-            
-            if not self.filtered_students:
-                NoResultsDialog.show(self.page)
+            filtered = self.data_manager.filter_students(students, query)
         
-        self.update_components()
+        with self._search_lock:
+            if generation != self._search_generation:
+                return
+            self._search_timer = None
+            self.search_query = query
+            self.filtered_students = filtered
+            self.update_components()
     
     def refresh_data(self, e=None):
         """Refresh students data"""
+        with self._search_lock:
+            self._cancel_search()
         self.load_data()
         self.update_components()
         
@@ -184,17 +229,18 @@ class StudentsListView:
         """Clear search and show all students"""
         if self.search_field:
             self.search_field.value = ""
-            self.search_field.update()
         
+        with self._search_lock:
+            self._cancel_search()
+        self.search_query = ""
         self.filtered_students = self.current_students.copy()
         self.update_components()
     
     def update_components(self):
-        """Update only the dynamic components without rebuilding everything"""
+        """Update only the dynamic components, sent to the page in a single update"""
         if self.stats_container:
             stats = self.data_manager.get_students_stats(self.filtered_students)
             self.stats_container.content = StatsCards.create_stats_row(stats)
-            self.stats_container.update()
         
         if self.table_container:
             for i, control in enumerate(self.parent.layout.controls):
@@ -210,6 +256,7 @@ class StudentsListView:
         """Load students data"""
         self.current_students = self.data_manager.load_students()
         self.filtered_students = self.current_students.copy()
+        self.search_query = ""
     
     def render(self):
         """Render the complete view"""